@@ -11,6 +11,11 @@ from pathlib import Path
 from utils.common import CommonUtils
 from components.CommandDeviceDict import CommandDeviceDict
 from components.CommandExecutor import CommandExecutor
+from components.CommandMetrics import CommandMetrics
+from components.MetricsServer import get_metrics_server
+from components.DataStore import LazyDataStore
+from components.ExecutionPolicy import SessionGuard
+from utils.dirs import get_dirs
 from typing import Optional, Any
 from version import __version__
 from components.Logger import AutoComLogger, get_logger
@@ -218,10 +223,138 @@ def apply_configs_for_commands(configForCommands: dict, dict_data: dict):
                 command[action_type].extend(cfg_actions)
 
 
-def execute_with_loop(dict_path: str, loop_count=3, infinite_loop=False, config=None):
+def execute_with_shards(
+    dict_path: str,
+    loop_count=3,
+    infinite_loop=False,
+    config=None,
+    shards=0,
+    shard_barrier="ordered",
+):
+    """多进程分片模式执行：设备按命令量分配到多个 worker 进程
+
+    Args:
+        shards: 分片数量，0 表示自动（min(CPU 核数, 设备数)）
+        shard_barrier: "ordered" 保持命令先后顺序，"iteration" 每轮只同步一次
+    """
+    from components.ShardCoordinator import ShardCoordinator
+
+    executed_count = 0
+    failure_count = 0
+    coordinator = None
+    try:
+        dict_data = load_commands_from_file(dict_path)
+        if config:
+            merge_config(config, dict_data)
+        if "ConfigForDevices" in dict_data:
+            apply_configs_for_device(
+                dict_data.get("ConfigForDevices", {}), dict_data.get("Devices", [])
+            )
+        if "ConfigForCommands" in dict_data:
+            apply_configs_for_commands(
+                dict_data.get("ConfigForCommands", {}), dict_data
+            )
+
+        coordinator = ShardCoordinator(
+            dict_data, shard_count=shards, barrier=shard_barrier
+        )
+        if infinite_loop:
+            logger.log_session_start(
+                "🔄 Infinite loop mode enabled - Press Ctrl+C to stop"
+            )
+        executed_count, failure_count = coordinator.run(loop_count, infinite_loop)
+    except KeyboardInterrupt:
+        logger.log_iteration_error("Execution interrupted by user")
+        sys.exit(1)
+    except FileNotFoundError:
+        logger.log_iteration_error(f"Error: Dictionary file '{dict_path}' not found")
+        sys.exit(1)
+    except json.JSONDecodeError:
+        logger.log_iteration_error(f"Error: Invalid JSON format in '{dict_path}'")
+        sys.exit(1)
+    except (RuntimeError, Exception) as e:
+        logger.log_iteration_error(f"Fatal: {e}")
+        sys.exit(1)
+    finally:
+        if coordinator is not None:
+            report_command_metrics(
+                coordinator.command_metrics, str(get_dirs().session_dir)
+            )
+        if executed_count == 0:
+            summary_line = "🧾 Summary: No iterations were executed."
+        elif failure_count == 0:
+            summary_line = f"🧾 Summary:{executed_count - failure_count}/{executed_count} iterations passed."
+        else:
+            summary_line = (
+                f"🧾 Summary:{failure_count}/{executed_count} iterations failed."
+            )
+        logger.log_session_end(summary_line)
+
+
+def execute_with_fleet(dict_data: dict, loop_count=3, infinite_loop=False):
+    """Fleet 模式执行：Devices 中的设备模板展开为多个实例，各单元并发执行同一计划
+
+    Returns:
+        dict: FleetRunner 聚合统计
+    """
+    from components.FleetRunner import FleetRunner
+
+    if "ConfigForDevices" in dict_data:
+        apply_configs_for_device(
+            dict_data.get("ConfigForDevices", {}), dict_data.get("Devices", [])
+        )
+    if "ConfigForCommands" in dict_data:
+        apply_configs_for_commands(dict_data.get("ConfigForCommands", {}), dict_data)
+
+    runner = FleetRunner(dict_data)
+    if infinite_loop:
+        logger.log_session_start("🔄 Infinite loop mode enabled - Press Ctrl+C to stop")
+    try:
+        return runner.run(loop_count, infinite_loop)
+    except KeyboardInterrupt:
+        logger.log_iteration_error("Execution interrupted by user")
+        return runner.summary()
+    finally:
+        report_command_metrics(runner.command_metrics, str(get_dirs().session_dir))
+
+
+def execute_with_loop(
+    dict_path: str,
+    loop_count=3,
+    infinite_loop=False,
+    config=None,
+    shards=None,
+    shard_barrier="ordered",
+    pipeline_skew=None,
+):
+    from components.FleetRunner import has_device_templates
+
     # Load the dictionary file
     dict_data = load_commands_from_file(dict_path)
 
+    if has_device_templates(dict_data):
+        if config:
+            merge_config(config, dict_data)
+        if shards is not None:
+            logger.log_session_warning(
+                "Device templates found, running in fleet mode (--shards ignored)"
+            )
+        try:
+            summary = execute_with_fleet(dict_data, loop_count, infinite_loop)
+        except ValueError as e:
+            logger.log_iteration_error(f"Fatal: {e}")
+            sys.exit(1)
+        total = summary["total"]
+        logger.log_session_end(
+            f"🧾 Summary: {total['passed_units']}/{total['units']} units passed."
+        )
+        return
+
+    if shards is not None:
+        return execute_with_shards(
+            dict_path, loop_count, infinite_loop, config, shards, shard_barrier
+        )
+
     # Merge configuration if provided
     if config:
         merge_config(config, dict_data)
@@ -231,6 +364,8 @@ def execute_with_loop(dict_path: str, loop_count=3, infinite_loop=False, config=
     failure_count = 0
     command_device_dict: Optional[CommandDeviceDict] = None
     executor: Optional[CommandExecutor] = None
+    session_guard: Optional[SessionGuard] = None
+    command_metrics = CommandMetrics()
 
     try:
         if "ConfigForDevices" in dict_data:
@@ -241,6 +376,11 @@ def execute_with_loop(dict_path: str, loop_count=3, infinite_loop=False, config=
         # Create CommandExecutor to create CommandDeviceDict
         executor = CommandExecutor(dict_data)
         command_device_dict = executor.command_device_dict
+        # 按 (设备, 命令) 统计延迟直方图，会话结束时输出百分位并保存
+        executor.command_listeners.append(command_metrics.record_command)
+        metrics_server = get_metrics_server()
+        if metrics_server is not None:
+            metrics_server.bind(command_metrics, command_device_dict, executor.data_store)
 
         # Save the DICT content to a file in the log_date_dir, for later reference
         from pathlib import Path
@@ -287,13 +427,40 @@ def execute_with_loop(dict_path: str, loop_count=3, infinite_loop=False, config=
         failure_count = 0
         executed_count = 0  # Track actual number of COMPLETED iterations
 
+        # 流水线迭代：ConfigForIterations.pipeline 或 --pipeline-skew 开启
+        iteration_config = dict(cdd_dict.get("ConfigForIterations", {}))
+        if pipeline_skew is not None:
+            iteration_config["pipeline"] = True
+            iteration_config["max_skew"] = pipeline_skew
+
+        if iteration_config.get("pipeline"):
+            from components.IterationPipeline import (
+                IterationPipeline,
+                build_device_groups,
+            )
+
+            if infinite_loop:
+                logger.log_session_start(
+                    "🔄 Infinite loop mode enabled - Press Ctrl+C to stop"
+                )
+            pipeline = IterationPipeline(
+                executor,
+                build_device_groups(cdd_dict, iteration_config.get("groups")),
+                iteration_config.get("max_skew", 1),
+            )
+            executed_count, failure_count = pipeline.run(loop_count, infinite_loop)
+            return
+
+        # 会话级提前终止：连续失败次数 / 总时长预算（到期时取消正在进行的等待）
+        session_guard = SessionGuard(executor.policy, on_expire=executor.cancel).start()
+
         # Use while True for infinite loop mode, otherwise use for loop
         if infinite_loop:
             logger.log_session_start(
                 "🔄 Infinite loop mode enabled - Press Ctrl+C to stop"
             )
             iteration = 0
-            while True:
+            while not session_guard.should_stop():
                 iteration += 1
                 current_iteration = executed_count + 1  # 显示当前正在执行的迭代编号
                 # logger.log_iteration_start(iteration=current_iteration, total=iteration)
@@ -324,11 +491,14 @@ def execute_with_loop(dict_path: str, loop_count=3, infinite_loop=False, config=
                     result = False
                 if not result:
                     failure_count += 1
+                session_guard.record(result)
                 logger.log_iteration_end(iteration=current_iteration, total=loop_count)
         else:
             # Normal loop with specified count
             iteration = 0
             for i in range(loop_count):
+                if session_guard.should_stop():
+                    break
                 iteration += 1
                 # logger.log_iteration_start(iteration=iteration, total=loop_count)
                 current_iteration = executed_count + 1  # 显示当前正在执行的迭代编号
@@ -359,9 +529,13 @@ def execute_with_loop(dict_path: str, loop_count=3, infinite_loop=False, config=
                     result = False
                 if not result:
                     failure_count += 1
+                session_guard.record(result)
                 logger.log_iteration_end(iteration=current_iteration, total=loop_count)
     except KeyboardInterrupt:
         logger.log_iteration_error("Execution interrupted by user")
+        if executor is not None:
+            # 打断正在进行的命令等待并丢弃延迟命令，让下面的收尾尽快完成
+            executor.cancel("interrupted by user")
         sys.exit(1)
     except FileNotFoundError:
         logger.log_iteration_error(f"Error: Dictionary file '{dict_path}' not found")
@@ -373,6 +547,8 @@ def execute_with_loop(dict_path: str, loop_count=3, infinite_loop=False, config=
         logger.log_iteration_error(f"Fatal: {e}")
         sys.exit(1)
     finally:
+        if session_guard is not None:
+            session_guard.cancel()
         # close all devices and save data
         if "command_device_dict" in locals() and command_device_dict is not None:
             command_device_dict.close_all_devices()
@@ -388,6 +564,10 @@ def execute_with_loop(dict_path: str, loop_count=3, infinite_loop=False, config=
             except Exception as e:
                 logger.log_session_error(f"Warning: Error stopping data store: {e}")
 
+        report_command_metrics(
+            command_metrics, getattr(command_device_dict, "log_date_dir", None)
+        )
+
         # Use executed_count (actual iterations) instead of loop_count in summary
         if executed_count == 0:
             summary_line = "🧾 Summary: No iterations were executed."
@@ -398,6 +578,22 @@ def execute_with_loop(dict_path: str, loop_count=3, infinite_loop=False, config=
                 f"🧾 Summary:{failure_count}/{executed_count} iterations failed."
             )
         logger.log_session_end(summary_line)
+        logger.flush()
+
+
+def report_command_metrics(command_metrics: CommandMetrics, session_dir: Optional[str]):
+    """输出每个 (设备, 命令) 的延迟百分位，并保存到会话目录的 command_metrics.json"""
+    if not len(command_metrics):
+        return
+    for line in command_metrics.summary_lines():
+        logger.log_session_info(line)
+    if session_dir:
+        metrics_path = Path(session_dir) / "command_metrics.json"
+        try:
+            command_metrics.save(str(metrics_path))
+            logger.log_session_info(f"Command latency metrics saved to {metrics_path}")
+        except OSError as e:
+            logger.log_session_error(f"Error saving command metrics: {e}")
 
 
 def execute_with_folder(path: str, files: list, config: dict = {}):
@@ -410,9 +606,18 @@ def execute_with_folder(path: str, files: list, config: dict = {}):
             template_dict.get("ConfigForDevices", {}), template_dict.get("Devices", [])
         )
 
+    # 整个文件夹共用一个会话级 DataStore（首次使用时创建），
+    # 每个文件的执行器不再各自启动保存线程和会话文件
+    data_store = LazyDataStore(template_dict.get("ConfigForDataStore"))
+
     # 创建 CommandDeviceDict 对象
-    command_device_dict = CommandDeviceDict(template_dict)
-    executor = CommandExecutor(command_device_dict)
+    command_device_dict = CommandDeviceDict(template_dict, data_store)
+    executor = None
+    # 所有文件共用一个延迟直方图，结束时输出百分位并保存
+    command_metrics = CommandMetrics()
+    metrics_server = get_metrics_server()
+    if metrics_server is not None:
+        metrics_server.bind(command_metrics, command_device_dict, data_store)
 
     failure_count = 0
     dict_path = ""  # Initialize dict_path before try block
@@ -454,7 +659,11 @@ def execute_with_folder(path: str, files: list, config: dict = {}):
                     cdd_dict.get("ConfigForCommands", {}),
                     cdd_dict,
                 )
-            executor = CommandExecutor(command_device_dict)
+            if executor is not None:
+                # 上一个文件的执行器：只关闭其后台线程，DataStore 继续共用
+                executor.shutdown()
+            executor = CommandExecutor(command_device_dict, data_store=data_store)
+            executor.command_listeners.append(command_metrics.record_command)
 
             logger.log_session_start(f"{'💬 Executing dictionary file ' + file}")
 
@@ -478,17 +687,19 @@ def execute_with_folder(path: str, files: list, config: dict = {}):
     finally:
         # close all devices and save data
         command_device_dict.close_all_devices()  # Use the new method to properly cleanup
-        try:
-            executor.shutdown()
-        except Exception as e:
-            logger.log_session_error(f"Warning: Error shutting down executor: {e}")
+        if executor is not None:
+            try:
+                executor.shutdown()
+            except Exception as e:
+                logger.log_session_error(f"Warning: Error shutting down executor: {e}")
 
         try:
-            executor.data_store.force_save()  # Use force_save instead of non-existent save_to_file
-            executor.data_store.stop()
+            data_store.stop()  # stop() 会先完成最后一次保存
         except Exception as e:
             logger.log_session_error(f"Warning: Error stopping data store: {e}")
 
+        report_command_metrics(command_metrics, command_device_dict.log_date_dir)
+
         logger.log_session_end(
             (
                 f"{'✅ ' + str(len(files) - failure_count) + '/' + str(len(files))} files passed."
@@ -575,12 +786,17 @@ def monitor_folder(folder_path, file_queue, stop_event):
     logger.log_session_end("Folder monitoring stopped")
 
 
-def process_file_queue(file_queue, stop_event):
+def process_file_queue(file_queue, stop_event, data_store=None):
     """
     Continuously process files from the queue.
+
+    All files share one session DataStore. When ``data_store`` is not given it is
+    created lazily from the ConfigForDataStore of the first file and stopped when
+    processing stops; a store passed in by the caller is left running.
     """
     failure_count = 0
     total_files = 0
+    owns_data_store = data_store is None
 
     while not stop_event.is_set():
         try:
@@ -606,7 +822,10 @@ def process_file_queue(file_queue, stop_event):
                         dict_data.get("Devices", []),
                     )
 
-                command_device_dict = CommandDeviceDict(dict_data)
+                if data_store is None:
+                    data_store = LazyDataStore(dict_data.get("ConfigForDataStore"))
+
+                command_device_dict = CommandDeviceDict(dict_data, data_store)
 
                 # Save the dict content to a file in the log_date_dir
                 from pathlib import Path
@@ -644,7 +863,7 @@ def process_file_queue(file_queue, stop_event):
                         cdd_dict,
                     )
 
-                executor = CommandExecutor(command_device_dict)
+                executor = CommandExecutor(command_device_dict, data_store=data_store)
 
                 logger.log_session_start(
                     f"{'💬 Executing dictionary file ' + file_name}"
@@ -685,10 +904,10 @@ def process_file_queue(file_queue, stop_event):
                         logger.log_session_error(f"Error shutting down executor: {e}")
 
                     try:
-                        executor.data_store.force_save()  # Use force_save instead of non-existent save_to_file
-                        executor.data_store.stop()
+                        # 共用的 DataStore 不停止，只请求保存本文件的结果
+                        executor.data_store.force_save()
                     except Exception as e:
-                        logger.log_session_error(f"Error stopping executor: {e}")
+                        logger.log_session_error(f"Error saving data store: {e}")
 
             # 标记任务完成
             file_queue.task_done()
@@ -697,6 +916,12 @@ def process_file_queue(file_queue, stop_event):
             logger.log_session_error(f"Unexpected error in file processing: {e}")
             continue
 
+    if owns_data_store and data_store is not None:
+        try:
+            data_store.stop()
+        except Exception as e:
+            logger.log_session_error(f"Error stopping data store: {e}")
+
     logger.log_session_end("File processing stopped")
 
     # 打印最终统计信息
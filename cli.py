@@ -1,5 +1,6 @@
 """AutoCom CLI 入口"""
 
+import atexit
 import sys
 import os
 import json
@@ -16,6 +17,14 @@ from AutoCom import (
 )
 from version import __version__
 from components.Logger import AutoComLogger
+from components.EventStream import open_event_stream
+from components.MetricsServer import start_metrics_server
+from components.Profiling import (
+    PHASE_TIMERS_FILE,
+    SessionProfiler,
+    disable_phase_timers,
+    enable_phase_timers,
+)
 
 # 获取路径管理对象
 dirs = get_dirs()
@@ -60,7 +69,32 @@ def run_main():
         print()
         print("✨ 选项说明")
         print()
-        print("  --cli-output-mode  指定 CLI 日志输出方式: 'table' 或 'plain' (默认: 'table')")
+        print("  --cli-output-mode  指定 CLI 日志输出方式: 'table'、'plain' 或 'summary' (默认: 'table')")
+        print("                     summary: 每秒刷新各设备的命令速率、通过率、p50/p95 延迟和最近失败，逐行结果只写日志文件")
+        print("  --no-row-separators  table 模式下不在每行数据之间输出分隔线")
+        print("  --events [PATH]    输出结构化 JSONL 执行事件流 (默认: 会话目录下 events.jsonl)")
+        print("  --events-max-bytes N  事件文件超过 N 字节后轮转 (默认: 64MB，0 表示不轮转)")
+        print("  --events-backups N 保留的事件轮转文件个数 (默认: 5)")
+        print("  --async-logging    异步输出日志与表格，终端速度不影响命令计时")
+        print("  --log-queue-size N 异步输出队列容量 (默认: 10000)")
+        print("  --log-overflow     异步队列满时的策略: 'drop' 丢弃并汇总或 'block' 等待 (默认: 'drop')")
+        print("  --max-consecutive-failures N  连续 N 轮迭代失败后停止")
+        print("  --time-budget SEC  会话总时长预算（秒），到期立即取消等待并停止")
+        print("  --skip-failed-device  设备失败后跳过其本轮剩余命令")
+        print("  --pipeline-skew N  流水线迭代，快的设备组最多领先最慢的组 N 轮")
+        print("  --shards N         多进程分片执行，设备分配到 N 个 worker 进程 (0 = 自动)")
+        print("  --shard-barrier    分片同步方式: 'ordered' 或 'iteration' (默认: 'ordered')")
+        print("  --datastore-persistence  DataStore 持久化方式: 'snapshot'、'journal' 或 'sqlite' (默认: 'snapshot')")
+        print("  --datastore-fsync  journal 模式的 fsync 策略: 'always'、'batch' 或 'never' (默认: 'batch')")
+        print("  --datastore-serialization  会话文件格式: 'json'、'compact'、'gzip'、'lzma' 或 'pickle' (默认: 'json')")
+        print("  --device-log-max-bytes N  设备日志段超过 N 字节后轮转")
+        print("  --device-log-max-age SEC  设备日志段超过 SEC 秒后轮转")
+        print("  --device-log-iterations N 设备日志每 N 轮迭代轮转一次")
+        print("  --device-log-compress  在后台把轮转出的设备日志段压缩为 .gz")
+        print("  --metrics-port PORT  在 http://HOST:PORT/metrics 提供 OpenMetrics 指标 (默认关闭)")
+        print("  --metrics-host HOST  指标端点监听地址 (默认: 127.0.0.1)")
+        print("  --profile          用 cProfile 剖析整个会话，在会话目录写出 profile.pstats 和 profile.txt")
+        print("  --phase-timers     统计变量解析、发送等待、匹配、动作、设备日志和 DataStore 保存各阶段耗时")
         print()
         print("🧭 MCP Server (AI Agent 接口)")
         print("   autocom mcp                                           # 启动 stdio 模式（默认，适合 Claude Desktop）")
@@ -190,9 +224,157 @@ def run_main():
 
     parser.add_argument(
         "--cli-output-mode",
-        choices=["table", "plain"],
+        choices=["table", "plain", "summary"],
         default="table",
-        help="CLI logging output mode: table or plain (default: table)",
+        help="CLI logging output mode: table, plain or summary (periodically refreshed per-device aggregate; rows go to the log file only) (default: table)",
+    )
+    parser.add_argument(
+        "--no-row-separators",
+        action="store_true",
+        help="In table output mode, do not print a separator line after every row",
+    )
+    parser.add_argument(
+        "--events",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="PATH",
+        help="Write structured execution events as JSON lines (default path: "
+        "events.jsonl in the session log directory)",
+    )
+    parser.add_argument(
+        "--events-max-bytes",
+        type=int,
+        default=64 * 1024 * 1024,
+        help="Rotate the event file once it exceeds this size (0 = never, default: 64MB)",
+    )
+    parser.add_argument(
+        "--events-backups",
+        type=int,
+        default=5,
+        help="Number of rotated event files to keep (default: 5)",
+    )
+    parser.add_argument(
+        "--async-logging",
+        action="store_true",
+        help="Format and write log output on a dedicated thread so a slow console "
+        "never delays device and command threads",
+    )
+    parser.add_argument(
+        "--log-queue-size",
+        type=int,
+        default=10000,
+        help="Capacity of the async logging queue (default: 10000)",
+    )
+    parser.add_argument(
+        "--log-overflow",
+        choices=["drop", "block"],
+        default="drop",
+        help="When the async logging queue is full: drop records and report how many "
+        "(drop) or wait for space (block) (default: drop)",
+    )
+    parser.add_argument(
+        "--max-consecutive-failures",
+        type=int,
+        default=None,
+        help="Stop the session after N consecutive failed iterations",
+    )
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        default=None,
+        help="Overall wall-clock budget in seconds; in-flight waits are cancelled when it runs out",
+    )
+    parser.add_argument(
+        "--skip-failed-device",
+        action="store_true",
+        help="Skip the remaining commands of a device once it fails in an iteration",
+    )
+    parser.add_argument(
+        "--datastore-persistence",
+        choices=["snapshot", "journal", "sqlite"],
+        default=None,
+        help="DataStore persistence: rewrite the session JSON (snapshot), append "
+        "change records and compact in the background (journal), or save into the "
+        "shared SQLite database (sqlite)",
+    )
+    parser.add_argument(
+        "--datastore-fsync",
+        choices=["always", "batch", "never"],
+        default=None,
+        help="Journal fsync policy (default: batch)",
+    )
+    parser.add_argument(
+        "--datastore-serialization",
+        choices=["json", "compact", "gzip", "lzma", "pickle"],
+        default=None,
+        help="Session file format (default: json); any format is detected when loading",
+    )
+    parser.add_argument(
+        "--device-log-max-bytes",
+        type=int,
+        default=None,
+        help="Rotate device logs once a segment exceeds this size in bytes",
+    )
+    parser.add_argument(
+        "--device-log-max-age",
+        type=float,
+        default=None,
+        help="Rotate device logs once a segment has been open for this many seconds",
+    )
+    parser.add_argument(
+        "--device-log-iterations",
+        type=int,
+        default=None,
+        help="Rotate device logs every N iterations",
+    )
+    parser.add_argument(
+        "--device-log-compress",
+        action="store_true",
+        help="Gzip rotated device log segments on a background thread",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        help="Serve OpenMetrics/Prometheus metrics at http://HOST:PORT/metrics (disabled by default)",
+    )
+    parser.add_argument(
+        "--metrics-host",
+        default="127.0.0.1",
+        help="Address for the metrics endpoint (default: 127.0.0.1)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile the whole session with cProfile and write profile.pstats/profile.txt "
+        "to the session directory",
+    )
+    parser.add_argument(
+        "--phase-timers",
+        action="store_true",
+        help="Time variable resolution, serial waits, matching, actions, device logging and "
+        "DataStore saves per iteration (written to phase_timers.jsonl)",
+    )
+    parser.add_argument(
+        "--pipeline-skew",
+        type=int,
+        default=None,
+        help="Enable pipelined iterations: device groups may run up to N iterations "
+        "ahead of the slowest group (overrides ConfigForIterations.max_skew)",
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=None,
+        help="Shard devices across N worker processes (0 = auto: min(CPU count, device count))",
+    )
+    parser.add_argument(
+        "--shard-barrier",
+        choices=["ordered", "iteration"],
+        default="ordered",
+        help="Shard synchronisation: 'ordered' keeps cross-device command order, "
+        "'iteration' syncs once per iteration (default: ordered)",
     )
 
     args = parser.parse_args()
@@ -222,6 +404,52 @@ def run_main():
     logger = AutoComLogger.get_instance(
         name="AutoCom", log_file=log_file, cli_output_mode=args.cli_output_mode
     )
+    if args.no_row_separators:
+        logger.tp.row_separators = False
+    if args.events is not None:
+        # 后台线程按批写出，进程退出时（atexit）写完并关闭
+        events_path = args.events or str(dirs.session_dir / "events.jsonl")
+        open_event_stream(
+            events_path,
+            max_bytes=args.events_max_bytes,
+            backup_count=args.events_backups,
+        )
+        logger.log_session_start(f"Event stream: {events_path}")
+    if args.metrics_port is not None:
+        # 后台线程提供 /metrics，进程退出时随守护线程结束
+        try:
+            metrics_server = start_metrics_server(args.metrics_port, args.metrics_host)
+        except OSError as e:
+            logger.log_session_error(f"Cannot start metrics endpoint: {e}")
+        else:
+            host, port = metrics_server.address
+            logger.log_session_start(f"Metrics endpoint: http://{host}:{port}/metrics")
+    if args.async_logging:
+        # 队列中的输出在进程退出时（atexit）全部写出
+        logger.enable_async(queue_size=args.log_queue_size, overflow=args.log_overflow)
+    # 在异步日志之后注册 atexit，保证报告先于日志队列的收尾输出
+    if args.profile:
+        profiler = SessionProfiler(str(dirs.session_dir)).start()
+
+        def _finish_profile():
+            report_path = profiler.stop()
+            if report_path is not None:
+                logger.log_session_info(f"Profile written to {report_path}")
+
+        atexit.register(_finish_profile)
+    if args.phase_timers:
+        timers_path = str(dirs.session_dir / PHASE_TIMERS_FILE)
+        enable_phase_timers(timers_path)
+
+        def _finish_phase_timers():
+            timers = disable_phase_timers()
+            if timers is None:
+                return
+            for line in timers.summary_lines():
+                logger.log_session_info(line)
+            logger.log_session_info(f"Phase timers written to {timers_path}")
+
+        atexit.register(_finish_phase_timers)
 
     # 处理 --init 参数
     if args.init:
@@ -275,6 +503,39 @@ def run_main():
             logger.log_session_error(f"Error: {e}")
             sys.exit(1)
 
+    # 命令行提前终止策略覆盖执行配置文件中的 ConfigForIterations
+    iteration_overrides = {}
+    if args.max_consecutive_failures is not None:
+        iteration_overrides["max_consecutive_failures"] = args.max_consecutive_failures
+    if args.time_budget is not None:
+        iteration_overrides["time_budget"] = args.time_budget
+    if args.skip_failed_device:
+        iteration_overrides["skip_failed_device"] = True
+    if iteration_overrides:
+        config.setdefault("ConfigForIterations", {}).update(iteration_overrides)
+
+    datastore_overrides = {}
+    if args.datastore_persistence is not None:
+        datastore_overrides["persistence"] = args.datastore_persistence
+    if args.datastore_fsync is not None:
+        datastore_overrides["fsync"] = args.datastore_fsync
+    if args.datastore_serialization is not None:
+        datastore_overrides["serialization"] = args.datastore_serialization
+    if datastore_overrides:
+        config.setdefault("ConfigForDataStore", {}).update(datastore_overrides)
+
+    device_log_overrides = {}
+    if args.device_log_max_bytes is not None:
+        device_log_overrides["max_bytes"] = args.device_log_max_bytes
+    if args.device_log_max_age is not None:
+        device_log_overrides["max_age"] = args.device_log_max_age
+    if args.device_log_iterations is not None:
+        device_log_overrides["iterations_per_segment"] = args.device_log_iterations
+    if args.device_log_compress:
+        device_log_overrides["compress"] = True
+    if device_log_overrides:
+        config.setdefault("ConfigForDeviceLogs", {}).update(device_log_overrides)
+
     # 【提前初始化 Logger】在所有分支之前，确保所有路径都能使用
     # 显式创建工作目录
     device_logs_dir = str(dirs.device_logs_dir)
@@ -290,7 +551,15 @@ def run_main():
 
         start_time = time.time()
         try:
-            execute_with_loop(str(dict_path), args.loop, args.infinite, config)
+            execute_with_loop(
+                str(dict_path),
+                args.loop,
+                args.infinite,
+                config,
+                shards=args.shards,
+                shard_barrier=args.shard_barrier,
+                pipeline_skew=args.pipeline_skew,
+            )
         except KeyboardInterrupt:
             logger.log_session_info("Execution interrupted by user")
         except FileNotFoundError as e:
@@ -22,6 +22,7 @@ class MonitorManager:
         self.device_name = device_name
         self.running = False
         self.monitor_thread = None
+        self._stop_event = threading.Event()  # 打断监控线程中的重连等待
         self.buffer = bytearray()
 
         # Device data sharing mechanism
@@ -49,6 +50,7 @@ class MonitorManager:
             return
 
         self.running = True
+        self._stop_event.clear()
         self.monitor_thread = threading.Thread(
             target=self._monitor_loop, daemon=True, name=f"Monitor-{self.device_name}"
         )
@@ -58,6 +60,7 @@ class MonitorManager:
     def stop_monitoring(self):
         """Stop monitoring"""
         self.running = False
+        self._stop_event.set()
         if self.monitor_thread and self.monitor_thread.is_alive():
             self.monitor_thread.join(timeout=2)
         logger.log_session_end(f"Monitoring stopped: {self.device_name}")
@@ -154,18 +157,11 @@ class MonitorManager:
                 logger.log_session_error(
                     f"Serial error on device '{self.device_name}' (port: {self.device.port}): {e}"
                 )
-                # Attempt to reopen the port 3 times
-                for attempt in range(3):
-                    try:
-                        if not self.device.ser.is_open:
-                            self.device.ser.open()
-                        break  # Successfully reopened
-                    except Exception as reopen_exception:
-                        logger.log_session_error(
-                            f"Failed to reopen serial port '{self.device.port}' on attempt {attempt + 1}: {reopen_exception}"
-                        )
-                        time.sleep(5)  # Wait before retrying
-                sys.exit(1)
+                # Attempt to reopen the port 3 times, otherwise stop monitoring
+                # (never sys.exit() from a worker thread)
+                if not self._reopen_port():
+                    self.running = False
+                    break
             except Exception as e:
                 logger.log_session_error(
                     f"Monitor error on device '{self.device_name}' (port: {self.device.port}): {e}"
@@ -174,6 +170,21 @@ class MonitorManager:
 
         logger.log_session_end(f"Monitor ended: {self.device_name}")
 
+    def _reopen_port(self, attempts=3, interval=5):
+        """Try to reopen the monitored port, returns False if it stays closed or monitoring stops"""
+        for attempt in range(attempts):
+            try:
+                if not self.device.ser.is_open:
+                    self.device.ser.open()
+                return True
+            except Exception as reopen_exception:
+                logger.log_session_error(
+                    f"Failed to reopen serial port '{self.device.port}' on attempt {attempt + 1}: {reopen_exception}"
+                )
+            if self._stop_event.wait(interval):
+                return False
+        return False
+
     def _process_line(self, line):
         """Process single line of data"""
         current_time = time.time()
@@ -218,8 +229,13 @@ class CommandDeviceDict:
     def __init__(self, config_dict: dict, data_store=None):
         self.dict = config_dict
         self.devices = {}
-        self.log_date_dir = str(get_dirs()._session_dir)
-        self._data_store = data_store if data_store is not None else DataStore()
+        # 会话目录按需创建（分片 worker 通过 AUTOCOM_SESSION_DIR 复用父进程的目录）
+        self.log_date_dir = str(get_dirs().session_dir)
+        # 未传入 DataStore 时只用一个内存 DataStore 解析常量和设备参数，
+        # 不再为此创建会话文件、保存线程和目录清理
+        self._data_store = (
+            data_store if data_store is not None else DataStore(persist=False)
+        )
 
         # Simplified monitoring mechanism
         self.monitor_threads = {}  # Track monitor threads
@@ -346,7 +362,9 @@ class CommandDeviceDict:
 
                 # Setup logging - 使用环境变量中的日志目录（如果设置了）
                 # self.log_date_dir = str(log_dir / time.strftime("%Y-%m-%d_%H-%M-%S"))
-                log_path = self.devices[device_name].setup_logging(self.log_date_dir)
+                log_path = self.devices[device_name].setup_logging(
+                    self.log_date_dir, config_dict.get("ConfigForDeviceLogs")
+                )
 
                 logger.log_session_start(
                     f"Device {device_name} connected to port {port}, baud rate {baud_rate}"
@@ -631,7 +649,11 @@ class CommandDeviceDict:
                 )
                 last_data_time = start_time
 
+                cancel_token = getattr(device, "cancel_token", None)
                 while (time.time() - start_time) < timeout:
+                    if cancel_token is not None and cancel_token.cancelled:
+                        finish_reason = "cancelled"
+                        break
                     monitor.wait_for_command_response(check_interval)
 
                     # Snapshot does not reset capture window, avoiding gaps.
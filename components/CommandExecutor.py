@@ -2,21 +2,44 @@ import time
 import threading
 import sys
 from concurrent.futures import ThreadPoolExecutor
-from queue import Queue
+from queue import Queue, Empty
 from utils.common import CommonUtils
 from components.DataStore import DataStore
 from components.CommandDeviceDict import CommandDeviceDict
+from components.ExecutionPolicy import ExecutionPolicy
+from components.EventStream import get_event_stream
+from components.Profiling import get_phase_timers
 from utils.ActionHandler import ActionHandler
+from utils.cancellation import CancellationToken
 from components.Logger import get_logger, AutoComLogger
 
 logger: AutoComLogger = get_logger("AutoCom")
 
 
 class CommandExecutor:
-    def __init__(self, command_device_dict_or_dict, session_id=None):
+    def __init__(
+        self,
+        command_device_dict_or_dict,
+        session_id=None,
+        data_store=None,
+        cancel_token=None,
+    ):
+
+        # 从执行配置文件数据中获取数据
+        dict_data = (
+            command_device_dict_or_dict
+            if isinstance(command_device_dict_or_dict, dict)
+            else command_device_dict_or_dict.dict
+        )
 
-        # 创建 DataStore 实例
-        self.data_store = DataStore(session_id=session_id)
+        # 创建 DataStore 实例（可由调用方注入，例如分片 worker 使用的内存 DataStore）
+        self.data_store = (
+            data_store
+            if data_store is not None
+            else DataStore.from_config(
+                dict_data.get("ConfigForDataStore"), session_id=session_id
+            )
+        )
         self.lock = threading.Lock()
 
         # 后台命令执行队列（用于处理 success_response_actions 中的嵌套命令）
@@ -26,6 +49,18 @@ class CommandExecutor:
         # 迭代追踪信息
         self.current_iteration = None
         self.total_iterations = None
+        # execute() 标记迭代的设备名（None 表示全部设备；流水线模式下为本组设备）
+        self.iteration_devices = None
+
+        # 命令结果监听器：callable(device_name, cmd_str, passed, elapsed_ms)
+        # 用于 Fleet 统计等聚合场景，监听器异常不会影响命令执行
+        self.command_listeners = []
+
+        # 协作式取消：cancel_token 为会话级令牌（可由调用方传入以统一取消多个执行器），
+        # iteration_token 为其子令牌，只作用于当前迭代（关键命令失败时取消）
+        self.cancel_token = cancel_token if cancel_token is not None else CancellationToken()
+        self.iteration_token = self.cancel_token.child()
+        self._failed_devices = set()
 
         # 并行执行期间的延迟 actions 收集（避免在并行期间干扰串口通信）
         self.defer_response_actions = (
@@ -35,71 +70,11 @@ class CommandExecutor:
             []
         )  # 收集延迟的 (command, response, action_type, context)
 
-        # 从执行配置文件数据中获取数据
-        dict_data = (
-            command_device_dict_or_dict
-            if isinstance(command_device_dict_or_dict, dict)
-            else command_device_dict_or_dict.dict
-        )
+        self.policy = ExecutionPolicy.from_config(dict_data.get("ConfigForIterations"))
 
         # 处理常量
         if "Constants" in dict_data:
-            need_input_constants = []
-            loaded_constants = []
-
-            for key, value in dict_data["Constants"].items():
-                if value == "":  # 空字符串，需要用户输入
-                    need_input_constants.append(key)
-                else:
-                    self.data_store.store_data("Constants", key, value)
-                    loaded_constants.append(key)
-
-            # 处理需要用户输入的常量
-            if need_input_constants:
-                logger.log_session_start("The following constants need your input:")
-
-                for key in need_input_constants:
-                    max_retries = 3
-                    for attempt in range(max_retries):
-                        try:
-                            # 提示用户输入并去除首尾空格
-                            value = input(f"Please enter value for {key}: ").strip()
-
-                            if not value:  # 如果输入为空
-                                if attempt < max_retries - 1:
-                                    logger.log_session_start(
-                                        f"Value cannot be empty. Please try again ({attempt + 1}/{max_retries})"
-                                    )
-                                    continue
-                                else:
-                                    logger.log_session_start(
-                                        f"No valid value provided for {key} after {max_retries} attempts"
-                                    )
-                                    sys.exit(1)
-
-                            # 存储用户输入的值
-                            self.data_store.store_data("Constants", key, value)
-                            logger.log_session_start(f"✓ Stored {key} = {value}")
-                            break
-
-                        except KeyboardInterrupt:
-                            logger.log_session_start("\n❌ Input cancelled by user")
-                            sys.exit(1)
-                        except Exception as e:
-                            if attempt < max_retries - 1:
-                                logger.log_session_start(
-                                    f"Error: {e}. Please try again ({attempt + 1}/{max_retries})"
-                                )
-                                continue
-                            else:
-                                logger.log_session_start(
-                                    f"❌ Failed to get value for {key} after {max_retries} attempts: {e}"
-                                )
-                                sys.exit(1)
-
-                logger.log_session_start(
-                    f"✓ Successfully collected values for all {len(need_input_constants)} constants",
-                )
+            self.load_constants(dict_data["Constants"], self.data_store)
 
         # 创建或更新 CommandDeviceDict
         if isinstance(command_device_dict_or_dict, dict):
@@ -140,6 +115,72 @@ class CommandExecutor:
         # 启动后台命令执行线程
         self._start_deferred_execution_thread()
 
+    @staticmethod
+    def load_constants(constants, data_store):
+        """把 Constants 写入 DataStore，空值的常量提示用户输入（每个最多重试 3 次）
+
+        DataStore 中已有值的空常量直接复用（例如多个执行器共享同一 DataStore）。
+        """
+        need_input_constants = []
+        loaded_constants = []
+
+        for key, value in constants.items():
+            if value == "" and data_store.get_data("Constants", key):
+                # 复用的 DataStore 中已有值（例如多个执行器共享同一 DataStore）
+                loaded_constants.append(key)
+            elif value == "":  # 空字符串，需要用户输入
+                need_input_constants.append(key)
+            else:
+                data_store.store_data("Constants", key, value)
+                loaded_constants.append(key)
+
+        # 处理需要用户输入的常量
+        if need_input_constants:
+            logger.log_session_start("The following constants need your input:")
+
+            for key in need_input_constants:
+                max_retries = 3
+                for attempt in range(max_retries):
+                    try:
+                        # 提示用户输入并去除首尾空格
+                        value = input(f"Please enter value for {key}: ").strip()
+
+                        if not value:  # 如果输入为空
+                            if attempt < max_retries - 1:
+                                logger.log_session_start(
+                                    f"Value cannot be empty. Please try again ({attempt + 1}/{max_retries})"
+                                )
+                                continue
+                            else:
+                                logger.log_session_start(
+                                    f"No valid value provided for {key} after {max_retries} attempts"
+                                )
+                                sys.exit(1)
+
+                        # 存储用户输入的值
+                        data_store.store_data("Constants", key, value)
+                        logger.log_session_start(f"✓ Stored {key} = {value}")
+                        break
+
+                    except KeyboardInterrupt:
+                        logger.log_session_start("\n❌ Input cancelled by user")
+                        sys.exit(1)
+                    except Exception as e:
+                        if attempt < max_retries - 1:
+                            logger.log_session_start(
+                                f"Error: {e}. Please try again ({attempt + 1}/{max_retries})"
+                            )
+                            continue
+                        else:
+                            logger.log_session_start(
+                                f"❌ Failed to get value for {key} after {max_retries} attempts: {e}"
+                            )
+                            sys.exit(1)
+
+            logger.log_session_start(
+                f"✓ Successfully collected values for all {len(need_input_constants)} constants",
+            )
+
     def _start_deferred_execution_thread(self):
         """启动后台线程处理延迟执行的命令（避免嵌套锁导致的死锁）"""
         self.deferred_execution_thread = threading.Thread(
@@ -158,13 +199,16 @@ class CommandExecutor:
 
                 cmd = item
                 try:
+                    if self.cancel_token.cancelled:
+                        # 会话已取消：丢弃剩余的延迟命令，只保证队列能被 join
+                        continue
                     self.execute_command(cmd)
                 except Exception as e:
                     logger.log_step_error(f"Error executing deferred command: {e}")
                 finally:
                     self.deferred_command_queue.task_done()
 
-            except:  # Queue.Empty exception
+            except Empty:
                 continue
 
     def enqueue_deferred_command(self, command):
@@ -207,6 +251,8 @@ class CommandExecutor:
 
         device_name = command["device"]
         device = self.command_device_dict.devices[device_name]
+        # 让设备的等待循环在迭代中止/会话取消时立即返回
+        device.cancel_token = self.iteration_token
 
         updated_expected_responses = []
         if "expected_responses" in command:
@@ -242,6 +288,17 @@ class CommandExecutor:
             send_args["priority"] = priority
             send_args["completion_rules"] = completion_rules
 
+        events = get_event_stream()
+        if events is not None:
+            events.emit(
+                "command_start",
+                iteration=self.current_iteration,
+                device=device_name,
+                command=cmd_str,
+                expected=updated_expected_responses,
+                timeout_ms=command["timeout"],
+            )
+
         result = device.send_command(cmd_str, **send_args)
 
         # Extract response and success flag from result
@@ -277,9 +334,6 @@ class CommandExecutor:
                 command, response, action_type, context
             )
 
-        # Prepare command display string
-        response_preview = response[:48] + "" if len(response) > 48 else response
-
         if cmd_str.strip() == "":
             cmd_str = "ℹ INFO"
 
@@ -292,24 +346,25 @@ class CommandExecutor:
                 result=True,
                 device=device_name,
                 command=cmd_str,
-                response=response_preview,
+                response=response,
                 elapsed_ms=elapsed_time * 1000,
             )
             self.isAllPassed = True
 
             # 使用新的 ActionHandler 处理 actions
             with self.lock:
-                isActionPassed = all(
-                    [
-                        handle_actions(command, response, "success_actions"),
-                        self._handle_response_actions_with_defer(
-                            command, response, "success_response_actions", context
-                        ),
-                        handle_response_actions(
-                            command, response, "error_response_actions"
-                        ),
-                    ]
-                )
+                action_results = {
+                    "success_actions": handle_actions(
+                        command, response, "success_actions"
+                    ),
+                    "success_response_actions": self._handle_response_actions_with_defer(
+                        command, response, "success_response_actions", context
+                    ),
+                    "error_response_actions": handle_response_actions(
+                        command, response, "error_response_actions"
+                    ),
+                }
+                isActionPassed = all(action_results.values())
                 if not isActionPassed:
                     logger.log_step_error(
                         "Action handling failed, check logs for details."
@@ -328,24 +383,25 @@ class CommandExecutor:
                 result=True,
                 device=device_name,
                 command=cmd_str,
-                response=response_preview,
+                response=response,
                 elapsed_ms=elapsed_time * 1000,
             )
             self.isAllPassed = True
 
             # 使用新的 ActionHandler 处理 actions
             with self.lock:
-                isActionPassed = all(
-                    [
-                        handle_actions(command, response, "success_actions"),
-                        self._handle_response_actions_with_defer(
-                            command, response, "success_response_actions", context
-                        ),
-                        handle_response_actions(
-                            command, response, "error_response_actions"
-                        ),
-                    ]
-                )
+                action_results = {
+                    "success_actions": handle_actions(
+                        command, response, "success_actions"
+                    ),
+                    "success_response_actions": self._handle_response_actions_with_defer(
+                        command, response, "success_response_actions", context
+                    ),
+                    "error_response_actions": handle_response_actions(
+                        command, response, "error_response_actions"
+                    ),
+                }
+                isActionPassed = all(action_results.values())
                 if not isActionPassed:
                     logger.log_step_error(
                         "Action handling failed, check logs for details."
@@ -361,21 +417,49 @@ class CommandExecutor:
                 result=False,
                 device=device_name,
                 command=cmd_str,
-                response=response_preview,
+                response=response,
                 elapsed_ms=elapsed_time * 1000,
             )
             self.isAllPassed = False
 
             # 使用新的 ActionHandler 处理 actions
             with self.lock:  # 使用锁确保原子性
-                handle_actions(command, response, "error_actions")
-                self._handle_response_actions_with_defer(
-                    command, response, "success_response_actions", context
-                )
-                handle_response_actions(command, response, "error_response_actions")
+                action_results = {
+                    "error_actions": handle_actions(command, response, "error_actions"),
+                    "success_response_actions": self._handle_response_actions_with_defer(
+                        command, response, "success_response_actions", context
+                    ),
+                    "error_response_actions": handle_response_actions(
+                        command, response, "error_response_actions"
+                    ),
+                }
+
+        if events is not None:
+            events.emit(
+                "command_end",
+                iteration=self.current_iteration,
+                device=device_name,
+                command=cmd_str,
+                passed=self.isAllPassed,
+                matched=matched,
+                expected=updated_expected_responses,
+                elapsed_ms=round(elapsed_time * 1000, 3),
+                response=response,
+                actions=action_results,
+            )
 
+        self._notify_command_listeners(
+            device_name, cmd_str, self.isAllPassed, elapsed_time * 1000
+        )
         return self.isAllPassed
 
+    def _notify_command_listeners(self, device_name, cmd_str, passed, elapsed_ms):
+        for listener in self.command_listeners:
+            try:
+                listener(device_name, cmd_str, passed, elapsed_ms)
+            except Exception as e:
+                logger.log_step_warning(f"Command listener error: {e}")
+
     def _supports_monitor_send_options(self, device_name):
         """Only monitor-enabled devices support priority/completion_rules options."""
         monitors = getattr(self.command_device_dict, "device_monitors", {})
@@ -420,17 +504,40 @@ class CommandExecutor:
         """
         self.current_iteration = current_iteration
         self.total_iterations = total_iterations
+        self.data_store.set_iteration(current_iteration)
+        timers = get_phase_timers()
+        if timers is not None:
+            timers.begin_iteration(current_iteration)
+        events = get_event_stream()
+        if events is not None:
+            events.emit(
+                "iteration_start", iteration=current_iteration, total=total_iterations
+            )
+
+    def execute(self, commands=None) -> bool:
+        """执行一轮命令
 
-    def execute(self) -> bool:
-        commands = self.command_device_dict.dict["Commands"]
+        Args:
+            commands: 要执行的命令列表（默认为字典中的全部 Commands）。
+                分片模式下每个屏障段只传入本段的命令。
+        """
+        if commands is None:
+            commands = self.command_device_dict.dict["Commands"]
         if not commands:
             logger.log_session_start("No commands to execute.")
             return False
+        if self.cancel_token.cancelled:
+            return False
+
+        self.iteration_token.release()
+        self.iteration_token = self.cancel_token.child()
+        self._failed_devices = set()
 
         # Mark iteration in all device logs if iteration info is set
         if self.current_iteration is not None:
             for device_name, device in self.command_device_dict.devices.items():
-                device.mark_iteration(self.current_iteration, self.total_iterations)
+                if self.iteration_devices is None or device_name in self.iteration_devices:
+                    device.mark_iteration(self.current_iteration, self.total_iterations)
 
         i = 0
         self.isSinglePassed = True
@@ -443,10 +550,21 @@ class CommandExecutor:
             ):
                 self._execute_deferred_response_actions()
 
+            if self.iteration_token.cancelled:
+                logger.log_iteration_warning(
+                    f"Iteration aborted, {len(commands) - i} remaining commands skipped"
+                )
+                self.isSinglePassed = False
+                break
+
             if commands[i].get("status") == "disabled":
                 i += 1
                 continue
 
+            if self._should_skip(commands[i]):
+                i += 1
+                continue
+
             # Handle parallel execution strategy
             if commands[i].get("concurrent_strategy") == "parallel":
                 # Collect all consecutive parallel commands with the same order
@@ -472,6 +590,7 @@ class CommandExecutor:
                 result = self.execute_command(commands[i])
                 if not result:
                     self.isSinglePassed = False
+                    self._on_command_failed(commands[i])
                 i += 1
 
         # 等待所有延迟执行的命令完成
@@ -479,6 +598,30 @@ class CommandExecutor:
 
         return self.isSinglePassed
 
+    def cancel(self, reason=None):
+        """取消会话：中止当前迭代、打断正在进行的等待并丢弃延迟命令，后续 execute() 直接返回失败"""
+        self.cancel_token.cancel(reason or "session cancelled")
+
+    def _should_skip(self, command) -> bool:
+        """skip_failed_device 策略：跳过本轮已失败设备的剩余命令"""
+        if command.get("device") in self._failed_devices:
+            logger.log_step_warning(
+                f"Skipped '{command.get('command', '')}' on {command['device']}: "
+                f"device failed earlier in this iteration"
+            )
+            return True
+        return False
+
+    def _on_command_failed(self, command):
+        if self.policy.skip_failed_device:
+            self._failed_devices.add(command["device"])
+        if command.get("critical") and not self.iteration_token.cancelled:
+            logger.log_iteration_error(
+                f"Critical command '{command.get('command', '')}' failed on "
+                f"{command['device']}, aborting iteration"
+            )
+            self.iteration_token.cancel("critical command failed")
+
     def _wait_for_deferred_commands(self):
         """等待所有延迟执行的命令完成"""
         # 将所有后台队列中的命令执行完毕
@@ -543,14 +686,21 @@ class CommandExecutor:
                     futures.append(future)
 
                 # Wait for all command groups to complete
-                for future in futures:
-                    try:
-                        result = future.result(timeout=30)
-                        if not result:
+                try:
+                    for future in futures:
+                        try:
+                            result = future.result(timeout=30)
+                            if not result:
+                                self.isParallelPassed = False
+                        except Exception as e:
+                            logger.log_step_error(
+                                f"Error executing parallel commands: {e}"
+                            )
                             self.isParallelPassed = False
-                    except Exception as e:
-                        logger.log_step_error(f"Error executing parallel commands: {e}")
-                        self.isParallelPassed = False
+                except KeyboardInterrupt:
+                    # 先取消，否则线程池退出时会一直等待设备上的命令超时
+                    self.cancel("interrupted by user")
+                    raise
         finally:
             # 并行执行完毕后，恢复之前的延迟状态
             self.defer_response_actions = previous_defer_state
@@ -564,8 +714,13 @@ class CommandExecutor:
         # Execute commands for a single device sequentially
         isAllPassed = True
         for cmd in device_commands:
+            if self.iteration_token.cancelled:
+                return False
+            if self._should_skip(cmd):
+                continue
             if not self.execute_command(cmd):
                 isAllPassed = False
+                self._on_command_failed(cmd)
         return isAllPassed
 
     def _execute_deferred_response_actions(self):
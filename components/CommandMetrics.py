@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+命令延迟直方图 for AutoCom
+
+长时间（soak）运行中按 (设备, 命令) 统计延迟分布，例如观察 ``AT+COPS?`` 的 p50 是否从
+80ms 恶化到 p99 900ms。
+
+- LatencyHistogram: 固定桶的对数-线性直方图（HDR 风格），按微秒记录，
+  64µs 以下精确到 1µs，以上相对误差不超过 1/32；桶数固定，内存与样本数无关
+- CommandMetrics: (设备, 命令) → 直方图的注册表，可作为 CommandExecutor 的
+  command_listener；系列数达到上限后新命令计入 ``(other)``，内存保持恒定
+"""
+
+import json
+import math
+import os
+import threading
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+SUB_BUCKET_BITS = 5
+SUB_BUCKET_HALF = 1 << SUB_BUCKET_BITS  # 每个 2 的幂区间内的桶数
+MAX_TRACKABLE_US = 1 << 33  # 约 2.4 小时，更大的值计入最后一个桶
+BUCKET_COUNT = (MAX_TRACKABLE_US.bit_length() - SUB_BUCKET_BITS) * SUB_BUCKET_HALF
+
+DEFAULT_MAX_SERIES = 1024
+OTHER_COMMAND = "(other)"
+REPORT_PERCENTILES = (50, 90, 95, 99)
+
+
+def _bucket_index(value_us: int) -> int:
+    if value_us < 2 * SUB_BUCKET_HALF:
+        return value_us
+    shift = value_us.bit_length() - 1 - SUB_BUCKET_BITS
+    return shift * SUB_BUCKET_HALF + (value_us >> shift)
+
+
+def _bucket_value(index: int) -> float:
+    """桶的代表值（区间中点），微秒"""
+    if index < 2 * SUB_BUCKET_HALF:
+        return float(index)
+    shift = index // SUB_BUCKET_HALF - 1
+    lower = (index - shift * SUB_BUCKET_HALF) << shift
+    return lower + (1 << shift) / 2
+
+
+class LatencyHistogram:
+    """固定桶延迟直方图（线程不安全，由 CommandMetrics 加锁）"""
+
+    __slots__ = ("counts", "count", "failed", "total_us", "min_us", "max_us")
+
+    def __init__(self):
+        self.counts = array("Q", bytes(8 * BUCKET_COUNT))
+        self.count = 0
+        self.failed = 0
+        self.total_us = 0
+        self.min_us: Optional[int] = None
+        self.max_us = 0
+
+    def record(self, elapsed_ms: float, passed: bool = True) -> None:
+        value = min(max(int(elapsed_ms * 1000), 0), MAX_TRACKABLE_US - 1)
+        self.counts[_bucket_index(value)] += 1
+        self.count += 1
+        self.total_us += value
+        if not passed:
+            self.failed += 1
+        if self.min_us is None or value < self.min_us:
+            self.min_us = value
+        if value > self.max_us:
+            self.max_us = value
+
+    def percentile(self, pct: float) -> float:
+        """返回第 pct 百分位延迟（毫秒），无样本时为 0"""
+        if not self.count:
+            return 0.0
+        target = max(1, math.ceil(pct / 100.0 * self.count))
+        seen = 0
+        for index, n in enumerate(self.counts):
+            if n:
+                seen += n
+                if seen >= target:
+                    if seen == self.count:
+                        # 最后一个非空桶包含最大值
+                        return self.max_us / 1000.0
+                    value = _bucket_value(index)
+                    # 代表值不超出实际观测范围
+                    return min(max(value, self.min_us), self.max_us) / 1000.0
+        return self.max_us / 1000.0
+
+    def copy(self) -> "LatencyHistogram":
+        clone = LatencyHistogram()
+        clone.counts = array("Q", self.counts)
+        clone.count = self.count
+        clone.failed = self.failed
+        clone.total_us = self.total_us
+        clone.min_us = self.min_us
+        clone.max_us = self.max_us
+        return clone
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """把另一个直方图的样本累加到本直方图"""
+        if not other.count:
+            return
+        for index, n in enumerate(other.counts):
+            if n:
+                self.counts[index] += n
+        self.count += other.count
+        self.failed += other.failed
+        self.total_us += other.total_us
+        if self.min_us is None or other.min_us < self.min_us:
+            self.min_us = other.min_us
+        self.max_us = max(self.max_us, other.max_us)
+
+    def cumulative_counts(self, bounds_ms: Sequence[float]) -> List[int]:
+        """
+        每个上界 (升序, 毫秒) 以内的累计次数, 用于导出粗粒度直方图
+
+        只计入整个桶都不超过上界的桶，跨越上界的桶计入下一个上界（误差在桶精度内）。
+        """
+        result = []
+        seen = 0
+        index = 0
+        for bound in bounds_ms:
+            limit = min(_bucket_index(int(bound * 1000) + 1), BUCKET_COUNT)
+            if limit > index:
+                seen += sum(self.counts[index:limit])
+                index = limit
+            result.append(seen)
+        return result
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "failed": self.failed,
+            "min_ms": (self.min_us or 0) / 1000.0,
+            "max_ms": self.max_us / 1000.0,
+            "mean_ms": self.total_us / self.count / 1000.0 if self.count else 0.0,
+            **{f"p{p}_ms": self.percentile(p) for p in REPORT_PERCENTILES},
+            # 稀疏桶 {桶下标: 次数}，便于离线合并多个会话
+            "buckets": {str(i): n for i, n in enumerate(self.counts) if n},
+        }
+
+
+class CommandMetrics:
+    """按 (设备, 命令) 聚合的延迟直方图注册表"""
+
+    def __init__(self, max_series: int = DEFAULT_MAX_SERIES):
+        """
+        Args:
+            max_series: 最多单独统计的 (设备, 命令) 数量，超出的命令按设备计入 (other)
+        """
+        self.max_series = max_series
+        self._series: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def record_command(self, device_name, cmd_str, passed, elapsed_ms) -> None:
+        """CommandExecutor.command_listeners 回调"""
+        key = (device_name, cmd_str)
+        with self._lock:
+            histogram = self._series.get(key)
+            if histogram is None:
+                if len(self._series) >= self.max_series:
+                    key = (device_name, OTHER_COMMAND)
+                    histogram = self._series.get(key)
+                if histogram is None:
+                    histogram = self._series[key] = LatencyHistogram()
+            histogram.record(elapsed_ms, passed)
+
+    def __len__(self) -> int:
+        return len(self._series)
+
+    def get(self, device_name: str, cmd_str: str) -> Optional[LatencyHistogram]:
+        return self._series.get((device_name, cmd_str))
+
+    def histograms(self) -> List[Tuple[str, str, LatencyHistogram]]:
+        """所有系列直方图的副本 (设备, 命令, 直方图)，按设备、命令排序"""
+        with self._lock:
+            return [
+                (device, command, histogram.copy())
+                for (device, command), histogram in sorted(self._series.items())
+            ]
+
+    def snapshot(self) -> List[dict]:
+        """所有系列的统计（按设备、命令排序）"""
+        with self._lock:
+            items = sorted(self._series.items())
+            return [
+                {"device": device, "command": command, **histogram.to_dict()}
+                for (device, command), histogram in items
+            ]
+
+    def summary_lines(self) -> List[str]:
+        """会话汇总中每个 (设备, 命令) 一行的百分位报告"""
+        lines = []
+        for entry in self.snapshot():
+            lines.append(
+                f"⏱ [{entry['device']}] {entry['command']}: n={entry['count']}"
+                + (f" failed={entry['failed']}" if entry["failed"] else "")
+                + "".join(f" p{p}={entry[f'p{p}_ms']:.1f}ms" for p in REPORT_PERCENTILES)
+                + f" max={entry['max_ms']:.1f}ms"
+            )
+        return lines
+
+    def save(self, path: str) -> None:
+        """原子写入 JSON 文件"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"series": self.snapshot()}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
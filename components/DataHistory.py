@@ -0,0 +1,323 @@
+"""
+DataStore 变量历史（time series）
+
+``DataStore.store_data`` 只保留变量的最新值。对配置在
+``ConfigForDataStore.history`` 中的变量，每次写入还会追加一条
+(iteration, monotonic_ts, value) 样本到紧凑的列式数组中：
+
+    iterations  array('q')  迭代序号（迭代外写入为 0）
+    timestamps  array('d')  time.monotonic()
+    values      array('d')  数值（可转换为 float 的字符串也会记录）
+
+每个样本 24 字节，与 Python 对象列表相比内存约为十分之一。每个序列最多保留
+``max_samples`` 个样本，超出时成批丢弃最旧的样本；全程的 count/min/max/mean
+由累计值维护，不受丢弃影响，百分位数基于保留的样本计算。
+
+范围查询在列有序时二分查找。迭代外的写入（记为 0）、多个执行器共享同一
+DataStore（文件夹/流水线模式）或恢复的会话都可能让列乱序，此时退化为线性扫描。
+
+历史不写入会话 JSON，而是单独保存为 ``session_<id>.json.history``：
+
+    b"ACHIST1\\n"
+    {"byteorder": "little", "wall_anchor": ..., "monotonic_anchor": ..., "series": [...]}\\n
+    每个序列依次为 iterations / timestamps / values 的原始数组字节
+"""
+
+import json
+import math
+import os
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+HISTORY_SUFFIX = ".history"
+HISTORY_MAGIC = b"ACHIST1\n"
+
+DEFAULT_MAX_SAMPLES = 100_000
+DEFAULT_PERCENTILES = (50, 90, 99)
+
+
+def _to_float(value) -> Optional[float]:
+    if isinstance(value, bool):
+        return float(value)
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value.strip())
+        except ValueError:
+            return None
+    return None
+
+
+def _is_sorted(column) -> bool:
+    return all(a <= b for a, b in zip(column, column[1:]))
+
+
+def percentile(sorted_values: Sequence[float], pct: float) -> float:
+    """线性插值百分位数（sorted_values 已升序且非空）"""
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    rank = (len(sorted_values) - 1) * pct / 100.0
+    low = math.floor(rank)
+    high = math.ceil(rank)
+    if low == high:
+        return sorted_values[low]
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+class VariableHistory:
+    """单个 (设备, 变量) 的样本序列，调用方负责加锁"""
+
+    def __init__(self, max_samples: int = DEFAULT_MAX_SAMPLES):
+        self.max_samples = max(1, int(max_samples))
+        self.iterations = array("q")
+        self.timestamps = array("d")
+        self.values = array("d")
+        # 全程累计值（包含已丢弃的样本）
+        self.count = 0
+        self.total = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        self.dropped = 0
+        self.skipped = 0
+        # 两列是否单调不减（决定范围查询能否二分）
+        self.iterations_ordered = True
+        self.timestamps_ordered = True
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def append(self, iteration: Optional[int], ts: float, value) -> bool:
+        number = _to_float(value)
+        if number is None or math.isnan(number):
+            self.skipped += 1
+            return False
+        iteration = int(iteration or 0)
+        if self.values:
+            if iteration < self.iterations[-1]:
+                self.iterations_ordered = False
+            if ts < self.timestamps[-1]:
+                self.timestamps_ordered = False
+        self.iterations.append(iteration)
+        self.timestamps.append(ts)
+        self.values.append(number)
+        self.count += 1
+        self.total += number
+        self.minimum = min(self.minimum, number)
+        self.maximum = max(self.maximum, number)
+        if len(self.values) > self.max_samples:
+            # 成批丢弃最旧的样本，避免每次追加都移动整个数组
+            drop = len(self.values) - self.max_samples + max(1, self.max_samples // 10)
+            drop = min(drop, len(self.values) - 1)
+            del self.iterations[:drop]
+            del self.timestamps[:drop]
+            del self.values[:drop]
+            self.dropped += drop
+            if not (self.iterations_ordered and self.timestamps_ordered):
+                # 乱序的样本可能已被丢弃
+                self.check_order()
+        return True
+
+    def check_order(self) -> None:
+        """重新检查两列是否有序"""
+        self.iterations_ordered = _is_sorted(self.iterations)
+        self.timestamps_ordered = _is_sorted(self.timestamps)
+
+    def _select(self, start_iteration=None, end_iteration=None, since=None, until=None):
+        """按迭代和/或时间范围选出保留样本：列有序时返回 slice，否则返回下标列表"""
+        by_iteration = start_iteration is not None or end_iteration is not None
+        by_time = since is not None or until is not None
+        if (self.iterations_ordered or not by_iteration) and (
+            self.timestamps_ordered or not by_time
+        ):
+            low, high = 0, len(self.values)
+            if start_iteration is not None:
+                low = max(low, bisect_left(self.iterations, start_iteration))
+            if end_iteration is not None:
+                high = min(high, bisect_right(self.iterations, end_iteration))
+            if since is not None:
+                low = max(low, bisect_left(self.timestamps, since))
+            if until is not None:
+                high = min(high, bisect_left(self.timestamps, until))
+            return slice(low, max(low, high))
+        return [
+            index
+            for index, (iteration, ts) in enumerate(zip(self.iterations, self.timestamps))
+            if (start_iteration is None or iteration >= start_iteration)
+            and (end_iteration is None or iteration <= end_iteration)
+            and (since is None or ts >= since)
+            and (until is None or ts < until)
+        ]
+
+    @staticmethod
+    def _take(column, selection):
+        if isinstance(selection, slice):
+            return column[selection]
+        return [column[index] for index in selection]
+
+    def samples(self, **bounds) -> List[Tuple[int, float, float]]:
+        selection = self._select(**bounds)
+        return list(
+            zip(
+                self._take(self.iterations, selection),
+                self._take(self.timestamps, selection),
+                self._take(self.values, selection),
+            )
+        )
+
+    def stats(self, percentiles: Iterable[float] = DEFAULT_PERCENTILES, **bounds) -> dict:
+        """聚合统计
+
+        不指定范围时 count/min/max/mean 覆盖全程（含已丢弃的样本），
+        百分位数基于保留的样本；指定范围时全部基于范围内的保留样本。
+        """
+        window = self._take(self.values, self._select(**bounds))
+        ranged = any(value is not None for value in bounds.values())
+        if ranged:
+            count = len(window)
+            result = {
+                "count": count,
+                "min": min(window) if count else None,
+                "max": max(window) if count else None,
+                "mean": sum(window) / count if count else None,
+            }
+        else:
+            result = {
+                "count": self.count,
+                "min": self.minimum if self.count else None,
+                "max": self.maximum if self.count else None,
+                "mean": self.total / self.count if self.count else None,
+            }
+        ordered = sorted(window)
+        for pct in percentiles:
+            result[f"p{pct:g}"] = percentile(ordered, pct) if ordered else None
+        result["retained"] = len(window)
+        result["dropped"] = self.dropped
+        return result
+
+    def copy(self) -> "VariableHistory":
+        clone = VariableHistory(self.max_samples)
+        clone.iterations = self.iterations[:]
+        clone.timestamps = self.timestamps[:]
+        clone.values = self.values[:]
+        clone.count, clone.total = self.count, self.total
+        clone.minimum, clone.maximum = self.minimum, self.maximum
+        clone.dropped, clone.skipped = self.dropped, self.skipped
+        clone.iterations_ordered = self.iterations_ordered
+        clone.timestamps_ordered = self.timestamps_ordered
+        return clone
+
+    def nbytes(self) -> int:
+        return sum(
+            column.itemsize * len(column)
+            for column in (self.iterations, self.timestamps, self.values)
+        )
+
+
+class HistoryRecorder:
+    """按配置挑选需要记录历史的变量
+
+    ``variables`` 中的条目为变量名（匹配所有设备）或 ``"设备.变量"``。
+    """
+
+    def __init__(self, variables: Iterable[str], max_samples: int = DEFAULT_MAX_SAMPLES):
+        self.max_samples = max_samples
+        self.any_device = set()
+        self.per_device = set()
+        for name in variables or ():
+            device, sep, variable = str(name).rpartition(".")
+            if sep and device:
+                self.per_device.add((device, variable))
+            else:
+                self.any_device.add(variable)
+        self.series: Dict[Tuple[str, str], VariableHistory] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self.any_device or self.per_device or self.series)
+
+    def tracks(self, device: str, variable: str) -> bool:
+        return variable in self.any_device or (device, variable) in self.per_device
+
+    def record(self, device: str, variable: str, value, iteration, ts: float) -> bool:
+        if not self.tracks(device, variable):
+            return False
+        history = self.series.get((device, variable))
+        if history is None:
+            history = self.series[(device, variable)] = VariableHistory(self.max_samples)
+        return history.append(iteration, ts, value)
+
+    def get(self, device: str, variable: str) -> Optional[VariableHistory]:
+        return self.series.get((device, variable))
+
+    def nbytes(self) -> int:
+        return sum(history.nbytes() for history in self.series.values())
+
+
+def write_history(path: str, series: Dict[Tuple[str, str], VariableHistory], anchors) -> int:
+    """原子写入历史文件，返回写入的字节数"""
+    wall_anchor, monotonic_anchor = anchors
+    header = {
+        "byteorder": sys.byteorder,
+        "wall_anchor": wall_anchor,
+        "monotonic_anchor": monotonic_anchor,
+        "series": [
+            {
+                "device": device,
+                "variable": variable,
+                "length": len(history),
+                "count": history.count,
+                "total": history.total,
+                "min": history.minimum if history.count else None,
+                "max": history.maximum if history.count else None,
+                "dropped": history.dropped,
+                "skipped": history.skipped,
+                "max_samples": history.max_samples,
+            }
+            for (device, variable), history in series.items()
+        ],
+    }
+    temp_file = f"{path}.tmp"
+    written = 0
+    try:
+        with open(temp_file, "wb") as f:
+            written += f.write(HISTORY_MAGIC)
+            written += f.write(
+                json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+                + b"\n"
+            )
+            for history in series.values():
+                for column in (history.iterations, history.timestamps, history.values):
+                    written += f.write(column.tobytes())
+        os.replace(temp_file, path)
+    except Exception:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+        raise
+    return written
+
+
+def read_history(path: str) -> Tuple[Dict[Tuple[str, str], VariableHistory], dict]:
+    """读取历史文件，返回 (序列字典, 头部信息)"""
+    with open(path, "rb") as f:
+        if f.readline() != HISTORY_MAGIC:
+            raise ValueError(f"{path} is not a DataStore history file")
+        header = json.loads(f.readline().decode("utf-8"))
+        swap = header.get("byteorder", sys.byteorder) != sys.byteorder
+        series = {}
+        for meta in header["series"]:
+            history = VariableHistory(meta.get("max_samples", DEFAULT_MAX_SAMPLES))
+            for column in (history.iterations, history.timestamps, history.values):
+                column.fromfile(f, meta["length"])
+                if swap:
+                    column.byteswap()
+            history.count = meta["count"]
+            history.total = meta["total"]
+            history.minimum = math.inf if meta["min"] is None else meta["min"]
+            history.maximum = -math.inf if meta["max"] is None else meta["max"]
+            history.dropped = meta.get("dropped", 0)
+            history.skipped = meta.get("skipped", 0)
+            history.check_order()
+            series[(meta["device"], meta["variable"])] = history
+    return series, header
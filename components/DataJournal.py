@@ -0,0 +1,168 @@
+"""
+DataStore 追加式日志（write-ahead journal）
+
+journal 模式下 DataStore 不再在每次保存时重写整个会话 JSON，而是把每次
+变更以一行紧凑 JSON 追加到 ``session_<id>.json.journal``：
+
+    {"op":"set","d":"DeviceA","k":"IMEI","v":"8612345"}
+    {"op":"del","d":"DeviceA","k":"IMEI"}
+    {"op":"del","d":"DeviceA"}
+
+后台压缩（compaction）定期把内存数据写成可读的 ``session_<id>.json`` 快照并
+截断日志；加载时先读快照再按顺序重放日志。所有记录都是幂等的，因此即使
+压缩中途退出，重放"快照 + 未删除的日志"也能得到正确结果。
+
+fsync 策略：
+- always: 每条记录写入后立即 flush + fsync
+- batch:  由后台线程按 save_interval 周期 flush + fsync（默认）
+- never:  周期 flush，由操作系统决定何时落盘
+"""
+
+import json
+import os
+import threading
+from typing import Dict, Iterable, Optional
+
+from components.Logger import AutoComLogger, get_logger
+
+logger: AutoComLogger = get_logger(name="AutoCom")
+
+FSYNC_POLICIES = ("always", "batch", "never")
+
+JOURNAL_SUFFIX = ".journal"
+# 压缩期间被轮转出去的日志，压缩完成后删除
+COMPACTING_SUFFIX = ".journal.compacting"
+
+
+def encode_record(op: str, device: str, variable=None, value=None) -> str:
+    record = {"op": op, "d": device}
+    if variable is not None:
+        record["k"] = variable
+    if op == "set":
+        record["v"] = value
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def apply_record(data: Dict[str, dict], record: dict) -> None:
+    """把一条日志记录应用到数据字典"""
+    device = record.get("d")
+    op = record.get("op")
+    if op == "set":
+        data.setdefault(device, {})[record["k"]] = record.get("v")
+    elif op == "del":
+        if "k" in record:
+            data.get(device, {}).pop(record["k"], None)
+        else:
+            data.pop(device, None)
+
+
+def replay_journal(path: str, data: Dict[str, dict]) -> int:
+    """按顺序重放日志文件，返回应用的记录数
+
+    崩溃时最后一行可能只写了一半，无法解析的行会被跳过。
+    """
+    if not os.path.exists(path):
+        return 0
+    applied = 0
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                apply_record(data, json.loads(line))
+                applied += 1
+            except (json.JSONDecodeError, KeyError, TypeError):
+                continue
+    return applied
+
+
+def replay_session_journals(snapshot_path: str, data: Dict[str, dict]) -> int:
+    """在快照数据之上重放该会话残留的日志（压缩中的和当前的）"""
+    applied = 0
+    for suffix in (COMPACTING_SUFFIX, JOURNAL_SUFFIX):
+        applied += replay_journal(f"{snapshot_path}{suffix}", data)
+    return applied
+
+
+class DataJournal:
+    """会话数据的追加式日志文件"""
+
+    def __init__(self, snapshot_path: str, fsync: str = "batch"):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(
+                f"Invalid fsync policy '{fsync}', expected one of {FSYNC_POLICIES}"
+            )
+        self.path = f"{snapshot_path}{JOURNAL_SUFFIX}"
+        self.compacting_path = f"{snapshot_path}{COMPACTING_SUFFIX}"
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._unsynced = False
+        self.bytes_written = 0
+
+    @property
+    def size(self) -> int:
+        """当前日志文件的字节数"""
+        with self._lock:
+            return self._file.tell() if not self._file.closed else 0
+
+    def append(self, lines: Iterable[str]) -> None:
+        with self._lock:
+            for line in lines:
+                self._file.write(line)
+                self.bytes_written += len(line)
+            if self.fsync == "always":
+                self._sync_locked()
+            else:
+                self._unsynced = True
+
+    def sync(self) -> None:
+        """把缓冲区写入文件（fsync 策略不为 never 时同时 fsync）"""
+        with self._lock:
+            if self._unsynced:
+                self._sync_locked()
+
+    def _sync_locked(self) -> None:
+        if self._file.closed:
+            return
+        self._file.flush()
+        if self.fsync != "never":
+            os.fsync(self._file.fileno())
+        self._unsynced = False
+
+    def rotate(self) -> Optional[str]:
+        """把当前日志移到 compacting 文件并开始新的日志
+
+        调用方在轮转之后再收集数据快照（写入方先发布再追加日志）。
+        上一次压缩残留的 compacting 文件存在时不轮转，返回 None。
+        """
+        with self._lock:
+            if os.path.exists(self.compacting_path):
+                return None
+            self._sync_locked()
+            self._file.close()
+            os.replace(self.path, self.compacting_path)
+            self._file = open(self.path, "a", encoding="utf-8")
+            return self.compacting_path
+
+    def finish_compaction(self) -> None:
+        """快照写入完成后删除被轮转出去的日志"""
+        try:
+            os.remove(self.compacting_path)
+        except FileNotFoundError:
+            pass
+
+    def close(self, remove: bool = False) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._sync_locked()
+                self._file.close()
+        if remove:
+            for path in (self.path, self.compacting_path):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.log_session_error(f"Error removing journal {path}: {e}")
@@ -0,0 +1,100 @@
+"""
+DataStore 会话文件的序列化格式
+
+会话文件名保持 ``session_<id>.json`` 不变，内容可以是以下任一格式，加载时按
+文件头自动识别，因此切换格式后旧会话仍可读取：
+
+- json:    缩进 JSON（默认，与旧版本相同，便于直接查看）
+- compact: 无缩进、紧凑分隔符的 JSON
+- gzip:    gzip 压缩的 compact JSON（文件头 ``1f 8b``）
+- lzma:    xz 压缩的 compact JSON（文件头 ``fd 37 7a 58 5a 00``），体积最小
+- pickle:  pickle protocol 5 二进制快照（文件头 ``80 05``），恢复最快
+
+pickle 加载会执行文件中的对象构造，只应用于本机生成的会话文件。
+"""
+
+import gzip
+import json
+import lzma
+import pickle
+from typing import Callable, Dict, NamedTuple
+
+SERIALIZATION_FORMATS = ("json", "compact", "gzip", "lzma", "pickle")
+
+# 压缩级别偏向速度：会话数据重复度高，低级别已能得到大部分压缩收益
+GZIP_LEVEL = 3
+LZMA_PRESET = 1
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_LZMA_MAGIC = b"\xfd7zXZ\x00"
+_PICKLE_MAGIC = b"\x80\x05"
+
+
+class Serializer(NamedTuple):
+    name: str
+    dumps: Callable[[object], bytes]
+    loads: Callable[[bytes], object]
+
+
+def _compact_dumps(data) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+_SERIALIZERS: Dict[str, Serializer] = {
+    "json": Serializer(
+        "json", lambda data: json.dumps(data, indent=2).encode("utf-8"), json.loads
+    ),
+    "compact": Serializer("compact", _compact_dumps, json.loads),
+    "gzip": Serializer(
+        "gzip",
+        lambda data: gzip.compress(_compact_dumps(data), compresslevel=GZIP_LEVEL, mtime=0),
+        lambda raw: json.loads(gzip.decompress(raw)),
+    ),
+    "lzma": Serializer(
+        "lzma",
+        lambda data: lzma.compress(_compact_dumps(data), preset=LZMA_PRESET),
+        lambda raw: json.loads(lzma.decompress(raw)),
+    ),
+    "pickle": Serializer(
+        "pickle", lambda data: pickle.dumps(data, protocol=5), pickle.loads
+    ),
+}
+
+
+def get_serializer(name: str) -> Serializer:
+    if name not in _SERIALIZERS:
+        raise ValueError(
+            f"Invalid serialization format '{name}', expected one of {SERIALIZATION_FORMATS}"
+        )
+    return _SERIALIZERS[name]
+
+
+def detect_format(raw: bytes) -> str:
+    """按文件头识别格式（JSON 不区分缩进与紧凑，统一返回 json）"""
+    if raw.startswith(_GZIP_MAGIC):
+        return "gzip"
+    if raw.startswith(_LZMA_MAGIC):
+        return "lzma"
+    if raw.startswith(_PICKLE_MAGIC):
+        return "pickle"
+    return "json"
+
+
+def loads(raw: bytes):
+    """解析任一格式的会话数据"""
+    return _SERIALIZERS[detect_format(raw)].loads(raw)
+
+
+def load_file(path) -> dict:
+    """读取任一格式的会话文件
+
+    Raises:
+        ValueError: 文件内容无法解析（包括 json.JSONDecodeError）
+        OSError: 文件无法读取
+    """
+    with open(path, "rb") as f:
+        raw = f.read()
+    try:
+        return loads(raw)
+    except (EOFError, OSError, lzma.LZMAError, pickle.UnpicklingError) as e:
+        raise ValueError(f"{path}: {e}") from e
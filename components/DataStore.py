@@ -1,17 +1,72 @@
-import json
 import os
-import queue
 import threading
 import time
-import shutil
 import glob
+import itertools
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 from threading import RLock
 from utils.common import CommonUtils
 from components.Logger import AutoComLogger, get_logger
+from components.DataStoreSQLite import DB_FILENAME, SQLiteBackend, db_path_for
+from components.DataSerializer import get_serializer, load_file
+from components.SessionCatalog import SessionCatalog
+from components.DataHistory import (
+    DEFAULT_MAX_SAMPLES,
+    DEFAULT_PERCENTILES,
+    HISTORY_SUFFIX,
+    HistoryRecorder,
+    read_history,
+    write_history,
+)
+from components.DataJournal import (
+    DataJournal,
+    FSYNC_POLICIES,
+    JOURNAL_SUFFIX,
+    COMPACTING_SUFFIX,
+    encode_record,
+    replay_session_journals,
+)
 
 logger: AutoComLogger = get_logger(name="AutoCom")
 
 
+PERSISTENCE_MODES = ("snapshot", "journal", "sqlite")
+
+# 会话目录中本会话条目的最长刷新间隔（键集合不变时）
+CATALOG_REFRESH_INTERVAL = 30.0
+
+# 分片版本号在进程内全局递增：同一个版本号只会对应一个分片的一个状态，
+# 缓存可以只用分片版本号作为键
+_versions = itertools.count(1)
+
+
+class DataShard:
+    """One device namespace with its own lock and copy-on-write variables
+
+    ``state`` is a (version, variables) tuple replaced as a whole, so lock-free
+    readers always see a matching pair; published variable dicts are never
+    modified again. Version 0 marks a shard that has not published anything yet.
+    ``changes`` counts the shard's publishes (updated under ``lock``).
+    """
+
+    __slots__ = ("name", "lock", "state", "removed", "changes")
+
+    def __init__(self, name, variables=None, version=0):
+        self.name = name
+        self.lock = threading.Lock()
+        self.state = (version, variables if variables is not None else {})
+        self.removed = False
+        self.changes = 0
+
+    @property
+    def version(self):
+        return self.state[0]
+
+    @property
+    def variables(self):
+        return self.state[1]
+
+
 class DataStore:
     def __init__(
         self,
@@ -20,6 +75,15 @@ class DataStore:
         session_id=None,
         auto_cleanup=True,
         cleanup_days=7,
+        cleanup_interval=3600.0,
+        persist=True,
+        persistence="snapshot",
+        fsync="batch",
+        compact_interval=60.0,
+        compact_bytes=4 * 1024 * 1024,
+        history=None,
+        history_max_samples=DEFAULT_MAX_SAMPLES,
+        serialization="json",
     ):
         """
         Initialize DataStore with session-based file management
@@ -30,13 +94,69 @@ class DataStore:
             session_id: Unique session identifier. If not provided, will generate one based on timestamp
             auto_cleanup: Whether to automatically clean up old data files
             cleanup_days: Number of days to keep old data files (default: 7)
+            cleanup_interval: Minimum seconds between background cleanups of the data directory
+            persist: Whether to load/save the session file. When False the store is
+                memory-only (used by shard workers whose data is merged by the coordinator)
+            persistence: "snapshot" rewrites the session JSON on each save;
+                "journal" appends change records and compacts them into the JSON in the background;
+                "sqlite" saves into the shared data_store.sqlite3 database in the data directory
+            fsync: Journal fsync policy: "always", "batch" (every save_interval) or "never"
+            compact_interval: Seconds between journal compactions
+            compact_bytes: Compact early once the journal grows beyond this size
+            history: Variables whose every stored value is also appended to a
+                time series ("VAR" for all devices or "Device.VAR"), see DataHistory
+            history_max_samples: Samples kept per series; the oldest are dropped beyond it
+            serialization: Session file format: "json" (indented), "compact", "gzip",
+                "lzma" or "pickle"; any of them is detected when loading
         """
-        self.data = {}
-        self.lock = RLock()
+        if persistence not in PERSISTENCE_MODES:
+            raise ValueError(
+                f"Invalid persistence mode '{persistence}', expected one of {PERSISTENCE_MODES}"
+            )
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(
+                f"Invalid fsync policy '{fsync}', expected one of {FSYNC_POLICIES}"
+            )
+        # Sharded copy-on-write store: every device namespace (including Constants)
+        # is a DataShard with its own lock. A write swaps the shard's state under
+        # that lock only, so writers of different devices never share a lock; reads
+        # are lock-free. self._shards itself is replaced (never mutated) under
+        # self.lock when a device namespace is added or removed.
+        #
+        # The store version is the sum of the shard versions plus _removed_version
+        # (which absorbs the versions of deleted shards): every publish replaces a
+        # shard version with a larger one, so the sum grows strictly with each change
+        # without a global counter on the write path. _removed_changes likewise keeps
+        # the change count of deleted shards.
+        self._shards = {}
+        self._removed_version = next(_versions)
+        self._removed_changes = 0
+        self.persist = persist
+        self.persistence = persistence
+        self.serializer = get_serializer(serialization)
+        self.fsync = fsync
+        self.compact_interval = compact_interval
+        self.compact_bytes = compact_bytes
+        self._journal = None
+        self._backend = None
+        self.last_compact_time = time.time()
+        self.lock = RLock()  # directory lock: adding/removing device namespaces
         self.save_interval = save_interval
         self.last_save_time = time.time()
         self.auto_cleanup = auto_cleanup
         self.cleanup_days = cleanup_days
+        self.cleanup_interval = cleanup_interval
+        self._catalog = None
+        self._catalog_keys = None
+        self._catalog_time = 0.0
+        self._cleanup_thread = None
+
+        # 变量历史（仅记录配置的变量）：样本为 (iteration, monotonic_ts, value)
+        self._history = HistoryRecorder(history, history_max_samples)
+        self._history_anchor = (time.time(), time.monotonic())
+        # 上次写盘时各序列的累计样本数，未变化时跳过写历史文件
+        self._history_saved = {}
+        self.current_iteration = None
 
         # Generate session ID if not provided
         if session_id is None:
@@ -47,89 +167,208 @@ class DataStore:
         # Setup filename with session ID
         if filename is None:
             data_dir = "temps/data_store"
-            os.makedirs(data_dir, exist_ok=True)
+            if self.persist:
+                os.makedirs(data_dir, exist_ok=True)
             self.filename = f"{data_dir}/session_{self.session_id}.json"
         else:
             self.filename = filename
 
         self.backup_filename = f"{self.filename}.backup"
 
-        # Optimization: batch saving and incremental updates
-        self.dirty_devices = set()
-
-        # Queue and thread configuration
-        self.save_queue = queue.Queue(maxsize=50)
+        # Coalescing saver woken through a condition variable (its own lock, not the
+        # directory lock). Changed devices are found by comparing shard versions with
+        # _saved_versions, so writers never touch a shared dirty set. A force_save()
+        # waits for a saved view containing the shard versions it saw;
+        # _durable_generation is the change count (see _change_count) covered by the
+        # last save.
+        self._save_cond = threading.Condition()
+        self._save_pending = False
+        self._saved_versions = {}
+        self._dirty_since = 0.0
+        self._flush_requested = False
+        self._durable_generation = 0
+        self._waiters = []  # ({device: (shard, version)}, Future) pending force_save() calls
+        self.save_metrics = {
+            "saves": 0,
+            "failed_saves": 0,
+            "bytes_written": 0,
+            "last_latency_ms": 0.0,
+            "max_latency_ms": 0.0,
+            "total_latency_ms": 0.0,
+        }
         self._stop_event = threading.Event()
         self.save_thread = threading.Thread(
-            target=self._save_worker,
+            target=(
+                self._journal_worker
+                if self.persistence == "journal"
+                else self._save_worker
+            ),
             name=f"DataStoreSaveWorker_{self.session_id}",
             daemon=True,
         )
 
+        if not self.persist:
+            logger.log_session_start(
+                f"DataStore initialized for session: {self.session_id} (in-memory)"
+            )
+            return
+
+        self._catalog = SessionCatalog(os.path.dirname(self.filename) or ".")
+        if self.persistence == "sqlite":
+            self._backend = SQLiteBackend(db_path_for(os.path.dirname(self.filename)))
+
         # Load data during initialization
         self._load_from_file()
+        self._load_history()
+        if self.persistence == "journal":
+            self._open_journal()
+            # 让运行中的 journal 会话在首次压缩前也能被列出
+            self._update_catalog(force=True)
 
         # Perform cleanup if enabled
         if self.auto_cleanup:
-            self._cleanup_old_files()
+            self._schedule_cleanup()
 
         self.save_thread.start()
 
         logger.log_session_start(
             f"DataStore initialized for session: {self.session_id}"
         )
-        logger.log_session_start(f"Data file: {self.filename}")
+        if self._backend is not None:
+            logger.log_session_start(f"Data file: {self._backend.path} (sqlite)")
+        else:
+            logger.log_session_start(f"Data file: {self.filename}")
+        if self._journal is not None:
+            logger.log_session_start(
+                f"Journal file: {self._journal.path} (fsync: {self.fsync})"
+            )
+
+    @classmethod
+    def from_config(cls, config=None, **kwargs):
+        """Create a DataStore from the ConfigForDataStore section of an execution dict"""
+        options = {}
+        for key in (
+            "save_interval",
+            "auto_cleanup",
+            "cleanup_days",
+            "cleanup_interval",
+            "persistence",
+            "fsync",
+            "compact_interval",
+            "compact_bytes",
+            "history",
+            "history_max_samples",
+            "serialization",
+        ):
+            if config and key in config:
+                options[key] = config[key]
+        options.update(kwargs)
+        return cls(**options)
 
     def _load_from_file(self):
         """Load data with error recovery mechanism"""
+        if self._backend is not None:
+            data = self._backend.load_session(self.session_id)
+            if data:
+                logger.log_session_start(
+                    f"Successfully loaded session {self.session_id} from {self._backend.path}"
+                )
+            self._install(data)
+            return
+
+        data = {}
         for filepath in [self.filename, self.backup_filename]:
             if os.path.exists(filepath):
                 try:
-                    with open(filepath, "r") as f:
-                        self.data = json.load(f)
+                    data = load_file(filepath)
                     logger.log_session_start(
                         f"Successfully loaded data file: {filepath}"
                     )
-                    return
-                except (json.JSONDecodeError, IOError) as e:
+                    break
+                except (ValueError, OSError) as e:
                     logger.log_session_error(f"File {filepath} corrupted: {e}")
                     continue
+        else:
+            logger.log_session_start("No valid data file found, using empty dataset")
+            data = {}
 
-        logger.log_session_start("No valid data file found, using empty dataset")
-        self.data = {}
+        # 重放上次未压缩完的日志（journal 模式异常退出后恢复）
+        replayed = replay_session_journals(self.filename, data)
+        if replayed:
+            logger.log_session_start(f"Replayed {replayed} journal records")
+        self._install(data)
+
+    def _install(self, data):
+        """Build the device shards from loaded data (initialization only)"""
+        with self.lock:
+            self._shards = {
+                device: DataShard(device, variables, next(_versions))
+                for device, variables in data.items()
+            }
+            # 已在磁盘上的数据无需再次保存
+            self._saved_versions = {
+                device: shard.version for device, shard in self._shards.items()
+            }
+
+    def _load_history(self):
+        """Resume the variable history of a reopened session"""
+        path = f"{self.filename}{HISTORY_SUFFIX}"
+        if not self._history or not os.path.exists(path):
+            return
+        try:
+            series, header = read_history(path)
+        except (OSError, ValueError, KeyError) as e:
+            logger.log_session_error(f"History file {path} unreadable: {e}")
+            return
+        for key, history in series.items():
+            history.max_samples = self._history.max_samples
+            self._history.series[key] = history
+            self._history_saved[key] = history.count
+        self._history_anchor = (header["wall_anchor"], header["monotonic_anchor"])
+
+    def _open_journal(self):
+        """journal 模式：把恢复出的数据写成快照后开始新的日志"""
+        if any(
+            os.path.exists(f"{self.filename}{suffix}")
+            for suffix in (JOURNAL_SUFFIX, COMPACTING_SUFFIX)
+        ):
+            self._write_snapshot(self.snapshot()[1])
+            for suffix in (COMPACTING_SUFFIX, JOURNAL_SUFFIX):
+                try:
+                    os.remove(f"{self.filename}{suffix}")
+                except FileNotFoundError:
+                    pass
+        self._journal = DataJournal(self.filename, fsync=self.fsync)
 
     def get_constant(self, key, default=None):
         """Get a constant value by key"""
         return self.get_data("Constants", key) or default
 
+    def _schedule_cleanup(self):
+        """Run retention cleanup in the background, at most once per cleanup_interval"""
+        try:
+            if not self._catalog.claim_cleanup(self.cleanup_interval):
+                return
+        except Exception as e:
+            logger.log_session_error(f"Error checking cleanup schedule: {e}")
+            return
+        self._cleanup_thread = threading.Thread(
+            target=self._cleanup_old_files,
+            name=f"DataStoreCleanup_{self.session_id}",
+            daemon=True,
+        )
+        self._cleanup_thread.start()
+
     def _cleanup_old_files(self):
         """Clean up old data files based on cleanup_days setting"""
         try:
-            from pathlib import Path
+            cutoff_time = time.time() - (self.cleanup_days * 24 * 3600)
 
-            data_dir = Path(self.filename).parent
-            if not data_dir.exists():
-                return
-
-            current_time = time.time()
-            cutoff_time = current_time - (self.cleanup_days * 24 * 3600)
+            # 过期会话来自目录索引，不再 glob/stat 整个数据目录
+            cleaned_count = self._catalog.cleanup(cutoff_time, keep=(self.session_id,))
 
-            # Find all session data files
-            files = list(data_dir.glob("session_*.json"))
-
-            cleaned_count = 0
-            for filepath in files:
-                try:
-                    file_time = filepath.stat().st_mtime
-                    if file_time < cutoff_time:
-                        filepath.unlink()
-                        # Also remove backup file if exists
-                        backup_file = filepath.with_suffix(".json.backup")
-                        if backup_file.exists():
-                            os.remove(backup_file)
-                        cleaned_count += 1
-                except Exception as e:
-                    logger.log_session_error(f"Error cleaning up file {filepath}: {e}")
+            if self._backend is not None:
+                cleaned_count += self._backend.delete_sessions_before(cutoff_time)
 
             if cleaned_count > 0:
                 logger.log_session_start(
@@ -138,243 +377,664 @@ class DataStore:
         except Exception as e:
             logger.log_session_error(f"Error during cleanup: {e}")
 
-    def store_data(self, device_name, variable, value):
-        """Store data - optimized version"""
+    def _update_catalog(self, force=False):
+        """Record this session in the catalog after a save
+
+        The catalog is rewritten when the device/variable key set changes, when
+        forced (compaction, stop) or at most every CATALOG_REFRESH_INTERVAL seconds.
+        """
+        if self._catalog is None or self._backend is not None:
+            return
+        keys = {
+            device: sorted(variables) for device, variables in self.snapshot()[1].items()
+        }
+        now = time.time()
+        if (
+            not force
+            and keys == self._catalog_keys
+            and now - self._catalog_time < CATALOG_REFRESH_INTERVAL
+        ):
+            return
+        try:
+            self._catalog.update(self.session_id, self.filename, keys, ts=now)
+            self._catalog_keys = keys
+            self._catalog_time = now
+        except Exception as e:
+            logger.log_session_error(f"Error updating session catalog: {e}")
+
+    def set_iteration(self, iteration):
+        """Set the iteration number recorded with history samples"""
+        self.current_iteration = iteration
+
+    def _namespace_lock(self, device_name):
+        """Lock guarding a device's history series (its shard lock)"""
+        shard = self._shards.get(device_name)
+        return shard.lock if shard is not None else self.lock
+
+    def _shard_for_write(self, device_name):
+        """Get or create the shard of a device namespace"""
+        shard = self._shards.get(device_name)
+        if shard is None:
+            with self.lock:
+                shard = self._shards.get(device_name)
+                if shard is None:
+                    shard = DataShard(device_name)
+                    shards = dict(self._shards)
+                    shards[device_name] = shard
+                    self._shards = shards
+        return shard
+
+    def _publish(self, shard, variables):
+        """Publish a new version of one shard; called with shard.lock held
+
+        The new state is a single reference swap, no store-wide lock is taken.
+        """
+        shard.state = (next(_versions), variables)
+        shard.changes += 1
+
+    def _variables(self, device_name):
+        """Lock-free read of a device namespace (empty dict if missing)"""
+        shard = self._shards.get(device_name)
+        return shard.variables if shard is not None else {}
+
+    def _collect(self):
+        """{device: (version, variables)} of all published shards (lock-free)"""
+        return {
+            device: shard.state for device, shard in self._shards.items() if shard.version
+        }
+
+    def _version_locked(self, states):
+        """Store version of a collected view; called with self.lock held so that no
+        device namespace is removed in between"""
+        return self._removed_version + sum(state[0] for state in states.values())
+
+    def _change_count(self):
+        """Number of changes so far (publishes and namespace deletions)"""
         with self.lock:
-            if device_name not in self.data:
-                self.data[device_name] = {}
-            self.data[device_name][variable] = value
-            self.dirty_devices.add(device_name)
+            return self._removed_changes + sum(
+                shard.changes for shard in self._shards.values()
+            )
 
-        # Batch saving strategy
-        current_time = time.time()
-        if current_time - self.last_save_time > self.save_interval:
-            self._trigger_save()
+    def store_data(self, device_name, variable, value, iteration=None):
+        """Store data in the device's shard
 
-    def get_data(self, device_name, variable=None):
-        """Get data from storage"""
+        Only the device's own shard lock is held while copying its variables,
+        recording history and appending to the journal; other devices write in
+        parallel.
+
+        Args:
+            iteration: Iteration recorded with the history sample (defaults to
+                the one given to set_iteration); ignored for untracked variables
+        """
+        while True:
+            shard = self._shard_for_write(device_name)
+            with shard.lock:
+                if shard.removed:
+                    # 设备命名空间刚被删除，写入新建的分片
+                    continue
+                variables = dict(shard.variables)
+                variables[variable] = value
+                self._publish(shard, variables)
+                if self._history:
+                    self._history.record(
+                        device_name,
+                        variable,
+                        value,
+                        self.current_iteration if iteration is None else iteration,
+                        time.monotonic(),
+                    )
+                if self._journal is not None:
+                    self._append_journal("set", device_name, variable, value)
+                break
+        self._mark_dirty()
+
+    def snapshot(self):
+        """Return (version, data) for the current state without copying variables
+
+        The directory lock is held only to collect the shard references (writers
+        never take it). The returned dict and its per-device dicts are shared and must
+        be treated as read-only. The version grows with every change of this store, so
+        caches keyed by it can skip re-resolution when nothing changed.
+        """
         with self.lock:
-            if device_name not in self.data:
-                return None
+            states = self._collect()
+            version = self._version_locked(states)
+        return version, {device: state[1] for device, state in states.items()}
 
-            if variable is None:
-                # Return all data for the device
-                return self.data[device_name].copy()
-            else:
-                # Return specific variable data
-                return self.data[device_name].get(variable, None)
+    @property
+    def data(self):
+        """Read-only view of all device namespaces (see snapshot())"""
+        return self.snapshot()[1]
 
-    def get_all_data(self):
-        """Get all stored data"""
+    def namespace_state(self, device_name=""):
+        """Lock-free (key, constants, device_vars) for variable resolution
+
+        key is the pair of shard versions; it changes only when Constants or the
+        device's own namespace changes, so writes by other devices do not
+        invalidate caches keyed by it.
+        """
+        constants = self._shards.get("Constants")
+        constants_state = constants.state if constants is not None else (0, {})
+        device = self._shards.get(device_name) if device_name else None
+        device_state = device.state if device is not None else (0, {})
+        return (
+            (constants_state[0], device_state[0]),
+            constants_state[1],
+            device_state[1],
+        )
+
+    def get_version(self):
+        """Change-version counter, increases on every store/delete"""
         with self.lock:
-            return {device: variables.copy() for device, variables in self.data.items()}
+            return self._version_locked(self._collect())
+
+    def get_data(self, device_name, variable=None):
+        """Get data from storage (lock-free read of the device's shard)"""
+        shard = self._shards.get(device_name)
+        if shard is None or not shard.version:
+            return None
+        variables = shard.variables
+
+        if variable is None:
+            # Return all data for the device
+            return variables.copy()
+        else:
+            # Return specific variable data
+            return variables.get(variable, None)
+
+    def resolve_variables(self, names, device_name="", data=None):
+        """Resolve template variables without locking
+
+        Constants 中的非空值优先，其次是 device_name 命名空间下的变量；
+        无法解析的变量不会出现在返回的字典中。data 为 snapshot() 返回的数据，
+        默认读取各分片的当前版本。
+        """
+        values = {}
+        if data is None:
+            constants = self._variables("Constants")
+            device_vars = self._variables(device_name) if device_name else {}
+        else:
+            constants = data.get("Constants", {})
+            device_vars = data.get(device_name, {}) if device_name else {}
+        for name in names:
+            value = constants.get(name)
+            if not value:
+                value = device_vars.get(name)
+            if value is not None:
+                values[name] = value
+        return values
+
+    def get_all_data(self):
+        """Get all stored data (a mutable copy; use snapshot() to avoid copying)"""
+        return {device: variables.copy() for device, variables in self.snapshot()[1].items()}
 
     def has_data(self, device_name, variable=None):
         """Check if data exists"""
-        with self.lock:
-            if device_name not in self.data:
-                return False
+        shard = self._shards.get(device_name)
+        if shard is None or not shard.version:
+            return False
 
-            if variable is None:
-                return len(self.data[device_name]) > 0
-            else:
-                return variable in self.data[device_name]
+        if variable is None:
+            return len(shard.variables) > 0
+        else:
+            return variable in shard.variables
 
     def delete_data(self, device_name, variable=None):
         """Delete data from storage"""
-        with self.lock:
-            if device_name not in self.data:
+        shard = self._shards.get(device_name)
+        if shard is None:
+            return False
+        with shard.lock:
+            if shard.removed or not shard.version:
                 return False
 
             if variable is None:
-                # Delete all data for the device
-                del self.data[device_name]
-                self.dirty_devices.add(device_name)
+                # Delete all data for the device: drop the shard from the directory
+                shard.removed = True
+                with self.lock:
+                    shards = dict(self._shards)
+                    shards.pop(device_name, None)
+                    self._shards = shards
+                    self._removed_version += shard.version + next(_versions)
+                    self._removed_changes += shard.changes + 1
+                if self._journal is not None:
+                    self._append_journal("del", device_name)
             else:
                 # Delete specific variable data
-                if variable in self.data[device_name]:
-                    del self.data[device_name][variable]
-                    self.dirty_devices.add(device_name)
-                    return True
-                return False
-            return True
+                if variable not in shard.variables:
+                    return False
+                variables = dict(shard.variables)
+                del variables[variable]
+                self._publish(shard, variables)
+                if self._journal is not None:
+                    self._append_journal("del", device_name, variable)
+        self._mark_dirty()
+        return True
+
+    def get_history(
+        self,
+        device_name,
+        variable,
+        start_iteration=None,
+        end_iteration=None,
+        since=None,
+        until=None,
+    ):
+        """Get recorded samples of a history variable
 
-    def _trigger_save(self):
-        """Trigger save operation"""
-        try:
-            dirty_data = self._get_dirty_snapshot()
-            if dirty_data:
-                save_task = {
-                    "data": dirty_data,
-                    "devices_to_clear": set(dirty_data.keys()),
-                }
-                self.save_queue.put_nowait(save_task)
-                # with self.lock:
-                #     self.dirty_devices.clear()
-                self.last_save_time = time.time()
-        except queue.Full:
-            logger.log_session_error("Save queue is full, skipping this save")
+        Args:
+            start_iteration / end_iteration: Inclusive iteration range
+            since / until: time.monotonic() range (until is exclusive)
 
-    def _get_dirty_snapshot(self):
-        """Get snapshot of changed data"""
-        with self.lock:
-            return {
-                device: self.data[device].copy()
-                for device in self.dirty_devices
-                if device in self.data
-            }
+        Returns:
+            List of (iteration, monotonic_ts, value) tuples, oldest first
+        """
+        with self._namespace_lock(device_name):
+            history = self._history.get(device_name, variable)
+            if history is None:
+                return []
+            return history.samples(
+                start_iteration=start_iteration,
+                end_iteration=end_iteration,
+                since=since,
+                until=until,
+            )
 
-    def _save_worker(self):
-        """Background save worker thread - optimized version"""
-        logger.log_session_start("DataStore save worker thread started")
+    def history_stats(
+        self,
+        device_name,
+        variable,
+        percentiles=DEFAULT_PERCENTILES,
+        start_iteration=None,
+        end_iteration=None,
+        since=None,
+        until=None,
+    ):
+        """Aggregate a history variable: count/min/max/mean and percentiles (p50, p90, ...)
 
-        while True:
-            try:
-                # Check stop condition first
-                if self._stop_event.is_set():
-                    # Process remaining items in queue before stopping
-                    remaining_items = []
-                    while True:
-                        try:
-                            item = self.save_queue.get_nowait()
-                            remaining_items.append(item)
-                        except queue.Empty:
-                            break
+        Without a range, count/min/max/mean cover every sample of the session
+        while percentiles use the retained samples. Returns None if the variable
+        has no history.
+        """
+        with self._namespace_lock(device_name):
+            history = self._history.get(device_name, variable)
+            if history is None:
+                return None
+            return history.stats(
+                percentiles,
+                start_iteration=start_iteration,
+                end_iteration=end_iteration,
+                since=since,
+                until=until,
+            )
 
-                    # Process remaining items
-                    for save_task in remaining_items:
-                        try:
-                            self._incremental_save(save_task["data"])
-                            with self.lock:
-                                for device in save_task["devices_to_clear"]:
-                                    self.dirty_devices.discard(device)
-                        except Exception as e:
-                            logger.log_session_error(
-                                f"Error processing remaining save task: {e}"
-                            )
-                        finally:
-                            self.save_queue.task_done()
+    def save_history(self, changed_only=False):
+        """Write the variable history next to the session file; returns bytes written
 
-                    break
+        Called by the save worker / journal compaction with changed_only=True so the
+        history survives a crash; the write is skipped when no sample was added since
+        the previous one.
+        """
+        if not self.persist or not self._history.series:
+            return 0
+        if changed_only and self._history_saved == {
+            key: history.count for key, history in list(self._history.series.items())
+        }:
+            return 0
+        # 复制各列后在锁外写盘，写入期间仍可继续追加样本
+        snapshot = {}
+        for key, history in list(self._history.series.items()):
+            with self._namespace_lock(key[0]):
+                snapshot[key] = history.copy()
+        path = f"{self.filename}{HISTORY_SUFFIX}"
+        try:
+            written = write_history(path, snapshot, self._history_anchor)
+        except Exception as e:
+            logger.log_session_error(f"Error saving variable history to {path}: {e}")
+            return 0
+        self._history_saved = {key: history.count for key, history in snapshot.items()}
+        return written
 
-                # Get save task with timeout
-                save_task = self.save_queue.get(timeout=1.0)
+    @staticmethod
+    def load_history(session_id=None, filepath=None, data_dir="temps/data_store"):
+        """
+        Load the variable history of a session
 
-                try:
-                    self._incremental_save(save_task["data"])
+        Args:
+            session_id: Session ID to load (optional)
+            filepath: Session JSON path or history file path (takes precedence)
+            data_dir: Directory containing session data files
 
-                    with self.lock:
-                        # Clear dirty devices after save
-                        for device in save_task["devices_to_clear"]:
-                            self.dirty_devices.discard(device)
+        Returns:
+            Dictionary {(device, variable): VariableHistory}, empty if not found
+        """
+        if filepath:
+            path = str(filepath)
+            if not path.endswith(HISTORY_SUFFIX):
+                path = f"{path}{HISTORY_SUFFIX}"
+        elif session_id:
+            path = os.path.join(data_dir, f"session_{session_id}.json{HISTORY_SUFFIX}")
+        else:
+            return {}
+        try:
+            return read_history(path)[0]
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.log_session_error(f"Error loading variable history {path}: {e}")
+            return {}
 
-                except Exception as e:
-                    logger.log_session_error(f"Error in incremental save: {e}")
-                finally:
-                    # Always call task_done to prevent deadlock
-                    self.save_queue.task_done()
+    def _append_journal(self, op, device_name, variable=None, value=None):
+        """Append a change record; called with the device's shard lock held so the
+        records of a device keep their write order (records of different devices
+        commute on replay)"""
+        try:
+            self._journal.append([encode_record(op, device_name, variable, value)])
+        except Exception as e:
+            logger.log_session_error(f"Error writing journal record: {e}")
 
-            except queue.Empty:
-                # No tasks to process, continue loop
-                continue
+    def _journal_worker(self):
+        """Background worker for journal mode: periodic fsync and compaction"""
+        logger.log_session_start("DataStore journal worker thread started")
+
+        while not self._stop_event.wait(min(self.save_interval, 1.0)):
+            try:
+                now = time.time()
+                if now - self.last_save_time >= self.save_interval:
+                    self._journal.sync()
+                    self.last_save_time = now
+                if (
+                    now - self.last_compact_time >= self.compact_interval
+                    or self._journal.size >= self.compact_bytes
+                ):
+                    self.compact()
             except Exception as e:
-                logger.log_session_error(f"Save worker thread error: {e}")
-                # Continue loop to prevent thread death
-                continue
+                logger.log_session_error(f"Journal worker thread error: {e}")
+
+        logger.log_session_start("DataStore journal worker thread stopped")
+
+    def compact(self):
+        """Write the readable session snapshot and truncate the journal (journal mode only)"""
+        if self._journal is None:
+            return
+        # 先轮转再收集快照：写入方先发布再追加日志，记录仍在旧日志中的变更一定已
+        # 发布、包含在快照里；之后追加到新日志的记录在恢复时按顺序重放，结果相同。
+        # 已发布的数据不会再被修改，直接引用即可
+        rotated = self._journal.rotate()
+        self.last_compact_time = time.time()
+        if rotated is None:
+            return
+        snapshot = {device: state[1] for device, state in self._collect().items()}
+        if self._write_snapshot(snapshot):
+            self._journal.finish_compaction()
+            self._update_catalog(force=True)
+        self.save_history(changed_only=True)
+
+    def _write_snapshot(self, data):
+        """Atomically replace the session file with the given data (journal compaction)"""
+        try:
+            start = time.perf_counter()
+            written = self._write_data_file(data, fsync=self.fsync != "never")
+            with self._save_cond:
+                self._record_save((time.perf_counter() - start) * 1000, written, True)
+            return True
+        except Exception as e:
+            logger.log_session_error(f"Error writing data snapshot: {e}")
+            return False
 
-        logger.log_session_start("DataStore save worker thread stopped")
+    def _write_data_file(self, data, fsync=False, backup=False):
+        """Serialize data and atomically replace the session file, returns bytes written
 
-    def _incremental_save(self, dirty_data):
-        """Incremental save to file"""
+        backup 时原文件先被改名为 .backup（不再整体复制一遍）；加载时主文件缺失
+        或损坏会回退到备份文件。
+        """
         temp_file = f"{self.filename}.tmp"
-
         try:
-            # Read existing data
-            existing_data = {}
-            if os.path.exists(self.filename):
-                try:
-                    with open(self.filename, "r") as f:
-                        existing_data = json.load(f)
-                except json.JSONDecodeError:
-                    # Try to recover from backup
-                    if os.path.exists(self.backup_filename):
-                        with open(self.backup_filename, "r") as f:
-                            existing_data = json.load(f)
-
-            # Merge dirty data
-            for device, variables in dirty_data.items():
-                if device in existing_data:
-                    existing_data[device].update(variables)
-                else:
-                    existing_data[device] = variables
-
-            # Atomic write
-            with open(temp_file, "w") as f:
-                json.dump(existing_data, f, indent=2)
-
-            # Create backup and replace main file
-            if os.path.exists(self.filename):
-                shutil.copy2(self.filename, self.backup_filename)
-
+            payload = self.serializer.dumps(data)
+            with open(temp_file, "wb") as f:
+                f.write(payload)
+                if fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            if backup and os.path.exists(self.filename):
+                os.replace(self.filename, self.backup_filename)
             os.replace(temp_file, self.filename)
-
-        except Exception as e:
-            logger.log_session_error(f"Error saving data: {e}")
+            return len(payload)
+        except Exception:
             if os.path.exists(temp_file):
                 os.remove(temp_file)
+            raise
+
+    def _mark_dirty(self):
+        """Wake the saver after a change; only the first change of a debounce window
+        takes the saver's lock"""
+        if self._save_pending or not self.persist or self._journal is not None:
+            return
+        with self._save_cond:
+            if not self._save_pending:
+                # 第一次变脏时开始计算防抖间隔并唤醒保存线程
+                self._save_pending = True
+                self._dirty_since = time.time()
+                self._save_cond.notify()
+
+    def _changed_devices(self, states):
+        """Devices whose shard version differs from the last save (None marks a deleted device)"""
+        changes = {
+            device: variables
+            for device, (version, variables) in states.items()
+            if self._saved_versions.get(device) != version
+        }
+        changes.update(
+            {device: None for device in self._saved_versions if device not in states}
+        )
+        return changes
 
-    def force_save(self):
-        """Force immediate save of all data"""
-        # Create a snapshot of current dirty devices to avoid holding lock too long
-        dirty_snapshot = None
-        with self.lock:
-            if self.dirty_devices:
-                dirty_snapshot = set(self.dirty_devices)
+    def _take_changes(self):
+        """Start a save: clear the pending flag, then collect a consistent view
 
-        # Trigger save outside of lock
-        if dirty_snapshot:
-            try:
-                dirty_data = {}
-                with self.lock:
-                    dirty_data = {
-                        device: self.data[device].copy()
-                        for device in dirty_snapshot
-                        if device in self.data
-                    }
-
-                if dirty_data:
-                    save_task = {"data": dirty_data, "devices_to_clear": dirty_snapshot}
-                    self.save_queue.put_nowait(save_task)
-                    self.last_save_time = time.time()
-
-                    # Wait for save completion with timeout to prevent infinite blocking
-                    start_time = time.time()
-                    timeout = 10.0  # 10 second timeout
-
-                    while (time.time() - start_time) < timeout:
-                        if self.save_queue.empty():
+        Returns (states, changes, generation).
+        """
+        with self._save_cond:
+            self._save_pending = False
+            self._flush_requested = False
+        # 先计数再收集：计入的变更一定已发布、包含在视图中
+        generation = self._change_count()
+        states = self._collect()
+        return states, self._changed_devices(states), generation
+
+    def _save_worker(self):
+        """Background save worker thread
+
+        合并（coalesce）同一防抖周期内的所有变更：第一次变更后等待 save_interval，
+        force_save() 或 stop() 会立即唤醒。保存失败的变更会在下一个周期重试，不会丢弃。
+        """
+        logger.log_session_start("DataStore save worker thread started")
+
+        while True:
+            with self._save_cond:
+                while True:
+                    if self._save_pending:
+                        if self._flush_requested or self._stop_event.is_set():
                             break
-                        time.sleep(0.1)
+                        remaining = self._dirty_since + self.save_interval - time.time()
+                        if remaining <= 0:
+                            break
+                        self._save_cond.wait(remaining)
+                    elif self._stop_event.is_set():
+                        break
+                    else:
+                        self._save_cond.wait()
+                if not self._save_pending:
+                    break
 
-                    if not self.save_queue.empty():
-                        logger.log_session_warning(
-                            "Warning: force_save timeout, some data may not be saved immediately"
-                        )
+            if not self._write_generation(*self._take_changes()) and (
+                self._stop_event.is_set()
+            ):
+                logger.log_session_error("Giving up pending saves during shutdown")
+                break
 
-            except queue.Full:
-                logger.log_session_error("Save queue is full during force_save")
+        logger.log_session_start("DataStore save worker thread stopped")
+
+    def _write_generation(self, states, changes, generation):
+        """Persist one coalesced generation and resolve the force_save() futures it covers"""
+        start = time.perf_counter()
+        error = None
+        written = 0
+        if changes:
+            try:
+                written = self._incremental_save(states, changes)
+                self._saved_versions = {
+                    device: version for device, (version, _) in states.items()
+                }
+            except Exception as e:
+                error = e
+                logger.log_session_error(f"Error in incremental save: {e}")
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        with self._save_cond:
+            if changes:
+                self._record_save(elapsed_ms, written, error is None)
+            if error is None:
+                self._durable_generation = max(self._durable_generation, generation)
+                self.last_save_time = time.time()
+            else:
+                # 未保存的变更留待下一个防抖周期重试
+                self._save_pending = True
+                self._dirty_since = time.time()
+            done = [f for target, f in self._waiters if self._covers(states, target)]
+            self._waiters = [
+                (t, f) for t, f in self._waiters if not self._covers(states, t)
+            ]
+            durable = self._durable_generation
+
+        for future in done:
+            if error is None:
+                future.set_result(durable)
+            else:
+                future.set_exception(error)
+        return error is None
+
+    @staticmethod
+    def _covers(states, target):
+        """Whether a collected view contains every change of a force_save() target"""
+        for device, (shard, version) in target.items():
+            state = states.get(device)
+            if shard is None:
+                # 调用前已删除的设备：视图中不存在，或已重新创建（版本更新）
+                if state is not None and state[0] < version:
+                    return False
+            elif state is None:
+                if not shard.removed:
+                    return False
+            elif state[0] < version:
+                return False
+        return True
+
+    def _record_save(self, elapsed_ms, written, ok):
+        """Update save metrics; called with self._save_cond held"""
+        metrics = self.save_metrics
+        if not ok:
+            metrics["failed_saves"] += 1
+            return
+        metrics["saves"] += 1
+        metrics["bytes_written"] += written
+        metrics["last_latency_ms"] = elapsed_ms
+        metrics["max_latency_ms"] = max(metrics["max_latency_ms"], elapsed_ms)
+        metrics["total_latency_ms"] += elapsed_ms
+
+    def _incremental_save(self, states, changes):
+        """Save changed devices, returns the number of bytes written
+
+        The sqlite backend updates only the changed devices. File modes write the
+        collected copy-on-write view (no copy is needed) instead of re-reading and
+        merging the file on disk.
+        """
+        if self._backend is not None:
+            written = self._backend.save_devices(self.session_id, changes)
+        else:
+            written = self._write_data_file(
+                {device: variables for device, (_, variables) in states.items()},
+                backup=True,
+            )
+            self._update_catalog()
+        return written + self.save_history(changed_only=True)
+
+    def force_save(self):
+        """Request an immediate save of all pending changes
+
+        Returns:
+            concurrent.futures.Future: resolved once every change made before the
+            call is durable (result is the saved change count); call
+            ``.result(timeout)`` to block.
+        """
+        future = Future()
+        if not self.persist:
+            future.set_result(self._change_count())
+            return future
+        if self._journal is not None:
+            # 日志已包含全部变更，只需落盘
+            try:
+                start = time.perf_counter()
+                self._journal.sync()
+                self.last_save_time = time.time()
+                with self._save_cond:
+                    self._record_save((time.perf_counter() - start) * 1000, 0, True)
+                future.set_result(self._change_count())
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        with self._save_cond:
+            states = self._collect()
+            if not self._changed_devices(states):
+                future.set_result(self._durable_generation)
+                return future
+            # 等待包含调用时各分片版本的保存（以及调用前删除的设备）
+            target = {
+                device: (shard, shard.version)
+                for device, shard in self._shards.items()
+                if shard.version
+            }
+            deleted = next(_versions)
+            for device in self._saved_versions:
+                target.setdefault(device, (None, deleted))
+            self._waiters.append((target, future))
+            self._save_pending = True
+            if self.save_thread.is_alive():
+                self._flush_requested = True
+                self._save_cond.notify()
+                return future
+        # 保存线程已停止（stop() 之后的写入）：在调用线程中同步保存
+        self._write_generation(*self._take_changes())
+        return future
 
     def get_stats(self) -> dict:
         """Get storage status statistics"""
-        with self.lock:
+        states = self._collect()
+        # journal 模式下变更已写入日志，不存在待保存的设备
+        dirty = [] if self._journal is not None else list(self._changed_devices(states))
+        with self._save_cond:
+            metrics = dict(self.save_metrics)
+            if self._journal is not None:
+                metrics["bytes_written"] += self._journal.bytes_written
+            metrics["avg_latency_ms"] = (
+                metrics["total_latency_ms"] / metrics["saves"] if metrics["saves"] else 0.0
+            )
             return {
-                "total_devices": len(self.data),
-                "dirty_devices": len(self.dirty_devices),
-                "dirty_device_names": list(self.dirty_devices),
-                "queue_size": int(self.save_queue.qsize()),
+                "persistence": self.persistence,
+                "journal_bytes": self._journal.size if self._journal else 0,
+                "total_devices": len(states),
+                "dirty_devices": len(dirty),
+                "dirty_device_names": dirty,
+                "pending_force_saves": len(self._waiters),
+                "generation": self._change_count(),
+                "durable_generation": self._durable_generation,
                 "last_save_time": float(self.last_save_time),
                 "worker_thread_alive": bool(self.save_thread.is_alive()),
                 "stop_event_set": bool(self._stop_event.is_set()),
+                "save_metrics": metrics,
+                "history_series": len(self._history.series),
+                "history_bytes": self._history.nbytes(),
             }
 
     def diagnose_blocking(self) -> list:
@@ -382,8 +1042,10 @@ class DataStore:
         stats = self.get_stats()
         issues = []
 
-        if int(stats["queue_size"]) > 40:
-            issues.append(f"Queue nearly full: {stats['queue_size']}/50")
+        if stats["pending_force_saves"] > 0 and not stats["worker_thread_alive"]:
+            issues.append(
+                f"{stats['pending_force_saves']} force_save requests waiting on a stopped worker"
+            )
 
         if not stats["worker_thread_alive"]:
             issues.append("Worker thread is not alive")
@@ -391,8 +1053,8 @@ class DataStore:
         if stats["stop_event_set"]:
             issues.append("Stop event is set")
 
-        if len(stats["dirty_devices"]) > 20:
-            issues.append(f"Too many dirty devices: {len(stats['dirty_devices'])}")
+        if stats["dirty_devices"] > 20:
+            issues.append(f"Too many dirty devices: {stats['dirty_devices']}")
 
         current_time = time.time()
         if current_time - stats["last_save_time"] > 30:
@@ -419,6 +1081,9 @@ class DataStore:
         """
         List all available sessions within specified days
 
+        Sessions saved by the sqlite backend are listed from the database index;
+        their filepath is the database file.
+
         Args:
             data_dir: Directory containing session data files
             days: Number of days to look back (default: 7)
@@ -435,19 +1100,28 @@ class DataStore:
         current_time = time.time()
         cutoff_time = current_time - (days * 24 * 3600)
 
-        files = list(data_path.glob("session_*.json"))
-
         sessions = []
-        for filepath in files:
-            try:
-                file_time = os.path.getmtime(filepath)
-                if file_time >= cutoff_time:
-                    # Extract session ID from filename
-                    filename = os.path.basename(filepath)
-                    session_id = filename.replace("session_", "").replace(".json", "")
-                    sessions.append((session_id, filepath, file_time))
-            except Exception as e:
-                logger.log_session_error(f"Error reading session file {filepath}: {e}")
+        seen = set()
+        backend = None
+        try:
+            backend = SQLiteBackend.open_existing(data_dir)
+            if backend is not None:
+                for session_id, updated in backend.list_sessions(since=cutoff_time):
+                    sessions.append((session_id, Path(backend.path), updated))
+                    seen.add(session_id)
+        except Exception as e:
+            logger.log_session_error(f"Error reading session database: {e}")
+        finally:
+            if backend is not None:
+                backend.close()
+
+        # 文件型会话来自目录索引（catalog.json），不再 glob/stat 整个目录
+        try:
+            for session_id, entry in SessionCatalog(data_dir).sessions(since=cutoff_time):
+                if session_id not in seen:
+                    sessions.append((session_id, Path(entry["path"]), entry["last_ts"]))
+        except Exception as e:
+            logger.log_session_error(f"Error reading session catalog: {e}")
 
         # Sort by modified time (newest first)
         sessions.sort(key=lambda x: x[2], reverse=True)
@@ -460,7 +1134,8 @@ class DataStore:
 
         Args:
             session_id: Session ID to load (optional)
-            filepath: Direct file path (optional, takes precedence over session_id)
+            filepath: Direct file path (optional, takes precedence over session_id).
+                When it points to the sqlite database, session_id selects the session.
             data_dir: Directory containing session data files
 
         Returns:
@@ -469,15 +1144,35 @@ class DataStore:
         try:
             from pathlib import Path
 
+            if filepath and Path(filepath).name == DB_FILENAME:
+                if not session_id:
+                    return {}
+                backend = SQLiteBackend(str(filepath))
+                try:
+                    return backend.load_session(session_id)
+                finally:
+                    backend.close()
+
             if filepath:
                 target_file = Path(filepath)
             elif session_id:
                 target_file = Path(data_dir) / f"session_{session_id}.json"
+                backend = SQLiteBackend.open_existing(data_dir)
+                if backend is not None:
+                    try:
+                        if backend.has_session(session_id):
+                            return backend.load_session(session_id)
+                    finally:
+                        backend.close()
             else:
                 return {}
 
+            data = {}
             if target_file.exists():
-                return json.loads(target_file.read_text())
+                data = load_file(target_file)
+            # journal 模式下尚未压缩（运行中或异常退出）的变更
+            replay_session_journals(str(target_file), data)
+            return data
         except Exception as e:
             logger.log_session_error(f"Error loading session data: {e}")
 
@@ -490,6 +1185,10 @@ class DataStore:
         """
         Query a variable across all recent sessions
 
+        Sessions in the sqlite database are answered by one indexed query;
+        only file-based sessions whose catalog entry lists the variable are
+        opened and parsed.
+
         Args:
             device_name: Device name to query
             variable: Variable name to query
@@ -499,15 +1198,36 @@ class DataStore:
         Returns:
             List of tuples: (session_id, value, timestamp)
         """
-        sessions = DataStore.list_sessions(data_dir, days)
+        from pathlib import Path
+
+        cutoff_time = time.time() - (days * 24 * 3600)
         results = []
+        seen = set()
 
-        for session_id, filepath, file_time in sessions:
-            data = DataStore.load_session_data(filepath=filepath)
+        backend = None
+        try:
+            backend = SQLiteBackend.open_existing(data_dir)
+            if backend is not None:
+                seen = {session_id for session_id, _ in backend.list_sessions()}
+                results.extend(
+                    backend.query(device_name, variable, since=cutoff_time)
+                )
+        except Exception as e:
+            logger.log_session_error(f"Error querying session database: {e}")
+        finally:
+            if backend is not None:
+                backend.close()
+
+        for session_id, entry in SessionCatalog(data_dir).sessions(since=cutoff_time):
+            # 目录中记录了每个会话的变量名集合，不包含该变量的会话无需打开
+            if session_id in seen or variable not in entry["keys"].get(device_name, ()):
+                continue
+            data = DataStore.load_session_data(filepath=entry["path"])
             if device_name in data and variable in data[device_name]:
                 value = data[device_name][variable]
-                results.append((session_id, value, file_time))
+                results.append((session_id, value, entry["last_ts"]))
 
+        results.sort(key=lambda x: x[2], reverse=True)
         return results
 
     def stop(self):
@@ -516,12 +1236,18 @@ class DataStore:
 
         # Force save any pending data with timeout
         try:
-            self.force_save()
+            self.force_save().result(timeout=10.0)
+        except FutureTimeoutError:
+            logger.log_session_warning(
+                "Warning: final save did not complete within 10 seconds"
+            )
         except Exception as e:
             logger.log_session_error(f"Error during final save: {e}")
 
         # Stop worker thread
-        self._stop_event.set()
+        with self._save_cond:
+            self._stop_event.set()
+            self._save_cond.notify_all()
 
         # Wait for worker thread to finish with timeout
         if self.save_thread.is_alive():
@@ -532,3 +1258,74 @@ class DataStore:
                 )
             else:
                 logger.log_session_info("Save worker thread stopped successfully")
+
+        if self._journal is not None:
+            # 最后一次压缩：会话结束时只保留可读的快照文件
+            with self.lock:
+                journal, self._journal = self._journal, None
+                snapshot = {device: state[1] for device, state in self._collect().items()}
+            if self._write_snapshot(snapshot):
+                journal.close(remove=True)
+            else:
+                journal.close()
+
+        self.save_history()
+
+        if self.persist and os.path.exists(self.filename):
+            self._update_catalog(force=True)
+
+        if self._cleanup_thread is not None and self._cleanup_thread.is_alive():
+            self._cleanup_thread.join(timeout=5.0)
+
+        if self._backend is not None:
+            self._backend.close()
+            self._backend = None
+
+
+class LazyDataStore:
+    """Session-level DataStore shared by several executors, created on first use
+
+    Folder and watch modes run many dictionary files in one session; they all
+    share this store instead of each executor starting its own save thread,
+    cleanup scan and session file. Attribute access is forwarded to the real
+    DataStore, which is built from ``config`` (a ConfigForDataStore section)
+    the first time it is needed.
+    """
+
+    def __init__(self, config=None, **kwargs):
+        self._config = config
+        self._kwargs = kwargs
+        self._store = None
+        self._build_lock = threading.Lock()
+
+    @property
+    def started(self):
+        """Whether the underlying DataStore has been created"""
+        return self._store is not None
+
+    def get(self) -> DataStore:
+        store = self._store
+        if store is None:
+            with self._build_lock:
+                if self._store is None:
+                    self._store = DataStore.from_config(self._config, **self._kwargs)
+                store = self._store
+        return store
+
+    def __getattr__(self, name):
+        # 仅在正常属性查找失败时调用，即所有 DataStore 的属性和方法
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return getattr(self.get(), name)
+
+    def force_save(self):
+        if self._store is None:
+            future = Future()
+            future.set_result(0)
+            return future
+        return self._store.force_save()
+
+    def stop(self):
+        """Stop the underlying DataStore; nothing to do if it was never created"""
+        if self._store is not None:
+            self._store.stop()
@@ -0,0 +1,185 @@
+"""
+DataStore 的 SQLite 后端
+
+所有会话共享数据目录下的一个数据库文件（``data_store.sqlite3``，WAL 模式）：
+
+    sessions(session_id, created, updated)
+    variables(session_id, device, variable, value, ts)
+
+``variables`` 以 (session_id, device, variable) 为主键，并在 (device, variable, ts)
+上建立索引，跨会话查询某个变量、按时间窗口列出会话都只需要一次索引查询，
+不必再逐个打开并解析会话 JSON 文件。变量值以 JSON 文本保存，读取时还原类型。
+
+原有的 ``session_<id>.json`` 文件布局仍可通过 ``datastore_manager export --layout files``
+导出，旧的会话文件可通过 ``datastore_manager import`` 导入数据库。
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+DB_FILENAME = "data_store.sqlite3"
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS sessions (
+        session_id TEXT PRIMARY KEY,
+        created REAL NOT NULL,
+        updated REAL NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS variables (
+        session_id TEXT NOT NULL,
+        device TEXT NOT NULL,
+        variable TEXT NOT NULL,
+        value TEXT,
+        ts REAL NOT NULL,
+        PRIMARY KEY (session_id, device, variable)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_variables_lookup ON variables (device, variable, ts)",
+    "CREATE INDEX IF NOT EXISTS idx_sessions_updated ON sessions (updated)",
+)
+
+
+def db_path_for(data_dir: str) -> str:
+    return os.path.join(str(data_dir), DB_FILENAME)
+
+
+class SQLiteBackend:
+    """会话变量的 SQLite 存储（线程安全，单连接 + 锁）"""
+
+    def __init__(self, path: str):
+        self.path = str(path)
+        parent = os.path.dirname(self.path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            for statement in _SCHEMA:
+                self._conn.execute(statement)
+
+    @classmethod
+    def open_existing(cls, data_dir: str) -> Optional["SQLiteBackend"]:
+        """数据目录下已有数据库时打开它（只读路径不应创建新数据库）"""
+        path = db_path_for(data_dir)
+        if not os.path.exists(path):
+            return None
+        return cls(path)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def save_devices(
+        self, session_id: str, devices: Dict[str, Optional[dict]], ts: Optional[float] = None
+    ) -> int:
+        """用内存中的设备数据替换数据库中对应设备的变量，值为 None 表示设备已被删除
+
+        返回写入的变量值字节数（用于保存指标）
+        """
+        ts = time.time() if ts is None else ts
+        written = 0
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO sessions (session_id, created, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET updated = excluded.updated",
+                (session_id, ts, ts),
+            )
+            for device, variables in devices.items():
+                self._conn.execute(
+                    "DELETE FROM variables WHERE session_id = ? AND device = ?",
+                    (session_id, device),
+                )
+                if not variables:
+                    continue
+                rows = [
+                    (
+                        session_id,
+                        device,
+                        variable,
+                        json.dumps(value, ensure_ascii=False),
+                        ts,
+                    )
+                    for variable, value in variables.items()
+                ]
+                written += sum(len(row[3]) for row in rows)
+                self._conn.executemany(
+                    "INSERT INTO variables (session_id, device, variable, value, ts) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+        return written
+
+    def load_session(self, session_id: str) -> Dict[str, dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT device, variable, value FROM variables WHERE session_id = ?",
+                (session_id,),
+            ).fetchall()
+        data: Dict[str, dict] = {}
+        for device, variable, value in rows:
+            data.setdefault(device, {})[variable] = json.loads(value)
+        return data
+
+    def has_session(self, session_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return row is not None
+
+    def list_sessions(
+        self, since: Optional[float] = None, until: Optional[float] = None
+    ) -> List[Tuple[str, float]]:
+        """按最后更新时间列出会话（最新的在前）"""
+        query = "SELECT session_id, updated FROM sessions WHERE 1 = 1"
+        params: list = []
+        if since is not None:
+            query += " AND updated >= ?"
+            params.append(since)
+        if until is not None:
+            query += " AND updated < ?"
+            params.append(until)
+        query += " ORDER BY updated DESC"
+        with self._lock:
+            return [tuple(row) for row in self._conn.execute(query, params).fetchall()]
+
+    def query(
+        self, device: str, variable: str, since: Optional[float] = None
+    ) -> List[Tuple[str, object, float]]:
+        """跨会话查询变量（走 (device, variable, ts) 索引），最新的在前"""
+        query = (
+            "SELECT session_id, value, ts FROM variables "
+            "WHERE device = ? AND variable = ?"
+        )
+        params: list = [device, variable]
+        if since is not None:
+            query += " AND ts >= ?"
+            params.append(since)
+        query += " ORDER BY ts DESC"
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [(session_id, json.loads(value), ts) for session_id, value, ts in rows]
+
+    def delete_sessions(self, session_ids: List[str]) -> int:
+        with self._lock, self._conn:
+            for session_id in session_ids:
+                self._conn.execute(
+                    "DELETE FROM variables WHERE session_id = ?", (session_id,)
+                )
+                self._conn.execute(
+                    "DELETE FROM sessions WHERE session_id = ?", (session_id,)
+                )
+        return len(session_ids)
+
+    def delete_sessions_before(self, cutoff: float) -> int:
+        stale = [session_id for session_id, _ in self.list_sessions(until=cutoff)]
+        return self.delete_sessions(stale)
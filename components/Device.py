@@ -1,6 +1,5 @@
 from typing import List, Optional, Union
 import time
-import sys
 import threading
 import serial
 import re
@@ -8,6 +7,7 @@ import os
 from collections import deque
 from utils.common import CommonUtils
 from components.Logger import get_logger, AutoComLogger
+from components.DeviceLog import ROTATION_OPTIONS, RotatingDeviceLog
 
 logger: AutoComLogger = get_logger("AutoCom")
 
@@ -67,6 +67,11 @@ class Device:
         self.log_file = None
 
         self.response_buffer = deque()  # Buffer for command responses
+        # Serial traffic counters (exported by the metrics endpoint)
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        # CancellationToken set by the executor; when cancelled, send_command stops waiting immediately
+        self.cancel_token = None
         self.last_iteration_success = None  # Track result of last iteration
         # Try to open the serial port and handle common failures (e.g. permission, not found)
         try:
@@ -122,6 +127,7 @@ class Device:
                         if self.ser.is_open and self.ser.in_waiting > 0:
                             chunk = self.ser.read(min(self.ser.in_waiting, 512))
                             buffer.extend(chunk)
+                            self.bytes_received += len(chunk)
 
                 # Process complete lines
                 while b"\n" in buffer:
@@ -253,6 +259,8 @@ class Device:
                 - elapsed_time: float, time taken to get response
         """
         start_time = time.time()
+        cancel_token = getattr(self, "cancel_token", None)
+        port_failed = False
 
         # If the serial port failed to open at init, return a controlled failure
         if getattr(self, "open_failed", False) or not (
@@ -268,6 +276,15 @@ class Device:
                 "elapsed_time": 0.0,
             }
 
+        if cancel_token is not None and cancel_token.cancelled:
+            self.write_to_log(f"({self._get_timestamp()})-x-> {command} <CANCELLED>")
+            return {
+                "success": False,
+                "response": "",
+                "matched": [],
+                "elapsed_time": 0.0,
+            }
+
         try:
             # Step 1. Pause continuous logging thread and clear buffer
             self.logging_active.clear()
@@ -289,6 +306,7 @@ class Device:
                         command_bytes = command.encode("utf-8") + self.line_ending_bytes
 
                     self.ser.write(command_bytes)
+                    self.bytes_sent += len(command_bytes)
                     self.ser.flush()
 
                     timestamp = self._get_timestamp()
@@ -311,12 +329,16 @@ class Device:
             check_interval = 0.01  # 10ms check interval
 
             while (time.time() - start_time) < max_timeout:
+                if cancel_token is not None and cancel_token.cancelled:
+                    self.write_to_log(f"({self._get_timestamp()})<CANCELLED>")
+                    break
                 try:
                     # Read from serial port directly (since logging thread is paused)
                     with self.lock:
                         if self.ser.in_waiting > 0:
                             chunk = self.ser.read(min(self.ser.in_waiting, 512))
                             buffer.extend(chunk)
+                            self.bytes_received += len(chunk)
 
                     # Process complete lines from buffer
                     while b"\n" in buffer:
@@ -349,6 +371,7 @@ class Device:
                                                     min(self.ser.in_waiting, 512)
                                                 )
                                                 buffer.extend(chunk)
+                                                self.bytes_received += len(chunk)
                                         break
 
                     # Handle data in buffer without newline: wait for timeout to confirm it's the last data
@@ -364,9 +387,12 @@ class Device:
                                 if self.ser.in_waiting > 0:
                                     chunk = self.ser.read(min(self.ser.in_waiting, 512))
                                     buffer.extend(chunk)
+                                    self.bytes_received += len(chunk)
                                     data_received_during_wait = True
                                     break  # Exit wait loop and process new data
 
+                            if cancel_token is not None and cancel_token.cancelled:
+                                break
                             time.sleep(0.01)  # Check every 10ms
 
                         # If timeout occurred with no new data, this is the last incomplete line
@@ -380,29 +406,27 @@ class Device:
                     ):
                         break
 
-                    time.sleep(check_interval)
+                    if cancel_token is not None:
+                        cancel_token.wait(check_interval)
+                    else:
+                        time.sleep(check_interval)
 
                 except serial.SerialException as e:
                     logger.log_step_error(
                         f"Serial error on device '{self.name}' (port: {self.port}): {e}"
                     )
-                    # Attempt to reopen the port 3 times
-                    for attempt in range(3):
-                        try:
-                            if not self.ser.is_open:
-                                self.ser.open()
-                            break  # Successfully reopened
-                        except Exception as reopen_exception:
-                            logger.log_step_error(
-                                f"Failed to reopen serial port '{self.port}' on attempt {attempt + 1}: {reopen_exception}"
-                            )
-                            time.sleep(5)  # Wait before retrying
-                    sys.exit(1)
+                    # Attempt to reopen the port 3 times; give up on this command
+                    # instead of exiting, so the executor can shut down cleanly
+                    if self._reopen_port(cancel_token):
+                        continue
+                    port_failed = True
+                    break
                 except Exception as e:
                     logger.log_step_error(
                         f"Unexpected error on device '{self.name}' (port: {self.port}): {e}"
                     )
-                    sys.exit(1)
+                    port_failed = True
+                    break
 
             # Step 5. Process any remaining data in buffer
             while b"\n" in buffer:
@@ -426,7 +450,9 @@ class Device:
             response_text = "\n".join(raw_response) if raw_response else ""
 
             # Determine success
-            if expected_responses:
+            if port_failed:
+                success = False
+            elif expected_responses:
                 success = next_expected_idx >= len(expected_responses)
             else:
                 success = bool(raw_response)  # Success if we got any response
@@ -447,6 +473,25 @@ class Device:
             # Resume continuous logging thread
             self.logging_active.set()
 
+    def _reopen_port(self, cancel_token=None, attempts=3, interval=5):
+        """Try to reopen the serial port, returns True when the port is open again"""
+        for attempt in range(attempts):
+            try:
+                if not self.ser.is_open:
+                    self.ser.open()
+                return True
+            except Exception as reopen_exception:
+                logger.log_step_error(
+                    f"Failed to reopen serial port '{self.port}' on attempt {attempt + 1}: {reopen_exception}"
+                )
+            # Wait before retrying, unless the command has been cancelled
+            if cancel_token is not None:
+                if cancel_token.wait(interval):
+                    return False
+            else:
+                time.sleep(interval)
+        return False
+
     def _write_immediate_log(self, message):
         """Write log immediately (bypasses the logging thread)"""
         if self.log_file:
@@ -476,6 +521,11 @@ class Device:
         """
         separator = "=" * 80
 
+        # Segmented log: rotate by iteration count and index the segment of each iteration
+        begin_iteration = getattr(self.log_file, "begin_iteration", None)
+        if begin_iteration is not None:
+            begin_iteration(iteration_num)
+
         # Write separator
         self.write_to_log(separator)
 
@@ -606,8 +656,15 @@ class Device:
 
         return safe_name
 
-    def setup_logging(self, log_dir):
-        """Setup logging for this device with safe filename."""
+    def setup_logging(self, log_dir, rotation=None):
+        """Setup logging for this device with safe filename.
+
+        Args:
+            log_dir: Directory of the device log
+            rotation: ConfigForDeviceLogs options (max_bytes, max_age,
+                iterations_per_segment, compress, max_segments); when any rotation
+                trigger is set the log is a RotatingDeviceLog, see DeviceLog
+        """
         from pathlib import Path
 
         log_path_obj = Path(log_dir)
@@ -617,5 +674,15 @@ class Device:
         log_filename = f"{self.name}_{safe_port_name}.log"
         log_path = log_path_obj / log_filename
 
-        self.log_file = open(log_path, "w", encoding="utf-8")
+        if rotation and any(rotation.get(key) for key in ROTATION_OPTIONS):
+            self.log_file = RotatingDeviceLog(
+                log_path,
+                max_bytes=int(rotation.get("max_bytes", 0)),
+                max_age=float(rotation.get("max_age", 0.0)),
+                iterations_per_segment=int(rotation.get("iterations_per_segment", 0)),
+                compress=bool(rotation.get("compress", False)),
+                max_segments=int(rotation.get("max_segments", 0)),
+            )
+        else:
+            self.log_file = open(log_path, "w", encoding="utf-8")
         return str(log_path)
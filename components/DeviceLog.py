@@ -0,0 +1,255 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+设备日志分段轮转 for AutoCom
+
+长时间（无限循环）运行时设备日志 ``{name}_{port}.log`` 会无限增长。RotatingDeviceLog
+是可替代普通文件对象的设备日志（write/flush/close/closed），按以下任一条件切换到新段：
+
+- max_bytes: 当前段超过该大小（按写入字符数估算）
+- max_age: 当前段打开超过该时长（秒）
+- iterations_per_segment: 当前段已包含该数量的迭代
+
+当前段始终是 ``{name}_{port}.log``，关闭的段重命名为 ``{name}_{port}.log.<序号>``
+（序号递增，1 最旧），开启 compress 后由后台线程流式压缩为 ``.gz``，读取线程只做
+重命名。``{name}_{port}.log.index.json`` 记录每段的迭代范围、时间和大小，
+segment_for_iteration() 据此找到某次迭代所在的段。
+"""
+
+import atexit
+import gzip
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+from typing import Optional
+
+INDEX_SUFFIX = ".index.json"
+
+ROTATION_OPTIONS = ("max_bytes", "max_age", "iterations_per_segment")
+
+
+class _SegmentCompressor:
+    """所有设备共用的后台压缩线程"""
+
+    def __init__(self):
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, log: "RotatingDeviceLog", entry: dict, src: str) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="DeviceLogCompressor", daemon=True
+                )
+                self._thread.start()
+                atexit.register(self.join)
+        self._queue.put((log, entry, src))
+
+    def _run(self) -> None:
+        while True:
+            log, entry, src = self._queue.get()
+            try:
+                gz_path = f"{src}.gz"
+                tmp_path = f"{gz_path}.tmp"
+                with open(src, "rb") as fin, gzip.open(tmp_path, "wb") as fout:
+                    shutil.copyfileobj(fin, fout, 1024 * 1024)
+                os.replace(tmp_path, gz_path)
+                try:
+                    os.remove(src)
+                except FileNotFoundError:
+                    # 压缩期间该段被保留策略删除，_segment_compressed 会删除 .gz
+                    pass
+                log._segment_compressed(entry, gz_path)
+            except FileNotFoundError:
+                # 段在压缩前已被保留策略删除
+                pass
+            except Exception:
+                # 压缩失败时保留未压缩的段
+                pass
+            finally:
+                self._queue.task_done()
+
+    def join(self, timeout: float = 30.0) -> bool:
+        """等待已提交的压缩完成（进程退出时经 atexit 调用）"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+
+_compressor = _SegmentCompressor()
+
+
+def wait_for_compression(timeout: float = 30.0) -> bool:
+    """等待所有设备日志的后台压缩完成"""
+    return _compressor.join(timeout)
+
+
+class RotatingDeviceLog:
+    """按大小/时间/迭代数分段的设备日志文件"""
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 0,
+        max_age: float = 0.0,
+        iterations_per_segment: int = 0,
+        compress: bool = False,
+        max_segments: int = 0,
+    ):
+        """
+        Args:
+            path: 当前段的路径
+            max_bytes: 段的最大大小（0 表示不按大小轮转）
+            max_age: 段的最长时长，秒（0 表示不按时间轮转）
+            iterations_per_segment: 每段包含的迭代数（0 表示不按迭代轮转）
+            compress: 是否在后台把关闭的段压缩为 gzip
+            max_segments: 保留的已关闭段数量，超出时删除最旧的（0 表示全部保留）
+        """
+        self.path = str(path)
+        self.index_path = self.path + INDEX_SUFFIX
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.iterations_per_segment = iterations_per_segment
+        self.compress = compress
+        self.max_segments = max_segments
+        self._lock = threading.Lock()
+        self._segments = []  # 已关闭的段
+        self._seq = 0
+        self._iteration = None  # 正在进行的迭代
+        self._file = None
+        self._open_segment()
+
+    @property
+    def closed(self) -> bool:
+        return self._file is None
+
+    def _open_segment(self) -> None:
+        self._file = open(self.path, "w", encoding="utf-8")
+        self._bytes = 0
+        self._opened = time.monotonic()
+        self._iterations = 0
+        self._current = {
+            "file": os.path.basename(self.path),
+            "first_iteration": None,
+            "last_iteration": None,
+            "start": time.time(),
+            "end": None,
+            "bytes": 0,
+        }
+
+    def _close_segment(self) -> None:
+        self._file.close()
+        self._file = None
+        self._current["end"] = time.time()
+        self._current["bytes"] = self._bytes
+
+    def _rotate(self) -> None:
+        self._close_segment()
+        self._seq += 1
+        closed_path = f"{self.path}.{self._seq}"
+        os.replace(self.path, closed_path)
+        entry = self._current
+        entry["file"] = os.path.basename(closed_path)
+        self._segments.append(entry)
+
+        while self.max_segments and len(self._segments) > self.max_segments:
+            oldest = self._segments.pop(0)
+            try:
+                os.remove(os.path.join(os.path.dirname(self.path), oldest["file"]))
+            except OSError:
+                pass
+
+        self._open_segment()
+        if self._iteration is not None:
+            # 按大小/时间轮转时迭代跨段：新段从同一迭代开始
+            self._current["first_iteration"] = self._current["last_iteration"] = self._iteration
+        self._write_index()
+        if self.compress:
+            _compressor.submit(self, entry, closed_path)
+
+    def _segment_compressed(self, entry: dict, gz_path: str) -> None:
+        with self._lock:
+            if any(e is entry for e in self._segments):
+                entry["file"] = os.path.basename(gz_path)
+                self._write_index()
+                return
+        # 压缩期间该段已被保留策略删除
+        try:
+            os.remove(gz_path)
+        except OSError:
+            pass
+
+    def _write_index(self) -> None:
+        segments = list(self._segments)
+        if self._file is not None:
+            segments.append(dict(self._current, bytes=self._bytes))
+        tmp_path = self.index_path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"segments": segments}, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.index_path)
+        except OSError:
+            pass
+
+    def write(self, text: str) -> int:
+        with self._lock:
+            if self._file is None:
+                raise ValueError("I/O operation on closed device log")
+            if self._bytes and (
+                (self.max_bytes and self._bytes + len(text) > self.max_bytes)
+                or (self.max_age and time.monotonic() - self._opened >= self.max_age)
+            ):
+                self._rotate()
+            self._bytes += len(text)
+            return self._file.write(text)
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def begin_iteration(self, iteration: int) -> None:
+        """记录新迭代开始，必要时先切换到新段，使该迭代从新段开头写起"""
+        with self._lock:
+            if self._file is None:
+                return
+            if (
+                self.iterations_per_segment
+                and self._iterations >= self.iterations_per_segment
+            ):
+                self._iteration = None
+                self._rotate()
+            self._iteration = iteration
+            if self._current["first_iteration"] is None:
+                self._current["first_iteration"] = iteration
+            self._current["last_iteration"] = iteration
+            self._iterations += 1
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is None:
+                return
+            self._close_segment()
+            self._segments.append(self._current)
+            self._write_index()
+
+
+def segment_for_iteration(log_path: str, iteration: int) -> Optional[str]:
+    """根据索引返回包含指定迭代的段文件路径（可能是 .gz），找不到时返回 None"""
+    try:
+        with open(str(log_path) + INDEX_SUFFIX, encoding="utf-8") as f:
+            segments = json.load(f)["segments"]
+    except (OSError, ValueError, KeyError):
+        return None
+    for entry in segments:
+        first, last = entry.get("first_iteration"), entry.get("last_iteration")
+        if first is not None and first <= iteration <= last:
+            return os.path.join(os.path.dirname(str(log_path)), entry["file"])
+    return None
@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+结构化执行事件流 for AutoCom
+
+每个事件写成一行紧凑 JSON（JSONL），包含事件类型、时间戳以及设备、命令、
+迭代、响应、匹配结果、耗时、动作结果等字段，分析任务可逐行流式读取，
+不必再从表格日志中解析。
+
+- emit() 只在调用线程构造字典并放入缓冲区，序列化与写文件由后台线程按批完成
+- 文件超过 max_bytes 时轮转为 events.jsonl.1 … events.jsonl.N
+- 缓冲区超过 max_pending 条时丢弃新事件并计数，写出一条 events_dropped 事件
+- 默认关闭；open_event_stream() 启用后 get_event_stream() 返回全局实例
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, List, Optional
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+DEFAULT_FLUSH_INTERVAL = 1.0
+DEFAULT_MAX_PENDING = 100_000
+
+
+def _encode(event: dict) -> str:
+    return json.dumps(event, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+class EventStream:
+    """缓冲 + 后台写线程的 JSONL 事件文件"""
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        backup_count: int = DEFAULT_BACKUP_COUNT,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        max_pending: int = DEFAULT_MAX_PENDING,
+    ):
+        """
+        Args:
+            path: 事件文件路径（追加写入）
+            max_bytes: 单个文件的最大字节数，超过后轮转（0 表示不轮转）
+            backup_count: 保留的轮转文件个数
+            flush_interval: 后台线程写出缓冲区的最长间隔（秒）
+            max_pending: 缓冲区最多容纳的未写出事件数
+        """
+        self.path = str(path)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.events_written = 0
+        self.dropped = 0
+        self._pending: List[dict] = []
+        self._cond = threading.Condition()
+        self._flush_seq = 0  # flush() 请求序号
+        self._written_seq = 0  # 已写出的最大请求序号
+        self._closed = False
+
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._size = self._file.tell()
+
+        self._thread = threading.Thread(
+            target=self._writer, name="AutoComEventWriter", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.close)
+
+    def emit(self, event: str, **fields: Any) -> None:
+        """记录一个事件（字段值需可 JSON 序列化，否则按 str() 写出）"""
+        record = {"ts": round(time.time(), 6), "event": event}
+        record.update(fields)
+        with self._cond:
+            if self._closed:
+                return
+            if len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                return
+            self._pending.append(record)
+
+    def _rotate(self) -> None:
+        self._file.close()
+        if self.backup_count > 0:
+            for i in range(self.backup_count - 1, 0, -1):
+                src = f"{self.path}.{i}"
+                if os.path.exists(src):
+                    os.replace(src, f"{self.path}.{i + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._size = 0
+
+    def _write_batch(self, batch: List[dict], dropped: int) -> None:
+        if dropped:
+            batch.append(
+                {"ts": round(time.time(), 6), "event": "events_dropped", "count": dropped}
+            )
+        for record in batch:
+            line = _encode(record) + "\n"
+            if self.max_bytes and self._size and self._size + len(line) > self.max_bytes:
+                self._rotate()
+            self._file.write(line)
+            # 按字符数估算大小：轮转阈值不要求精确到字节
+            self._size += len(line)
+        self._file.flush()
+        self.events_written += len(batch)
+
+    def _writer(self) -> None:
+        reported = 0
+        while True:
+            with self._cond:
+                # 攒批：没有 flush 请求时最多每 flush_interval 写一次
+                self._cond.wait_for(
+                    lambda: self._flush_seq > self._written_seq or self._closed,
+                    timeout=self.flush_interval,
+                )
+                batch, self._pending = self._pending, []
+                dropped, reported = self.dropped - reported, self.dropped
+                closed = self._closed
+                seq = self._flush_seq
+            if batch or dropped:
+                try:
+                    self._write_batch(batch, dropped)
+                except Exception:
+                    # 写失败（如磁盘已满）不影响命令执行
+                    pass
+            with self._cond:
+                self._written_seq = seq
+                self._cond.notify_all()
+            if closed:
+                break
+
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """立即写出此前记录的事件"""
+        with self._cond:
+            if self._closed or not self._thread.is_alive():
+                return True
+            self._flush_seq += 1
+            target = self._flush_seq
+            self._cond.notify_all()
+            return self._cond.wait_for(
+                lambda: self._written_seq >= target, timeout=timeout
+            )
+
+    def close(self, timeout: Optional[float] = 10.0) -> None:
+        """写出全部缓冲事件并关闭文件"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        atexit.unregister(self.close)
+        self._thread.join(timeout)
+        self._file.close()
+
+
+_stream: Optional[EventStream] = None
+_stream_lock = threading.Lock()
+
+
+def get_event_stream() -> Optional[EventStream]:
+    """返回当前启用的事件流，未启用时为 None（调用方据此跳过事件构造）"""
+    return _stream
+
+
+def open_event_stream(path: str, **options: Any) -> EventStream:
+    """启用全局事件流（已启用时先关闭旧的）"""
+    global _stream
+    with _stream_lock:
+        if _stream is not None:
+            _stream.close()
+        _stream = EventStream(path, **options)
+        return _stream
+
+
+def close_event_stream() -> None:
+    global _stream
+    with _stream_lock:
+        stream, _stream = _stream, None
+    if stream is not None:
+        stream.close()
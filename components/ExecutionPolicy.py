@@ -0,0 +1,108 @@
+"""
+提前终止策略（Fail-fast / Early-abort）
+
+迭代级（由 CommandExecutor.execute 执行）：
+- 命令设置 ``critical: true`` 时，该命令失败会立即中止本轮迭代，
+  并取消其它设备正在进行的等待；
+- ``skip_failed_device``：某设备的命令失败后，本轮跳过该设备剩余的命令。
+
+会话级（由 SessionGuard 跟踪）：
+- ``max_consecutive_failures``：连续 N 轮迭代失败后停止会话；
+- ``time_budget``：会话总时长预算（秒），到期后取消正在进行的等待并停止。
+
+配置位于执行配置文件的 ConfigForIterations 中：
+
+    ConfigForIterations:
+      skip_failed_device: true
+      max_consecutive_failures: 3
+      time_budget: 3600
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from components.Logger import AutoComLogger, get_logger
+
+logger: AutoComLogger = get_logger("AutoCom")
+
+
+@dataclass
+class ExecutionPolicy:
+    """提前终止策略配置，0 表示不限制"""
+
+    skip_failed_device: bool = False
+    max_consecutive_failures: int = 0
+    time_budget: float = 0.0
+
+    @classmethod
+    def from_config(cls, config: Optional[dict]) -> "ExecutionPolicy":
+        config = config or {}
+        return cls(
+            skip_failed_device=bool(config.get("skip_failed_device", False)),
+            max_consecutive_failures=int(config.get("max_consecutive_failures", 0) or 0),
+            time_budget=float(config.get("time_budget", 0) or 0),
+        )
+
+
+class SessionGuard:
+    """跟踪会话级终止条件
+
+    Args:
+        policy: 终止策略
+        on_expire: 时长预算到期时的回调（通常用于取消正在进行的等待）
+    """
+
+    def __init__(
+        self, policy: ExecutionPolicy, on_expire: Optional[Callable[[], None]] = None
+    ):
+        self.policy = policy
+        self.on_expire = on_expire
+        self.consecutive_failures = 0
+        self.stop_reason: Optional[str] = None
+        self._deadline: Optional[float] = None
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> "SessionGuard":
+        if self.policy.time_budget > 0:
+            self._deadline = time.monotonic() + self.policy.time_budget
+            self._timer = threading.Timer(self.policy.time_budget, self._expire)
+            self._timer.daemon = True
+            self._timer.start()
+        return self
+
+    def cancel(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _expire(self) -> None:
+        self._set_reason(f"time budget of {self.policy.time_budget:g}s exhausted")
+        if self.on_expire is not None:
+            self.on_expire()
+
+    def _set_reason(self, reason: str) -> None:
+        with self._lock:
+            if self.stop_reason is None:
+                self.stop_reason = reason
+                logger.log_session_warning(f"⏹ Stopping session: {reason}")
+
+    def record(self, passed: bool) -> None:
+        """记录一轮迭代结果"""
+        with self._lock:
+            self.consecutive_failures = 0 if passed else self.consecutive_failures + 1
+            limit = self.policy.max_consecutive_failures
+            reached = limit > 0 and self.consecutive_failures >= limit
+        if reached:
+            self._set_reason(f"{self.consecutive_failures} consecutive failed iterations")
+
+    def should_stop(self) -> bool:
+        if (
+            self.stop_reason is None
+            and self._deadline is not None
+            and time.monotonic() >= self._deadline
+        ):
+            self._expire()
+        return self.stop_reason is not None
@@ -0,0 +1,375 @@
+"""
+Fleet 模式：同一份执行配置文件并发驱动 N 台相同的设备
+
+在 Devices 中声明设备模板，模板会被展开为多个实例：
+
+    Devices:
+      - name: DUT
+        port: /dev/ttyUSB*          # 端口通配符（按名称排序）
+        baud_rate: 115200
+      # 或者显式列出端口
+      - name: DUT
+        ports: [COM3, COM4, COM5]
+
+展开后得到 DUT[0]、DUT[1]...。存在多个模板时按下标配对为"工位单元"
+（第 i 个单元包含每个模板的第 i 个实例），因此各模板的实例数必须相同。
+
+每个单元拥有独立的 CommandExecutor 与串口，在线程池中独立执行完整的
+迭代计划；所有单元共享同一个会话 DataStore，变量按实例名分命名空间
+（例如 save 到 DUT 的变量会落在 DUT[3] 下）。执行结束后输出按单元
+聚合的通过率与命令耗时统计。
+"""
+
+import copy
+import glob
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from components.CommandMetrics import CommandMetrics, LatencyHistogram
+from components.DataStore import DataStore
+from components.ExecutionPolicy import SessionGuard
+from components.Logger import AutoComLogger, get_logger
+from components.MetricsServer import get_metrics_server
+from utils.cancellation import CancellationToken
+
+logger: AutoComLogger = get_logger("AutoCom")
+
+_GLOB_CHARS = ("*", "?", "[")
+
+
+def is_device_template(device: dict) -> bool:
+    """判断 Devices 中的条目是否为 Fleet 模板"""
+    if "ports" in device:
+        return True
+    port = device.get("port")
+    return isinstance(port, str) and any(ch in port for ch in _GLOB_CHARS)
+
+
+def expand_device_template(device: dict) -> List[dict]:
+    """把设备模板展开为实例列表，实例名为 ``name[i]``"""
+    if "ports" in device:
+        ports = list(device["ports"])
+    else:
+        ports = sorted(glob.glob(device["port"]))
+
+    limit = device.get("count")
+    if limit is not None:
+        ports = ports[: int(limit)]
+
+    instances = []
+    for index, port in enumerate(ports):
+        instance = {k: v for k, v in device.items() if k not in ("ports", "count")}
+        instance["name"] = f"{device['name']}[{index}]"
+        instance["port"] = port
+        instances.append(instance)
+    return instances
+
+
+def _rebind_devices(obj, mapping: Dict[str, str]):
+    """把命令（包括 actions 配置）中 device 字段引用的模板名替换为实例名"""
+    if isinstance(obj, dict):
+        result = {}
+        for key, value in obj.items():
+            if key == "device" and isinstance(value, str) and value in mapping:
+                result[key] = mapping[value]
+            else:
+                result[key] = _rebind_devices(value, mapping)
+        return result
+    if isinstance(obj, list):
+        return [_rebind_devices(item, mapping) for item in obj]
+    return obj
+
+
+def has_device_templates(dict_data: dict) -> bool:
+    return any(
+        is_device_template(d)
+        for d in dict_data.get("Devices", [])
+        if d.get("status", "enabled") == "enabled"
+    )
+
+
+def expand_fleet(dict_data: dict) -> Tuple[List[dict], Dict[str, List[str]]]:
+    """把含模板的执行配置文件展开为每个工位单元的独立执行配置
+
+    Returns:
+        (units, instances): units 为每个单元的执行配置字典；
+        instances 为 模板名 -> 实例名列表
+    """
+    enabled = [
+        d for d in dict_data.get("Devices", []) if d.get("status", "enabled") == "enabled"
+    ]
+    templates = [d for d in enabled if is_device_template(d)]
+    if not templates:
+        return [], {}
+
+    fixed = [d["name"] for d in enabled if not is_device_template(d)]
+    if fixed:
+        raise ValueError(
+            f"Fleet mode does not support mixing templates with fixed devices: {', '.join(fixed)}"
+        )
+
+    expanded = {t["name"]: expand_device_template(t) for t in templates}
+    counts = {name: len(items) for name, items in expanded.items()}
+    if len(set(counts.values())) != 1:
+        raise ValueError(f"Device templates expand to different sizes: {counts}")
+    size = next(iter(counts.values()))
+    if size == 0:
+        raise ValueError(
+            f"Device templates matched no ports: {', '.join(expanded)}"
+        )
+
+    units = []
+    for index in range(size):
+        mapping = {name: items[index]["name"] for name, items in expanded.items()}
+        unit = {
+            key: copy.deepcopy(value)
+            for key, value in dict_data.items()
+            if key not in ("Devices", "Commands")
+        }
+        unit["Devices"] = [items[index] for items in expanded.values()]
+        unit["Commands"] = _rebind_devices(dict_data.get("Commands", []), mapping)
+        units.append(unit)
+
+    instances = {name: [i["name"] for i in items] for name, items in expanded.items()}
+    return units, instances
+
+
+def _latency_summary(histogram: LatencyHistogram) -> dict:
+    return {
+        "mean": histogram.total_us / histogram.count / 1000.0 if histogram.count else 0.0,
+        "p50": histogram.percentile(50),
+        "p95": histogram.percentile(95),
+        "max": histogram.max_us / 1000.0,
+    }
+
+
+@dataclass
+class FleetUnitStats:
+    """单个工位单元的执行统计"""
+
+    name: str
+    iterations: int = 0
+    failed_iterations: int = 0
+    commands: int = 0
+    failed_commands: int = 0
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    error: Optional[str] = None
+    stop_reason: Optional[str] = None
+
+    def record_command(self, device_name, cmd_str, passed, elapsed_ms) -> None:
+        self.commands += 1
+        if not passed:
+            self.failed_commands += 1
+        self.latency.record(elapsed_ms, passed)
+
+    def summary(self) -> dict:
+        return {
+            "unit": self.name,
+            "iterations": self.iterations,
+            "failed_iterations": self.failed_iterations,
+            "commands": self.commands,
+            "failed_commands": self.failed_commands,
+            "pass_rate": (
+                (self.iterations - self.failed_iterations) / self.iterations
+                if self.iterations
+                else 0.0
+            ),
+            "latency_ms": _latency_summary(self.latency),
+            "error": self.error,
+            "stop_reason": self.stop_reason,
+        }
+
+
+class FleetRunner:
+    """并发驱动多个工位单元执行同一份计划"""
+
+    def __init__(self, dict_data: dict, session_id: Optional[str] = None):
+        self.dict_data = dict_data
+        self.session_id = session_id
+        self.units, self.instances = expand_fleet(dict_data)
+        self.data_store: Optional[DataStore] = None
+        self.stats: List[FleetUnitStats] = []
+        # 所有单元共用的 (设备, 命令) 延迟直方图，设备名按实例区分
+        self.command_metrics = CommandMetrics()
+        self._executors: Dict[int, Any] = {}
+        self._stop_event = threading.Event()
+        # 每个单元的执行器使用该令牌的子令牌，cancel() 可一次性打断所有单元
+        self.cancel_token = CancellationToken()
+
+    def stop(self) -> None:
+        """请求所有单元在当前迭代结束后停止"""
+        self._stop_event.set()
+
+    def cancel(self, reason: Optional[str] = None) -> None:
+        """停止所有单元并打断正在进行的命令等待"""
+        self.stop()
+        self.cancel_token.cancel(reason)
+
+    @property
+    def devices(self) -> Dict[str, Any]:
+        """所有单元的设备（实例名 → Device），供指标端点读取收发字节数"""
+        devices = {}
+        for executor in list(self._executors.values()):
+            devices.update(executor.command_device_dict.devices)
+        return devices
+
+    @property
+    def device_monitors(self) -> Dict[str, Any]:
+        """所有单元的监控设备（实例名 → MonitorManager）"""
+        monitors = {}
+        for executor in list(self._executors.values()):
+            monitors.update(executor.command_device_dict.device_monitors)
+        return monitors
+
+    def _unit_name(self, unit: dict) -> str:
+        return "+".join(d["name"] for d in unit["Devices"])
+
+    def _run_unit(
+        self, index: int, loop_count: int, infinite_loop: bool
+    ) -> FleetUnitStats:
+        from components.CommandExecutor import CommandExecutor
+
+        stats = self.stats[index]
+        executor = None
+        session_guard = None
+        try:
+            executor = CommandExecutor(
+                self.units[index],
+                data_store=self.data_store,
+                cancel_token=self.cancel_token.child(),
+            )
+            executor.command_listeners.append(stats.record_command)
+            executor.command_listeners.append(self.command_metrics.record_command)
+            self._executors[index] = executor
+            # 每个单元独立应用提前终止策略，坏掉的单元不会拖住整个工位
+            session_guard = SessionGuard(
+                executor.policy, on_expire=executor.cancel
+            ).start()
+            total = None if infinite_loop else loop_count
+            while (infinite_loop or stats.iterations < loop_count) and not (
+                self._stop_event.is_set() or session_guard.should_stop()
+            ):
+                current_iteration = stats.iterations + 1
+                executor.set_iteration_info(current_iteration, total)
+                try:
+                    passed = executor.execute()
+                except Exception as e:
+                    logger.log_iteration_error(
+                        f"[{stats.name}] Error during iteration {current_iteration}: {e}"
+                    )
+                    passed = False
+                stats.iterations += 1
+                if not passed:
+                    stats.failed_iterations += 1
+                session_guard.record(passed)
+            stats.stop_reason = session_guard.stop_reason
+        except BaseException as e:
+            # Device 打开失败等错误只影响当前单元
+            stats.error = f"{type(e).__name__}: {e}"
+            logger.log_session_error(f"[{stats.name}] Unit aborted: {stats.error}")
+        finally:
+            if session_guard is not None:
+                session_guard.cancel()
+            if executor is not None:
+                try:
+                    executor.command_device_dict.close_all_devices()
+                    executor.shutdown()
+                except Exception as e:
+                    logger.log_session_error(
+                        f"[{stats.name}] Error shutting down unit: {e}"
+                    )
+        return stats
+
+    def run(self, loop_count: int = 3, infinite_loop: bool = False) -> dict:
+        """执行所有单元，返回聚合统计"""
+        if not self.units:
+            logger.log_session_warning("No device templates found, nothing to run")
+            return self.summary()
+
+        self.data_store = DataStore.from_config(
+            self.dict_data.get("ConfigForDataStore"), session_id=self.session_id
+        )
+        # 常量在启动各单元之前统一解析，避免多个线程同时提示输入
+        from components.CommandExecutor import CommandExecutor
+
+        CommandExecutor.load_constants(self.dict_data.get("Constants", {}), self.data_store)
+        for unit in self.units:
+            unit.pop("Constants", None)
+
+        metrics_server = get_metrics_server()
+        if metrics_server is not None:
+            metrics_server.bind(self.command_metrics, self, self.data_store)
+
+        self.stats = [FleetUnitStats(self._unit_name(u)) for u in self.units]
+        logger.log_session_start(
+            f"Fleet mode: {len(self.units)} units "
+            f"({', '.join(f'{k} x{len(v)}' for k, v in self.instances.items())})"
+        )
+
+        start = time.time()
+        try:
+            with ThreadPoolExecutor(
+                max_workers=len(self.units), thread_name_prefix="FleetUnit"
+            ) as pool:
+                futures = [
+                    pool.submit(self._run_unit, i, loop_count, infinite_loop)
+                    for i in range(len(self.units))
+                ]
+                try:
+                    for future in futures:
+                        future.result()
+                except KeyboardInterrupt:
+                    self.cancel("interrupted by user")
+                    raise
+        finally:
+            self.data_store.stop()
+
+        summary = self.summary()
+        summary["elapsed_s"] = time.time() - start
+        self.log_summary(summary)
+        return summary
+
+    def summary(self) -> dict:
+        """按单元和整体聚合的执行统计"""
+        units = [s.summary() for s in self.stats]
+        all_latencies = LatencyHistogram()
+        for s in self.stats:
+            all_latencies.merge(s.latency)
+        iterations = sum(s.iterations for s in self.stats)
+        failed_iterations = sum(s.failed_iterations for s in self.stats)
+        return {
+            "units": units,
+            "total": {
+                "units": len(units),
+                "passed_units": sum(
+                    1 for s in self.stats if s.failed_iterations == 0 and not s.error
+                ),
+                "iterations": iterations,
+                "failed_iterations": failed_iterations,
+                "commands": sum(s.commands for s in self.stats),
+                "failed_commands": sum(s.failed_commands for s in self.stats),
+                "latency_ms": _latency_summary(all_latencies),
+            },
+        }
+
+    def log_summary(self, summary: dict) -> None:
+        for unit in summary["units"]:
+            latency = unit["latency_ms"]
+            status = "PASS" if unit["failed_iterations"] == 0 and not unit["error"] else "FAIL"
+            logger.log_session_end(
+                f"[{unit['unit']}] {status} "
+                f"{unit['iterations'] - unit['failed_iterations']}/{unit['iterations']} iterations, "
+                f"{unit['commands']} cmds, p50 {latency['p50']:.1f}ms, "
+                f"p95 {latency['p95']:.1f}ms, max {latency['max']:.1f}ms"
+                + (f", error: {unit['error']}" if unit["error"] else "")
+                + (f", stopped: {unit['stop_reason']}" if unit["stop_reason"] else "")
+            )
+        total = summary["total"]
+        logger.log_session_end(
+            f"Fleet: {total['passed_units']}/{total['units']} units passed, "
+            f"{total['failed_commands']}/{total['commands']} commands failed, "
+            f"p95 {total['latency_ms']['p95']:.1f}ms"
+        )
@@ -0,0 +1,258 @@
+"""
+流水线迭代（Pipelined iterations）
+
+默认情况下每轮迭代都要等待最慢的设备完成后才进入下一轮。开启流水线后，
+每个设备组在自己的线程中按自己的节奏推进迭代，快的设备组最多可以领先
+最慢的设备组 ``max_skew`` 轮；迭代结果仍按迭代顺序汇总输出。
+
+设备组的划分：
+- 默认每个设备一个组；
+- ConfigForIterations.groups 中声明的设备会被放到同一组；
+- 存在跨设备依赖的设备会被自动合并：action 中 device 字段引用了其它设备
+  （如 save 到其它设备的命名空间），或 *_by_order 引用了其它设备的命令。
+
+配置示例：
+
+    ConfigForIterations:
+      pipeline: true
+      max_skew: 2
+      groups:
+        - [DeviceA, DeviceB]
+"""
+
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from components.ExecutionPolicy import SessionGuard
+from components.Logger import AutoComLogger, get_logger
+
+logger: AutoComLogger = get_logger("AutoCom")
+
+_BY_ORDER_ACTIONS = ("execute_command_by_order", "set_status_by_order")
+
+
+def _collect_references(obj, devices: set, orders: set) -> None:
+    """收集 action 配置中引用的设备名和命令序号"""
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            if key == "device" and isinstance(value, str):
+                devices.add(value)
+            elif key in _BY_ORDER_ACTIONS:
+                orders.add(value.get("order") if isinstance(value, dict) else value)
+            else:
+                _collect_references(value, devices, orders)
+    elif isinstance(obj, list):
+        for item in obj:
+            _collect_references(item, devices, orders)
+
+
+def build_device_groups(
+    dict_data: dict, declared_groups: Optional[List[List[str]]] = None
+) -> List[List[str]]:
+    """划分可以独立推进迭代的设备组
+
+    Returns:
+        List[List[str]]: 设备组，组内设备保持 Devices 中的顺序
+    """
+    names = [
+        d["name"]
+        for d in dict_data.get("Devices", [])
+        if d.get("status", "enabled") == "enabled"
+    ]
+    parent = {name: name for name in names}
+
+    def find(name):
+        while parent[name] != name:
+            parent[name] = parent[parent[name]]
+            name = parent[name]
+        return name
+
+    def union(a, b):
+        if a in parent and b in parent:
+            parent[find(a)] = find(b)
+
+    for group in declared_groups or []:
+        for name in group[1:]:
+            union(group[0], name)
+
+    commands = dict_data.get("Commands", [])
+    devices_by_order: Dict[object, set] = {}
+    for cmd in commands:
+        devices_by_order.setdefault(cmd.get("order"), set()).add(cmd.get("device"))
+
+    for cmd in commands:
+        own = cmd.get("device")
+        referenced_devices: set = set()
+        referenced_orders: set = set()
+        for key, value in cmd.items():
+            if key.endswith("_actions"):
+                _collect_references(value, referenced_devices, referenced_orders)
+        for order in referenced_orders:
+            referenced_devices |= devices_by_order.get(order, set())
+        for other in referenced_devices:
+            union(own, other)
+
+    groups: Dict[str, List[str]] = {}
+    for name in names:
+        groups.setdefault(find(name), []).append(name)
+    return list(groups.values())
+
+
+class IterationPipeline:
+    """按设备组流水线推进迭代"""
+
+    def __init__(self, executor, groups: List[List[str]], max_skew: int = 1):
+        """
+        Args:
+            executor: 主 CommandExecutor，持有设备和 DataStore
+            groups: build_device_groups() 的结果
+            max_skew: 最快与最慢设备组之间允许的最大迭代差，0 等价于逐轮同步
+        """
+        from components.CommandExecutor import CommandExecutor
+
+        self.executor = executor
+        self.groups = groups
+        self.max_skew = max(0, int(max_skew))
+
+        commands = executor.command_device_dict.dict["Commands"]
+        self.group_commands = [
+            [c for c in commands if c.get("device") in set(group)] for group in groups
+        ]
+        # 每个组使用独立的执行器（共享设备、DataStore 和会话取消令牌），
+        # 避免并行块/延迟队列状态互相干扰
+        self.executors = [executor] + [
+            CommandExecutor(
+                executor.command_device_dict,
+                data_store=executor.data_store,
+                cancel_token=executor.cancel_token,
+            )
+            for _ in groups[1:]
+        ]
+        for group_executor in self.executors[1:]:
+            group_executor.command_listeners.extend(executor.command_listeners)
+
+        self._cond = threading.Condition()
+        self._completed = [0] * len(groups)
+        self._results: Dict[int, Dict[int, bool]] = {}
+        self._active = 0
+        self._stop_event = threading.Event()
+
+    def stop(self) -> None:
+        """请求所有设备组在当前迭代结束后停止"""
+        self._stop_event.set()
+        with self._cond:
+            self._cond.notify_all()
+
+    def cancel(self, reason: Optional[str] = None) -> None:
+        """停止流水线并打断所有设备组正在进行的等待"""
+        self.stop()
+        # 各组执行器共享同一个会话令牌，取消一次即可
+        self.executor.cancel(reason)
+
+    def _group_worker(self, index: int, loop_count: int, infinite_loop: bool) -> None:
+        executor = self.executors[index]
+        commands = self.group_commands[index]
+        total = None if infinite_loop else loop_count
+        iteration = 0
+        try:
+            while infinite_loop or iteration < loop_count:
+                iteration += 1
+                with self._cond:
+                    # 领先最慢的组不超过 max_skew 轮
+                    while not self._stop_event.is_set() and (
+                        min(self._completed) < iteration - 1 - self.max_skew
+                    ):
+                        self._cond.wait(timeout=0.5)
+                if self._stop_event.is_set():
+                    break
+
+                # 设置本组的迭代信息（变量历史、事件流、阶段计时与设备日志标记）
+                executor.set_iteration_info(iteration, total)
+
+                passed = True
+                if commands:
+                    try:
+                        passed = executor.execute(commands)
+                    except Exception as e:
+                        logger.log_iteration_error(
+                            f"Error during iteration {iteration} "
+                            f"({', '.join(self.groups[index])}): {e}"
+                        )
+                        passed = False
+                else:
+                    # 没有命令的组不经过 execute()，直接标记设备日志
+                    devices = executor.command_device_dict.devices
+                    for name in self.groups[index]:
+                        if name in devices:
+                            devices[name].mark_iteration(iteration, total)
+
+                with self._cond:
+                    self._results.setdefault(iteration, {})[index] = passed
+                    self._completed[index] = iteration
+                    self._cond.notify_all()
+        finally:
+            with self._cond:
+                self._active -= 1
+                self._cond.notify_all()
+
+    def run(self, loop_count: int = 3, infinite_loop: bool = False) -> Tuple[int, int]:
+        """运行流水线，按迭代顺序汇总结果
+
+        Returns:
+            (executed_count, failure_count)
+        """
+        logger.log_session_start(
+            f"Pipelined iterations: {len(self.groups)} device groups, "
+            f"max skew {self.max_skew}"
+        )
+        for index, executor in enumerate(self.executors):
+            executor.iteration_devices = set(self.groups[index])
+
+        threads = []
+        self._active = len(self.groups)
+        for index in range(len(self.groups)):
+            thread = threading.Thread(
+                target=self._group_worker,
+                args=(index, loop_count, infinite_loop),
+                name=f"PipelineGroup-{index}",
+                daemon=True,
+            )
+            thread.start()
+            threads.append(thread)
+
+        executed_count = 0
+        failure_count = 0
+        session_guard = SessionGuard(self.executor.policy, on_expire=self.cancel).start()
+        try:
+            while infinite_loop or executed_count < loop_count:
+                iteration = executed_count + 1
+                with self._cond:
+                    while (
+                        len(self._results.get(iteration, {})) < len(self.groups)
+                        and self._active > 0
+                    ):
+                        self._cond.wait(timeout=0.5)
+                    results = self._results.pop(iteration, {})
+                if len(results) < len(self.groups):
+                    break
+                executed_count += 1
+                passed = all(results.values())
+                if not passed:
+                    failure_count += 1
+                session_guard.record(passed)
+                logger.log_iteration_end(iteration=iteration, total=loop_count)
+                if session_guard.should_stop():
+                    self.cancel()
+                    break
+        except KeyboardInterrupt:
+            self.cancel("interrupted by user")
+            raise
+        finally:
+            session_guard.cancel()
+            self.stop()
+            for thread in threads:
+                thread.join()
+            for executor in self.executors[1:]:
+                executor.shutdown()
+            self.executor.iteration_devices = None
+        return executed_count, failure_count
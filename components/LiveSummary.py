@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+汇总式 CLI 输出 (cli_output_mode="summary") for AutoCom
+
+无限循环/高频执行时逐行输出表格会让终端成为瓶颈。summary 模式下每条命令只在
+record() 中更新计数并追加一个延迟样本，后台线程按固定间隔输出各设备的汇总：
+
+- 命令速率 (cmd/s，按两次刷新之间的命令数计算)
+- 通过率
+- p50/p95 延迟 (最近 LATENCY_WINDOW 条命令)
+- 最近一次失败的命令与时间
+
+详细的逐行结果仍写入日志文件。终端 (TTY) 上汇总原地刷新，否则逐次追加输出。
+写出经由 output 回调（AutoComLogger 传入 _output），启用异步日志时与其它日志一起
+在输出线程中按顺序写出。
+"""
+
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Callable, Deque, Dict, List, Optional, TextIO, Tuple
+
+DEFAULT_REFRESH_INTERVAL = 1.0
+LATENCY_WINDOW = 1024
+
+
+class _DeviceStats:
+    __slots__ = ("total", "passed", "window_count", "latencies", "last_failure")
+
+    def __init__(self):
+        self.total = 0
+        self.passed = 0
+        self.window_count = 0  # 上次刷新以来的命令数
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.last_failure: Optional[Tuple[str, float]] = None
+
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class LiveSummary:
+    """按设备聚合命令结果并周期性输出"""
+
+    def __init__(
+        self,
+        interval: float = DEFAULT_REFRESH_INTERVAL,
+        stream: Optional[TextIO] = None,
+        output: Optional[Callable[..., None]] = None,
+    ):
+        """
+        Args:
+            interval: 刷新间隔（秒）
+            stream: 输出流，默认 sys.stdout
+            output: output(func, *args) 执行写出（例如交给日志输出线程），默认直接调用
+        """
+        self.interval = interval
+        self.stream = stream
+        self.output = output
+        self._stats: Dict[str, _DeviceStats] = {}
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._last_render = self._started
+        self._drawn_lines = 0  # 终端上可原地覆盖的上次输出行数
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def record(self, device: str, passed: bool, elapsed_ms: float, command: str = "") -> None:
+        """记录一条命令结果（执行线程调用，只做计数）"""
+        with self._lock:
+            stats = self._stats.get(device)
+            if stats is None:
+                stats = self._stats[device] = _DeviceStats()
+            stats.total += 1
+            stats.window_count += 1
+            stats.latencies.append(elapsed_ms)
+            if passed:
+                stats.passed += 1
+            else:
+                stats.last_failure = (command, time.time())
+
+    def render(self) -> List[str]:
+        """生成当前汇总（并开始新的速率统计窗口）"""
+        now = time.monotonic()
+        with self._lock:
+            window = max(now - self._last_render, 1e-6)
+            self._last_render = now
+            rows = []
+            for device, stats in self._stats.items():
+                rows.append(
+                    (
+                        device,
+                        stats.total,
+                        stats.passed,
+                        stats.window_count / window,
+                        sorted(stats.latencies),
+                        stats.last_failure,
+                    )
+                )
+                stats.window_count = 0
+
+        total = sum(row[1] for row in rows)
+        passed = sum(row[2] for row in rows)
+        lines = [
+            f"⏱ {now - self._started:.0f}s  {total} commands  "
+            f"{passed}/{total} passed  {sum(row[3] for row in rows):.1f} cmd/s"
+        ]
+        for device, count, ok, rate, latencies, last_failure in rows:
+            line = (
+                f"  [{device}] {rate:.1f} cmd/s  pass {ok / count * 100:.1f}% ({ok}/{count})"
+                f"  p50 {_percentile(latencies, 50):.1f}ms  p95 {_percentile(latencies, 95):.1f}ms"
+            )
+            if last_failure is not None:
+                command, ts = last_failure
+                line += f"  last fail: {command} @ {datetime.fromtimestamp(ts).strftime('%H:%M:%S')}"
+            lines.append(line)
+        return lines
+
+    def refresh(self) -> None:
+        """立即输出一次汇总"""
+        lines = self.render()
+        if self.output is not None:
+            self.output(self._write, lines)
+        else:
+            self._write(lines)
+
+    def _write(self, lines: List[str]) -> None:
+        stream = self.stream or sys.stdout
+        with self._lock:
+            prefix = ""
+            if self._drawn_lines and stream.isatty():
+                # 光标回到上次汇总的第一行并清除到屏幕末尾
+                prefix = f"\033[{self._drawn_lines}F\033[J"
+            self._drawn_lines = len(lines)
+        try:
+            stream.write(prefix + "\n".join(lines) + "\n")
+            stream.flush()
+        except (OSError, ValueError):
+            pass
+
+    def detach(self) -> None:
+        """其它输出写到终端后调用：下次汇总从新的位置开始，不覆盖那些输出"""
+        with self._lock:
+            self._drawn_lines = 0
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="AutoComLiveSummary", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.refresh()
+
+    def stop(self) -> None:
+        """停止周期刷新并输出最终汇总"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1.0)
+            self._thread = None
+        self.refresh()
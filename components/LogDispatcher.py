@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+日志异步输出线程 for AutoCom
+
+调用线程（设备读取、命令执行线程）只把输出任务放入有界队列，格式化、着色、
+表格渲染与写终端/文件都在专用线程中完成，终端或 SSH 再慢也不会拖慢命令计时。
+
+- 队列满时按 overflow 策略处理: "drop" 丢弃新任务并计数，输出线程追上后打印
+  一条汇总; "block" 等待队列空位（不丢日志，但慢终端会反压调用线程）
+- close() 在停止前处理完队列中已有的全部任务（进程退出时经 atexit 调用）
+"""
+
+import atexit
+import queue
+import threading
+from typing import Any, Callable, Optional
+
+OVERFLOW_POLICIES = ("drop", "block")
+
+DEFAULT_QUEUE_SIZE = 10000
+
+_STOP = object()
+
+
+class LogDispatcher:
+    """有界队列 + 单个输出线程，按提交顺序执行输出任务"""
+
+    def __init__(
+        self,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        overflow: str = "drop",
+        on_dropped: Optional[Callable[[int], None]] = None,
+        name: str = "AutoComLogWriter",
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(
+                f"Invalid overflow policy '{overflow}', expected one of {OVERFLOW_POLICIES}"
+            )
+        self.overflow = overflow
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max(1, int(queue_size)))
+        self._on_dropped = on_dropped
+        self._drop_lock = threading.Lock()
+        self._dropped = 0  # 尚未汇总的丢弃数
+        self.dropped_total = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, func: Callable[..., Any], *args: Any) -> bool:
+        """提交输出任务，返回 False 表示已关闭或因队列满被丢弃"""
+        if self._closed:
+            return False
+        if self.overflow == "block":
+            self._queue.put((func, args))
+            return True
+        try:
+            self._queue.put_nowait((func, args))
+            return True
+        except queue.Full:
+            with self._drop_lock:
+                self._dropped += 1
+                self.dropped_total += 1
+            return False
+
+    def _take_dropped(self) -> int:
+        with self._drop_lock:
+            dropped, self._dropped = self._dropped, 0
+        return dropped
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            func, args = item
+            try:
+                func(*args)
+            except Exception:
+                # 输出失败不能让输出线程退出
+                pass
+            if self._dropped and self._queue.empty() and self._on_dropped is not None:
+                # 已追上积压：汇总这段时间丢弃的条数
+                try:
+                    self._on_dropped(self._take_dropped())
+                except Exception:
+                    pass
+        dropped = self._take_dropped()
+        if dropped and self._on_dropped is not None:
+            try:
+                self._on_dropped(dropped)
+            except Exception:
+                pass
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等待此前提交的任务全部输出完成（不会被丢弃）"""
+        if self._closed or not self._thread.is_alive():
+            return True
+        done = threading.Event()
+        self._queue.put((done.set, ()))
+        return done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = 10.0) -> None:
+        """停止接收新任务，输出完队列中已有的任务后结束输出线程"""
+        if self._closed:
+            return
+        self._closed = True
+        atexit.unregister(self.close)
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
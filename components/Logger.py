@@ -8,10 +8,12 @@
 - 类型安全
 """
 
+import atexit
 import logging
 import sys
 import os
 import re
+import codecs
 import functools
 import threading
 from pathlib import Path
@@ -21,6 +23,8 @@ from enum import Enum
 from contextvars import ContextVar
 from collections import defaultdict
 from .TablePrinter import TablePrinter
+from .LogDispatcher import DEFAULT_QUEUE_SIZE, LogDispatcher
+from .LiveSummary import LiveSummary
 
 # ============================================================================
 # 类型定义
@@ -76,6 +80,18 @@ for level in LogLevel:
 # ============================================================================
 
 
+# 合并正则时以内联作用域标志保留各着色器自己的标志
+_INLINE_FLAGS = (
+    (re.IGNORECASE, "i"),
+    (re.MULTILINE, "m"),
+    (re.DOTALL, "s"),
+    (re.VERBOSE, "x"),
+    (re.ASCII, "a"),
+)
+# 数字/命名反向引用在合并后组号会变化，这类正则不参与合并
+_BACKREFERENCE = re.compile(r"\\[1-9]|\(\?P=|\\g<")
+
+
 class ColorizerProtocol(Protocol):
     """着色器协议 - 任何实现此协议的对象都可以作为着色器"""
 
@@ -125,6 +141,22 @@ class RegexColorizer:
 
         return pattern.sub(replacer, text)
 
+    def combined_pattern(self) -> Optional[tuple]:
+        """供注册表合并的 (正则源码, 着色组); 含反向引用等无法合并时返回 None"""
+        pattern = self.pattern
+        if isinstance(pattern, str):
+            pattern = re.compile(pattern)
+        if not isinstance(pattern.pattern, str) or _BACKREFERENCE.search(pattern.pattern):
+            return None
+        flags = "".join(
+            letter for flag, letter in _INLINE_FLAGS if pattern.flags & flag
+        )
+        source = pattern.pattern
+        if flags:
+            # re.X 下模式末尾的注释会吞掉右括号，先换行
+            source = f"(?{flags}:{source}\n)" if "x" in flags else f"(?{flags}:{source})"
+        return source, self.group
+
 
 @dataclass
 class KeywordColorizer:
@@ -152,6 +184,16 @@ class KeywordColorizer:
             )
         return result
 
+    def combined_pattern(self) -> Optional[tuple]:
+        """供注册表合并的 (正则源码, 着色组)"""
+        if not self.keywords:
+            return None
+        # 长关键词在前，避免被其前缀抢先匹配
+        source = "|".join(
+            re.escape(kw) for kw in sorted(self.keywords, key=len, reverse=True)
+        )
+        return (source if self.case_sensitive else f"(?i:{source})"), 0
+
 
 class ColorizerRegistry:
     """
@@ -163,6 +205,9 @@ class ColorizerRegistry:
         self._colorizers: Dict[int, List[tuple]] = defaultdict(list)
         self._enabled: set = set()
         self._lock = threading.RLock()
+        # 合并后的着色计划 (pattern, dispatch) 或 (None, colorizers)，
+        # 注册表变化时置空，下次着色时重建
+        self._plan: Optional[tuple] = None
 
     def register(
         self,
@@ -185,6 +230,7 @@ class ColorizerRegistry:
             cid = name or f"colorizer_{id(colorizer)}"
             self._colorizers[priority].append((cid, colorizer))
             self._enabled.add(cid)
+            self._plan = None
             return cid
 
     def unregister(self, cid: str) -> bool:
@@ -195,6 +241,7 @@ class ColorizerRegistry:
                     if id_ == cid:
                         colorizers.pop(i)
                         self._enabled.discard(cid)
+                        self._plan = None
                         return True
             return False
 
@@ -202,28 +249,96 @@ class ColorizerRegistry:
         """启用着色器"""
         with self._lock:
             self._enabled.add(cid)
+            self._plan = None
 
     def disable(self, cid: str) -> None:
         """禁用着色器"""
         with self._lock:
             self._enabled.discard(cid)
+            self._plan = None
+
+    def _build_plan(self) -> tuple:
+        """把启用的着色器按优先级合并为一个分支正则
+
+        每个着色器包在一个外层捕获组中，匹配后按 match.lastindex（外层组最后闭合）
+        找到对应的颜色和着色组。存在无法合并的着色器时退回逐个应用。
+        """
+        ordered = [
+            colorizer
+            for priority in sorted(self._colorizers.keys())
+            for cid, colorizer in self._colorizers[priority]
+            if cid in self._enabled
+        ]
+        sources = []
+        dispatch = {}
+        index = 1
+        for colorizer in ordered:
+            spec = getattr(colorizer, "combined_pattern", lambda: None)()
+            if spec is None:
+                if isinstance(colorizer, KeywordColorizer) and not colorizer.keywords:
+                    continue
+                return None, ordered
+            source, group = spec
+            try:
+                inner_groups = re.compile(source).groups
+            except re.error:
+                return None, ordered
+            sources.append(f"({source})")
+            dispatch[index] = (
+                colorizer.color.value,
+                index + group if group else index,
+            )
+            index += 1 + inner_groups
+        if not sources:
+            return None, []
+        try:
+            return re.compile("|".join(sources)), dispatch
+        except re.error:
+            # 例如不同着色器使用了同名的命名组
+            return None, ordered
 
     def colorize(self, text: str) -> str:
-        """按优先级应用所有启用的着色器"""
-        result = text
-        with self._lock:
-            # 按优先级排序处理
-            for priority in sorted(self._colorizers.keys()):
-                for cid, colorizer in self._colorizers[priority]:
-                    if cid in self._enabled and colorizer.can_handle(result):
-                        result = colorizer.colorize(result)
-        return result
+        """按优先级应用所有启用的着色器（合并为一次扫描）
+
+        同一位置有多个着色器可匹配时优先级高者生效，已着色的片段不会被再次着色。
+        """
+        plan = self._plan
+        if plan is None:
+            with self._lock:
+                plan = self._plan
+                if plan is None:
+                    plan = self._plan = self._build_plan()
+        pattern, dispatch = plan
+
+        if pattern is None:
+            result = text
+            for colorizer in dispatch:
+                if colorizer.can_handle(result):
+                    result = colorizer.colorize(result)
+            return result
+
+        reset = ColorCode.RESET.value
+
+        def replacer(match):
+            color, group = dispatch[match.lastindex]
+            start, end = match.span(group)
+            if start < 0 or start == end:
+                return match.group(0)
+            full_start, full_end = match.span()
+            full = match.string
+            return (
+                f"{full[full_start:start]}{color}{full[start:end]}{reset}"
+                f"{full[end:full_end]}"
+            )
+
+        return pattern.sub(replacer, text)
 
     def clear(self) -> None:
         """清空所有着色器"""
         with self._lock:
             self._colorizers.clear()
             self._enabled.clear()
+            self._plan = None
 
 
 # ============================================================================
@@ -366,6 +481,59 @@ def with_context(**ctx):
     return decorator
 
 
+# ============================================================================
+# 响应预览
+# ============================================================================
+
+# 表格/普通输出中响应预览的最大字符数（转义前）
+RESPONSE_PREVIEW_CHARS = 48
+
+# CLI 输出模式: 逐行表格 / 普通日志 / 周期刷新的设备汇总(逐行结果只写日志文件)
+CLI_OUTPUT_MODES = ("table", "plain", "summary")
+
+
+def preview_response(response: Any, limit: int = RESPONSE_PREVIEW_CHARS) -> str:
+    """
+    生成单行响应预览: 只截取并转义将要显示的前 limit 个字符
+
+    控制字符（如 CR、LF）和不可解码的字节显示为 \\r、\\n、\\xHH 或 \\uXXXX 转义序列。
+    大响应（如 AT+QCFG=?、文件列表）不再整体转义，完整响应由需要它的输出端
+    （设备日志、事件流）自行处理。
+    """
+    if isinstance(response, (bytes, bytearray)):
+        # UTF-8 每个字符最多 4 字节，末尾被截断的多字节字符留在解码器中
+        chunk = bytes(response[: limit * 4])
+        try:
+            text = codecs.getincrementaldecoder("utf-8")().decode(chunk)
+        except UnicodeDecodeError:
+            text = chunk.decode("latin-1", errors="ignore")
+    elif isinstance(response, str):
+        text = response
+    else:
+        text = str(response)
+    return text[:limit].encode("unicode_escape").decode("ascii")
+
+
+# ============================================================================
+# 异步输出 Handler
+# ============================================================================
+
+
+class _DispatchHandler(logging.Handler):
+    """异步模式下 logger 唯一的 handler: 在调用线程只做最少的准备并入队"""
+
+    def __init__(self, dispatcher: LogDispatcher, handle: Callable[[logging.LogRecord], None]):
+        super().__init__()
+        self._dispatcher = dispatcher
+        self._handle = handle
+
+    def emit(self, record: logging.LogRecord) -> None:
+        # 与 QueueHandler.prepare 相同: 先合并参数，之后记录不再依赖调用方的对象
+        record.msg = record.getMessage()
+        record.args = None
+        self._dispatcher.submit(self._handle, record)
+
+
 # ============================================================================
 # 主 Logger 类
 # ============================================================================
@@ -415,6 +583,9 @@ class AutoComLogger:
         self._console_handler.setFormatter(self._formatter)
         self._logger.addHandler(self._console_handler)
 
+        # 异步输出(可选): 非空时日志记录与表格输出在 LogDispatcher 线程中格式化和写出
+        self._dispatcher: Optional[LogDispatcher] = None
+
         # 文件handler(可选)
         self._file_handler: Optional[logging.FileHandler] = None
         if log_file:
@@ -423,6 +594,8 @@ class AutoComLogger:
         # 注册默认着色器
         self._setup_default_colorizers()
 
+        # 多进程分片 worker 使用: 非空时 CLI 输出被转交给 forwarder, 由协调进程重放
+        self._forwarder: Optional[Callable[[str, Any], None]] = None
         # TablePrinter实例
         self.tp = TablePrinter(
             headers=[
@@ -436,11 +609,13 @@ class AutoComLogger:
             width_mode="proportional",
             column_ratios=[2,1,1,1,2,3],
         )
+        # summary 模式的汇总输出, 首条命令结果到来时创建
+        self._summary: Optional[LiveSummary] = None
         # CLI output mode controls how CLI-specific logging (log_step_*, log_iteration_*, log_session_*) is emitted.
-        # Allowed: 'table' (default), 'plain', 'both'
+        # Allowed: 'table' (default), 'plain', 'summary'
         env_cli_mode = os.getenv("AUTOCOM_CLI_OUTPUT_MODE", "table")
         self.cli_output_mode = (cli_output_mode or env_cli_mode).lower()
-        if self.cli_output_mode not in ("table", "plain"):
+        if self.cli_output_mode not in CLI_OUTPUT_MODES:
             self.cli_output_mode = "table"
 
     def _setup_default_colorizers(self) -> None:
@@ -492,7 +667,7 @@ class AutoComLogger:
                 cli_mode = kwargs.get("cli_output_mode")
                 if cli_mode is not None:
                     cli_mode = str(cli_mode).lower()
-                    if cli_mode not in ("table", "plain"):
+                    if cli_mode not in CLI_OUTPUT_MODES:
                         cli_mode = "table"
                     cls._instances[name].cli_output_mode = cli_mode
                 # Allow updating file output if provided at subsequent calls
@@ -513,6 +688,10 @@ class AutoComLogger:
 
         Path(path).parent.mkdir(parents=True, exist_ok=True)
 
+        if self._dispatcher is not None:
+            # 先输出已排队的记录，再切换文件
+            self._dispatcher.flush(timeout=5.0)
+
         self._file_handler = logging.FileHandler(path, mode=mode, encoding="utf-8")
         # 保存路径以供 TablePrinter 写文件使用
         self._log_file = path
@@ -520,7 +699,97 @@ class AutoComLogger:
         self._file_handler.setFormatter(
             logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
         )
-        self._logger.addHandler(self._file_handler)
+        if self._dispatcher is None:
+            self._logger.addHandler(self._file_handler)
+
+    def flush(self) -> None:
+        """刷新所有日志处理器（会话结束/中断退出前调用）"""
+        # 会话结束: 先输出最终汇总，再等待输出队列写完
+        self.finish_summary()
+        if self._dispatcher is not None:
+            self._dispatcher.flush(timeout=10.0)
+        self.tp.flush()
+        for handler in (self._console_handler, self._file_handler):
+            if handler is None:
+                continue
+            try:
+                handler.flush()
+            except Exception:
+                pass
+
+    # ========================================================================
+    # 异步输出
+    # ========================================================================
+
+    def enable_async(
+        self, queue_size: int = DEFAULT_QUEUE_SIZE, overflow: str = "drop"
+    ) -> None:
+        """
+        启用异步输出: 调用线程只把日志记录和表格行放入有界队列,
+        着色、格式化和写终端/文件在专用线程中完成
+
+        Args:
+            queue_size: 队列容量(条)
+            overflow: 队列满时的策略, "drop" 丢弃并在追上后汇总条数, "block" 等待空位
+        """
+        if self._dispatcher is not None:
+            return
+        # 表格数据行只由输出线程写入，留在日志文件的写缓冲中，在横幅（每轮迭代）、
+        # 表尾与 flush() 时落盘；先于 LogDispatcher 注册 atexit，队列写完后再落盘
+        self.tp.flush_rows = False
+        atexit.register(self.tp.flush)
+        self._dispatcher = LogDispatcher(
+            queue_size=queue_size,
+            overflow=overflow,
+            on_dropped=self._report_dropped,
+            name=f"{self.name}LogWriter",
+        )
+        self._logger.handlers.clear()
+        self._logger.addHandler(_DispatchHandler(self._dispatcher, self._handle_record))
+
+    def disable_async(self) -> None:
+        """输出完队列中的全部内容后恢复同步输出"""
+        dispatcher, self._dispatcher = self._dispatcher, None
+        if dispatcher is None:
+            return
+        dispatcher.close()
+        self.tp.flush_rows = True
+        atexit.unregister(self.tp.flush)
+        self.tp.flush()
+        self._logger.handlers.clear()
+        self._logger.addHandler(self._console_handler)
+        if self._file_handler is not None:
+            self._logger.addHandler(self._file_handler)
+
+    @property
+    def dropped_records(self) -> int:
+        """异步输出因队列满丢弃的总条数"""
+        return self._dispatcher.dropped_total if self._dispatcher is not None else 0
+
+    def _handle_record(self, record: logging.LogRecord) -> None:
+        """在输出线程中把记录交给控制台和文件 handler"""
+        for handler in (self._console_handler, self._file_handler):
+            if handler is not None and record.levelno >= handler.level:
+                handler.handle(record)
+
+    def _report_dropped(self, count: int) -> None:
+        record = self._logger.makeRecord(
+            self.name,
+            logging.WARNING,
+            __file__,
+            0,
+            f"⚠ {count} log records dropped: output could not keep up",
+            None,
+            None,
+        )
+        self._handle_record(record)
+
+    def _output(self, func: Callable[..., Any], *args: Any) -> None:
+        """执行表格等直接输出，异步模式下交给输出线程"""
+        if self._dispatcher is not None:
+            self._dispatcher.submit(func, *args)
+        else:
+            func(*args)
 
     # ========================================================================
     # 核心日志方法(零开销检查)
@@ -531,6 +800,14 @@ class AutoComLogger:
         if not self._logger.isEnabledFor(level):
             return
 
+        if self._forwarder is not None:
+            self._forwarder("log", (level, str(msg)))
+            return
+
+        if self._summary is not None:
+            # 汇总不原地覆盖这条日志（与日志记录经同一输出队列，保持先后顺序）
+            self._output(self._summary.detach)
+
         # 自动捕获 exc_info（如果调用方传了 exc_info=True 但没传具体异常）
         if kwargs.get("exc_info") is True and "exc_info" not in kwargs:
             import sys
@@ -587,26 +864,37 @@ class AutoComLogger:
 
     ## 实时表格相关日志方法
 
+    @property
+    def _table_on_console(self) -> bool:
+        """summary 模式下表格只写日志文件"""
+        return self.cli_output_mode != "summary"
+
     def log_realtime_table_header(self, headers: List[str]) -> None:
         """日志表格头部"""
         self.tp.headers = headers
         log_file = getattr(self, "_log_file", None)
-        self.tp.print_realtime_header(log_file=log_file)
+        self._output(self.tp.print_realtime_header, log_file, self._table_on_console)
 
     def log_realtime_table_row(self, row: List[Any]) -> None:
         """日志表格行"""
+        if self._forwarder is not None:
+            self._forwarder("row", list(row))
+            return
         log_file = getattr(self, "_log_file", None)
-        self.tp.print_realtime_row(row, log_file=log_file, is_print=True)
+        self._output(self.tp.print_realtime_row, row, log_file, self._table_on_console)
 
     def log_realtime_table_banner(self, text: str) -> None:
         """日志表格横幅"""
+        if self._forwarder is not None:
+            self._forwarder("banner", text)
+            return
         log_file = getattr(self, "_log_file", None)
-        self.tp.print_realtime_banner(text, log_file=log_file, is_print=True)
+        self._output(self.tp.print_realtime_banner, text, log_file, self._table_on_console)
 
     def log_realtime_table_footer(self) -> None:
         """日志表格底部(结束)"""
         log_file = getattr(self, "_log_file", None)
-        self.tp.print_realtime_footer(log_file=log_file, is_print=True)
+        self._output(self.tp.print_realtime_footer, log_file, self._table_on_console)
 
     ## CLI 迭代日志方法
 
@@ -615,7 +903,7 @@ class AutoComLogger:
     def log_step_info(self, step_text: str) -> None:
         """Log step information"""
         text = f"ℹ {step_text}"
-        if self.cli_output_mode in ("table"):
+        if self.cli_output_mode in ("table", "summary"):
             self.log_realtime_table_banner(text)
         if self.cli_output_mode in ("plain"):
             self.log_info(text)
@@ -623,7 +911,7 @@ class AutoComLogger:
     def log_step_success(self, step_text: str) -> None:
         """Log step success"""
         text = f"✅ {step_text}"
-        if self.cli_output_mode in ("table"):
+        if self.cli_output_mode in ("table", "summary"):
             self.log_realtime_table_banner(text)
         if self.cli_output_mode in ("plain"):
             self.log_pass(text)
@@ -631,7 +919,7 @@ class AutoComLogger:
     def log_step_error(self, step_text: str) -> None:
         """Log step error"""
         text = f"❌ {step_text}"
-        if self.cli_output_mode in ("table"):
+        if self.cli_output_mode in ("table", "summary"):
             self.log_realtime_table_banner(text)
         if self.cli_output_mode in ("plain"):
             self.log_error(text)
@@ -639,7 +927,7 @@ class AutoComLogger:
     def log_step_warning(self, step_text: str) -> None:
         """Log step warning"""
         text = f"⚠️ {step_text}"
-        if self.cli_output_mode in ("table"):
+        if self.cli_output_mode in ("table", "summary"):
             self.log_realtime_table_banner(text)
         if self.cli_output_mode in ("plain"):
             self.log_warning(text)
@@ -649,7 +937,7 @@ class AutoComLogger:
     def log_iteration_start(self, iteration: int, total: int) -> None:
         """Log iteration start"""
         text = f"ℹ Starting iteration {iteration}/{total}"
-        if self.cli_output_mode in ("table"):
+        if self.cli_output_mode in ("table", "summary"):
             self.log_realtime_table_banner(text)
         if self.cli_output_mode in ("plain"):
             self.log_info(text)
@@ -657,7 +945,7 @@ class AutoComLogger:
     def log_iteration_success(self, iteration_text: str) -> None:
         """Log iteration success"""
         text = f"✅ {iteration_text}"
-        if self.cli_output_mode in ("table"):
+        if self.cli_output_mode in ("table", "summary"):
             self.log_realtime_table_banner(text)
         if self.cli_output_mode in ("plain"):
             self.log_pass(text)
@@ -665,7 +953,7 @@ class AutoComLogger:
     def log_iteration_info(self, iteration_text: str) -> None:
         """Log iteration information"""
         text = f"ℹ {iteration_text}"
-        if self.cli_output_mode in ("table"):
+        if self.cli_output_mode in ("table", "summary"):
             self.log_realtime_table_banner(text)
         if self.cli_output_mode in ("plain"):
             self.log_info(text)
@@ -673,7 +961,7 @@ class AutoComLogger:
     def log_iteration_warning(self, iteration_text: str) -> None:
         """Log iteration warning"""
         text = f"⚠️ {iteration_text}"
-        if self.cli_output_mode in ("table"):
+        if self.cli_output_mode in ("table", "summary"):
             self.log_realtime_table_banner(text)
         if self.cli_output_mode in ("plain"):
             self.log_warning(text)
@@ -681,7 +969,7 @@ class AutoComLogger:
     def log_iteration_error(self, iteration_text: str) -> None:
         """Log iteration error"""
         text = f"❌ {iteration_text}"
-        if self.cli_output_mode in ("table"):
+        if self.cli_output_mode in ("table", "summary"):
             self.log_realtime_table_banner(text)
         if self.cli_output_mode in ("plain"):
             self.log_error(text)
@@ -693,7 +981,7 @@ class AutoComLogger:
         else:
             text = f"ℹ Finished iteration {iteration}/{total}"
 
-        if self.cli_output_mode in ("table"):
+        if self.cli_output_mode in ("table", "summary"):
             self.log_realtime_table_banner(text)
         if self.cli_output_mode in ("plain"):
             self.log_info(text)
@@ -705,7 +993,7 @@ class AutoComLogger:
         text = f"{session_text}"
         if self.cli_output_mode in ("table"):
             self.log_realtime_table_banner(text)
-        if self.cli_output_mode in ("plain"):
+        if self.cli_output_mode in ("plain", "summary"):
             self.log_info(text)
 
     def log_session_success(self, session_text: str) -> None:
@@ -713,7 +1001,7 @@ class AutoComLogger:
         text = f"✅ {session_text}"
         if self.cli_output_mode in ("table"):
             self.log_realtime_table_banner(text)
-        if self.cli_output_mode in ("plain"):
+        if self.cli_output_mode in ("plain", "summary"):
             self.log_pass(text)
 
     def log_session_info(self, session_text: str) -> None:
@@ -721,7 +1009,7 @@ class AutoComLogger:
         text = f"ℹ {session_text}"
         if self.cli_output_mode in ("table"):
             self.log_realtime_table_banner(text)
-        if self.cli_output_mode in ("plain"):
+        if self.cli_output_mode in ("plain", "summary"):
             self.log_info(text)
 
     def log_session_warning(self, session_text: str) -> None:
@@ -729,7 +1017,7 @@ class AutoComLogger:
         text = f"⚠️ {session_text}"
         if self.cli_output_mode in ("table"):
             self.log_realtime_table_banner(text)
-        if self.cli_output_mode in ("plain"):
+        if self.cli_output_mode in ("plain", "summary"):
             self.log_warning(text)
 
     def log_session_error(self, session_text: str) -> None:
@@ -737,7 +1025,7 @@ class AutoComLogger:
         text = f"❌ {session_text}"
         if self.cli_output_mode in ("table"):
             self.log_realtime_table_banner(text)
-        if self.cli_output_mode in ("plain"):
+        if self.cli_output_mode in ("plain", "summary"):
             self.log_error(text)
 
     def log_session_end(self, session_text: str) -> None:
@@ -745,7 +1033,7 @@ class AutoComLogger:
         text = f"{session_text}"
         if self.cli_output_mode in ("table"):
             self.log_realtime_table_banner(text)
-        if self.cli_output_mode in ("plain"):
+        if self.cli_output_mode in ("plain", "summary"):
             self.log_info(text)
 
     ## 通用执行结果日志方法
@@ -764,28 +1052,27 @@ class AutoComLogger:
                 - time_str: Timestamp
                 - device: Device name
                 - command: Command executed
-                - response: Response message
+                - response: Response message (full; only a preview is shown)
                 - elapsed_ms: Elapsed time in milliseconds
+                - preview_chars: Max response characters shown (default 48)
 
         """
         device = kwargs.get("device", "UnknownDevice")
         elapsed_ms = kwargs.get("elapsed_ms", 0.0)
         command = kwargs.get("command", "UnknownCommand")
-        response = kwargs.get("response", "")
 
-        # Convert response to a single-line escaped string so control
-        # characters (e.g., \r, \n) and non-decodable bytes are visible
-        # as \r, \n, \xHH or \uXXXX sequences.
-        if isinstance(response, (bytes, bytearray)):
-            try:
-                decoded = response.decode("utf-8")
-            except Exception:
-                decoded = response.decode("latin-1", errors="ignore")
-            rp = decoded.encode("unicode_escape").decode("ascii")
-        elif isinstance(response, str):
-            rp = response.encode("unicode_escape").decode("ascii")
-        else:
-            rp = str(response).encode("unicode_escape").decode("ascii")
+        if self.cli_output_mode == "summary":
+            self._record_summary(device, result, elapsed_ms, command)
+            if self._forwarder is None and getattr(self, "_log_file", None) is None:
+                # 没有日志文件时不需要逐行结果
+                return
+
+        # Only the displayed prefix is escaped into a single line; the full
+        # response may be arbitrarily large.
+        rp = preview_response(
+            kwargs.get("response", ""),
+            kwargs.get("preview_chars", RESPONSE_PREVIEW_CHARS),
+        )
 
         # Build row following TablePrinter headers order
         row = [
@@ -799,8 +1086,8 @@ class AutoComLogger:
         # Prepare a concise message used for plain logging
         msg = f"{device} — {command} ({elapsed_ms:.2f}ms): {rp}"
 
-        # Emit realtime table row if requested
-        if self.cli_output_mode == "table":
+        # Emit realtime table row if requested (summary: log file only)
+        if self.cli_output_mode in ("table", "summary"):
             self.log_realtime_table_row(row)
 
         # Emit plain logger output if requested
@@ -810,6 +1097,62 @@ class AutoComLogger:
             else:
                 self.log_fail(msg)
 
+    def _record_summary(
+        self, device: str, result: bool, elapsed_ms: float, command: str
+    ) -> None:
+        """summary 模式: 把命令结果计入汇总"""
+        if self._forwarder is not None:
+            self._forwarder("summary", (device, result, elapsed_ms, command))
+            return
+        summary = self._summary
+        if summary is None:
+            with self._lock:
+                summary = self._summary
+                if summary is None:
+                    summary = LiveSummary(
+                        stream=self._console_handler.stream, output=self._output
+                    )
+                    summary.start()
+                    self._summary = summary
+                    # 所有执行模式在进程退出时都输出最终汇总；在异步输出之后注册，
+                    # 先于输出队列的收尾（atexit 按注册的逆序执行）
+                    atexit.register(self.finish_summary)
+        summary.record(device, result, elapsed_ms, command)
+
+    def finish_summary(self) -> None:
+        """停止 summary 模式的周期刷新并输出最终汇总（会话结束或进程退出时调用）"""
+        with self._lock:
+            summary, self._summary = self._summary, None
+        if summary is None:
+            return
+        atexit.unregister(self.finish_summary)
+        summary.stop()
+
+    # ========================================================================
+    # 跨进程转发
+    # ========================================================================
+
+    def set_forwarder(self, forwarder: Optional[Callable[[str, Any], None]]) -> None:
+        """
+        设置输出转发器(多进程分片模式)
+
+        设置后, 表格行/横幅/普通日志不再在本进程输出, 而是以 (kind, payload)
+        的形式交给 forwarder, 由协调进程通过 replay() 统一输出。传入 None 恢复本地输出。
+        """
+        self._forwarder = forwarder
+
+    def replay(self, kind: str, payload: Any, prefix: str = "") -> None:
+        """重放由其它进程 forwarder 转交的输出"""
+        if kind == "row":
+            self.log_realtime_table_row(payload)
+        elif kind == "banner":
+            self.log_realtime_table_banner(f"{prefix}{payload}")
+        elif kind == "log":
+            level, msg = payload
+            self._log(level, f"{prefix}{msg}")
+        elif kind == "summary":
+            self._record_summary(*payload)
+
     # ========================================================================
     # 扩展功能
     # ========================================================================
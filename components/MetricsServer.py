@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+OpenMetrics/Prometheus 指标端点 for AutoCom
+
+过夜/周末 soak 运行时无需查看日志即可实时观察执行状态。MetricsServer 在后台线程中
+运行标准库 http.server，``GET /metrics`` 以 OpenMetrics 文本格式返回：
+
+- autocom_commands_total{device,result}          命令执行次数（pass/fail）
+- autocom_command_latency_seconds{device,command} 命令延迟直方图
+- autocom_serial_sent_bytes_total / autocom_serial_received_bytes_total {device}
+- autocom_monitor_queue_depth{device}            监控设备的命令排队数
+- autocom_datastore_save_seconds / autocom_datastore_save_failures_total
+- autocom_log_dropped_records_total              异步日志因队列满丢弃的记录数
+
+指标在抓取时从执行器使用的 CommandMetrics、设备与 DataStore 读取，执行路径上
+没有额外开销；默认关闭，start_metrics_server() 启用后 get_metrics_server() 返回全局实例。
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+from components.CommandMetrics import CommandMetrics
+from components.Logger import get_logger
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 9464
+
+# 导出的延迟直方图上界（毫秒），由细粒度直方图累加得到
+LATENCY_BOUNDS_MS = (
+    1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000,
+)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: Any) -> str:
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Family:
+    """一个指标族的 TYPE/HELP 与样本行"""
+
+    def __init__(self, name: str, kind: str, help_text: str):
+        self.name = name
+        self.lines = [f"# TYPE {name} {kind}", f"# HELP {name} {help_text}"]
+        self.empty = True
+
+    def sample(self, suffix: str, labels: str, value: float) -> None:
+        self.lines.append(f"{self.name}{suffix}{labels} {_number(value)}")
+        self.empty = False
+
+
+class MetricsServer:
+    """后台线程中的 /metrics HTTP 端点"""
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        """
+        Args:
+            host: 监听地址（默认只监听本机）
+            port: 监听端口（0 表示由系统分配）
+        """
+        self._sources: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = server.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # 抓取请求不写入执行日志
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="AutoComMetricsServer", daemon=True
+        )
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        """实际监听的 (host, port)"""
+        return self._httpd.server_address[:2]
+
+    def start(self) -> "MetricsServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def bind(
+        self,
+        command_metrics: Optional[CommandMetrics] = None,
+        command_device_dict: Any = None,
+        data_store: Any = None,
+    ) -> None:
+        """设置当前会话的指标来源（新会话开始时替换上一个会话的来源）"""
+        with self._lock:
+            self._sources = {
+                "command_metrics": command_metrics,
+                "command_device_dict": command_device_dict,
+                "data_store": data_store,
+            }
+
+    def render(self) -> str:
+        """生成 OpenMetrics 文本"""
+        with self._lock:
+            sources = dict(self._sources)
+        families: List[_Family] = []
+
+        command_metrics = sources.get("command_metrics")
+        if command_metrics is not None:
+            families.extend(self._command_families(command_metrics))
+
+        command_device_dict = sources.get("command_device_dict")
+        if command_device_dict is not None:
+            families.extend(self._device_families(command_device_dict))
+
+        data_store = sources.get("data_store")
+        if data_store is not None and getattr(data_store, "started", True):
+            families.extend(self._data_store_families(data_store))
+
+        dropped = _Family(
+            "autocom_log_dropped_records",
+            "counter",
+            "Log records dropped because the asynchronous log queue was full.",
+        )
+        dropped.sample("_total", "", get_logger("AutoCom").dropped_records)
+        families.append(dropped)
+
+        lines = []
+        for family in families:
+            if not family.empty:
+                lines.extend(family.lines)
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _command_families(command_metrics: CommandMetrics) -> List[_Family]:
+        commands = _Family("autocom_commands", "counter", "Commands executed.")
+        latency = _Family(
+            "autocom_command_latency_seconds", "histogram", "Command response latency."
+        )
+        per_device: Dict[str, List[int]] = {}
+        for device, command, histogram in command_metrics.histograms():
+            totals = per_device.setdefault(device, [0, 0])
+            totals[0] += histogram.count - histogram.failed
+            totals[1] += histogram.failed
+
+            cumulative = histogram.cumulative_counts(LATENCY_BOUNDS_MS)
+            for bound, count in zip(LATENCY_BOUNDS_MS, cumulative):
+                latency.sample(
+                    "_bucket", _labels(device=device, command=command, le=bound / 1000), count
+                )
+            latency.sample(
+                "_bucket", _labels(device=device, command=command, le="+Inf"), histogram.count
+            )
+            latency.sample("_count", _labels(device=device, command=command), histogram.count)
+            latency.sample(
+                "_sum", _labels(device=device, command=command), histogram.total_us / 1e6
+            )
+
+        for device, (passed, failed) in per_device.items():
+            commands.sample("_total", _labels(device=device, result="pass"), passed)
+            commands.sample("_total", _labels(device=device, result="fail"), failed)
+        return [commands, latency]
+
+    @staticmethod
+    def _device_families(command_device_dict: Any) -> List[_Family]:
+        sent = _Family("autocom_serial_sent_bytes", "counter", "Bytes written to the serial port.")
+        received = _Family(
+            "autocom_serial_received_bytes", "counter", "Bytes read from the serial port."
+        )
+        for name, device in list(getattr(command_device_dict, "devices", {}).items()):
+            sent.sample("_total", _labels(device=name), getattr(device, "bytes_sent", 0))
+            received.sample("_total", _labels(device=name), getattr(device, "bytes_received", 0))
+
+        queue_depth = _Family(
+            "autocom_monitor_queue_depth", "gauge", "Commands waiting for a monitored device."
+        )
+        for name, monitor in list(getattr(command_device_dict, "device_monitors", {}).items()):
+            queue_depth.sample("", _labels(device=name), len(monitor.command_queue))
+        return [sent, received, queue_depth]
+
+    @staticmethod
+    def _data_store_families(data_store: Any) -> List[_Family]:
+        metrics = data_store.get_stats()["save_metrics"]
+        saves = _Family("autocom_datastore_save_seconds", "summary", "DataStore save latency.")
+        saves.sample("_count", "", metrics["saves"])
+        saves.sample("_sum", "", metrics["total_latency_ms"] / 1000)
+        failures = _Family(
+            "autocom_datastore_save_failures", "counter", "Failed DataStore saves."
+        )
+        failures.sample("_total", "", metrics["failed_saves"])
+        max_latency = _Family(
+            "autocom_datastore_save_max_seconds", "gauge", "Slowest DataStore save."
+        )
+        max_latency.sample("", "", metrics["max_latency_ms"] / 1000)
+        return [saves, failures, max_latency]
+
+
+_server: Optional[MetricsServer] = None
+_server_lock = threading.Lock()
+
+
+def get_metrics_server() -> Optional[MetricsServer]:
+    """返回当前启用的指标端点，未启用时为 None"""
+    return _server
+
+
+def start_metrics_server(port: int = DEFAULT_PORT, host: str = DEFAULT_HOST) -> MetricsServer:
+    """启动全局指标端点（已启动时先停止旧的）"""
+    global _server
+    with _server_lock:
+        if _server is not None:
+            _server.stop()
+        _server = MetricsServer(host, port).start()
+        return _server
+
+
+def stop_metrics_server() -> None:
+    global _server
+    with _server_lock:
+        server, _server = _server, None
+    if server is not None:
+        server.stop()
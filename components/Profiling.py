@@ -0,0 +1,279 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+性能剖析 for AutoCom
+
+运行变慢时定位时间花在哪里：
+
+- SessionProfiler: 整个会话的 cProfile（主线程及之后启动的线程各用一个 Profile，
+  结束时合并），在会话目录写出 ``profile.pstats`` 与按累计耗时排序的 ``profile.txt``
+- PhaseTimers: 各阶段的计时（次数/总耗时/最大耗时），按迭代汇总写入
+  ``phase_timers.jsonl``。启用时才给下列方法装上计时包装，关闭时恢复原方法，
+  未启用时没有任何额外开销：
+
+  ========================  ===============================================
+  variables                 CommonUtils.process_variables
+  send_command              Device.send_command（包含普通设备的响应等待与匹配）
+  matching                  CommandDeviceDict._should_finish_command（监控设备）
+  actions                   ActionHandler.handle_actions
+  write_to_log              Device.write_to_log
+  datastore_save            DataStore._incremental_save
+  ========================  ===============================================
+
+  计时为包含子调用的耗时，嵌套阶段（如 send_command 中的 write_to_log）会重叠。
+
+  计时不区分执行器：每行统计的是两次 begin_iteration 之间整个进程的耗时，
+  因此逐迭代的行只在顺序执行（单文件 -d、-f 文件夹）时有意义。Fleet 的各单元与
+  流水线迭代的各设备组并发调用 begin_iteration，行中会混有其它单元/迭代的计时，
+  此时只应参考会话合计（合计在所有模式下都准确）。
+"""
+
+import cProfile
+import functools
+import importlib
+import io
+import json
+import pstats
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from components.Logger import AutoComLogger, get_logger
+
+logger: AutoComLogger = get_logger("AutoCom")
+
+PROFILE_STATS_FILE = "profile.pstats"
+PROFILE_REPORT_FILE = "profile.txt"
+PHASE_TIMERS_FILE = "phase_timers.jsonl"
+
+# (阶段名, 模块, 类, 方法)
+PHASES = (
+    ("variables", "utils.common", "CommonUtils", "process_variables"),
+    ("send_command", "components.Device", "Device", "send_command"),
+    ("matching", "components.CommandDeviceDict", "CommandDeviceDict", "_should_finish_command"),
+    ("actions", "utils.ActionHandler", "ActionHandler", "handle_actions"),
+    ("write_to_log", "components.Device", "Device", "write_to_log"),
+    ("datastore_save", "components.DataStore", "DataStore", "_incremental_save"),
+)
+
+
+class SessionProfiler:
+    """会话级 cProfile，结束时在输出目录写出统计文件"""
+
+    def __init__(self, output_dir: str, report_lines: int = 60):
+        """
+        Args:
+            output_dir: 统计文件目录（会话目录）
+            report_lines: profile.txt 中列出的函数数量
+        """
+        self.output_dir = Path(output_dir)
+        self.report_lines = report_lines
+        self._profiles: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+        self._running = False
+        self._skipped_threads = False
+
+    def start(self) -> "SessionProfiler":
+        profile = cProfile.Profile()
+        profile.enable()
+        self._profiles.append(profile)
+        self._running = True
+        # 之后启动的线程在第一次函数调用时启用自己的 Profile
+        threading.setprofile(self._start_thread_profile)
+        return self
+
+    def _start_thread_profile(self, frame, event, arg) -> None:
+        sys.setprofile(None)
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+ 同一时间只允许一个 profiler，只剖析主线程
+            with self._lock:
+                warn, self._skipped_threads = not self._skipped_threads, True
+            if warn:
+                logger.log_session_warning(
+                    f"Profiler: thread '{threading.current_thread().name}' and later "
+                    f"threads are not profiled (Python {sys.version_info.major}."
+                    f"{sys.version_info.minor} allows only one active profiler)"
+                )
+            return
+        with self._lock:
+            if not self._running:
+                profile.disable()
+                return
+            self._profiles.append(profile)
+
+    def stop(self) -> Optional[Path]:
+        """停止剖析并写出统计文件，返回 profile.txt 路径"""
+        with self._lock:
+            if not self._running:
+                return None
+            self._running = False
+            profiles = list(self._profiles)
+        threading.setprofile(None)
+        for profile in profiles:
+            profile.disable()
+
+        stats = None
+        for profile in profiles:
+            try:
+                if stats is None:
+                    stats = pstats.Stats(profile)
+                else:
+                    stats.add(profile)
+            except TypeError:
+                # 线程未调用任何函数，没有可合并的数据
+                continue
+        if stats is None:
+            return None
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        stats.dump_stats(str(self.output_dir / PROFILE_STATS_FILE))
+        report = io.StringIO()
+        stats.stream = report
+        stats.sort_stats("cumulative").print_stats(self.report_lines)
+        report_path = self.output_dir / PROFILE_REPORT_FILE
+        report_path.write_text(report.getvalue(), encoding="utf-8")
+        return report_path
+
+
+class PhaseTimers:
+    """各阶段耗时统计，按迭代汇总"""
+
+    def __init__(self, output_path: Optional[str] = None):
+        """
+        Args:
+            output_path: 每轮迭代一行的 JSONL 文件（None 表示只保留会话合计）
+        """
+        self.output_path = output_path
+        self._lock = threading.Lock()
+        self._current: Dict[str, List[float]] = {}
+        self._totals: Dict[str, List[float]] = {}
+        self._iteration = None
+        self._patched: List[tuple] = []
+
+    def add(self, phase: str, seconds: float) -> None:
+        with self._lock:
+            stats = self._current.get(phase)
+            if stats is None:
+                stats = self._current[phase] = [0, 0.0, 0.0]
+            stats[0] += 1
+            stats[1] += seconds
+            if seconds > stats[2]:
+                stats[2] = seconds
+
+    def _timed(self, phase: str, func):
+        perf_counter = time.perf_counter
+        add = self.add
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                add(phase, perf_counter() - start)
+
+        return wrapper
+
+    def install(self) -> "PhaseTimers":
+        """给各阶段方法装上计时包装"""
+        if self._patched:
+            return self
+        for phase, module_name, class_name, attr in PHASES:
+            owner = getattr(importlib.import_module(module_name), class_name)
+            original = owner.__dict__[attr]
+            if isinstance(original, staticmethod):
+                timed = staticmethod(self._timed(phase, original.__func__))
+            elif isinstance(original, classmethod):
+                timed = classmethod(self._timed(phase, original.__func__))
+            else:
+                timed = self._timed(phase, original)
+            setattr(owner, attr, timed)
+            self._patched.append((owner, attr, original))
+        return self
+
+    def uninstall(self) -> None:
+        """恢复原方法，并写出最后一轮迭代的统计"""
+        for owner, attr, original in reversed(self._patched):
+            setattr(owner, attr, original)
+        self._patched = []
+        self.begin_iteration(None)
+
+    def begin_iteration(self, iteration: Any) -> None:
+        """
+        结束上一轮迭代的统计（写入 JSONL 并计入合计），开始新一轮
+
+        计时是进程级的，并发调用（Fleet 单元、流水线设备组）时各行会混有
+        其它单元的计时，见模块说明。
+        """
+        with self._lock:
+            current, self._current = self._current, {}
+            previous, self._iteration = self._iteration, iteration
+            for phase, (count, total, peak) in current.items():
+                stats = self._totals.setdefault(phase, [0, 0.0, 0.0])
+                stats[0] += count
+                stats[1] += total
+                stats[2] = max(stats[2], peak)
+        if current and self.output_path:
+            record = {"iteration": previous, "phases": self._format(current)}
+            try:
+                with open(self.output_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            except OSError:
+                pass
+
+    @staticmethod
+    def _format(phases: Dict[str, List[float]]) -> Dict[str, dict]:
+        return {
+            phase: {
+                "count": count,
+                "total_ms": round(total * 1000, 3),
+                "max_ms": round(peak * 1000, 3),
+            }
+            for phase, (count, total, peak) in phases.items()
+        }
+
+    def totals(self) -> Dict[str, dict]:
+        """已结束迭代的各阶段合计"""
+        with self._lock:
+            return self._format(self._totals)
+
+    def summary_lines(self) -> List[str]:
+        lines = []
+        for phase, stats in sorted(
+            self.totals().items(), key=lambda item: -item[1]["total_ms"]
+        ):
+            lines.append(
+                f"⏱ {phase}: n={stats['count']} total={stats['total_ms'] / 1000:.3f}s "
+                f"mean={stats['total_ms'] / stats['count']:.3f}ms max={stats['max_ms']:.3f}ms"
+            )
+        return lines
+
+
+_timers: Optional[PhaseTimers] = None
+
+
+def get_phase_timers() -> Optional[PhaseTimers]:
+    """返回当前启用的阶段计时，未启用时为 None"""
+    return _timers
+
+
+def enable_phase_timers(output_path: Optional[str] = None) -> PhaseTimers:
+    """启用全局阶段计时（已启用时先关闭旧的）"""
+    global _timers
+    disable_phase_timers()
+    _timers = PhaseTimers(output_path).install()
+    return _timers
+
+
+def disable_phase_timers() -> Optional[PhaseTimers]:
+    """关闭阶段计时并恢复原方法，返回被关闭的实例"""
+    global _timers
+    timers, _timers = _timers, None
+    if timers is not None:
+        timers.uninstall()
+    return timers
@@ -0,0 +1,286 @@
+"""
+会话目录索引（Session catalog）
+
+数据目录下的 ``catalog.json`` 记录每个文件型会话（snapshot / journal 模式）的
+路径、时间范围、文件大小以及 设备 -> 变量名 集合：
+
+    {
+      "version": 1,
+      "last_cleanup": 1760000000.0,
+      "sessions": {
+        "2026-10-19_101500": {
+          "path": "temps/data_store/session_2026-10-19_101500.json",
+          "first_ts": 1760000000.0,
+          "last_ts": 1760000300.0,
+          "size": 2048,
+          "keys": {"DeviceA": ["IMEI", "CSQ"]}
+        }
+      }
+    }
+
+DataStore 在保存后更新对应条目；列出会话、按时间过滤、跨会话查询（按变量名
+跳过不相关的会话）和过期清理都只读取目录文件，不再 glob/stat 整个数据目录。
+目录文件不存在时（旧版本留下的数据目录）会扫描一次会话文件重建。
+SQLite 后端的会话由数据库自身的索引管理，不记录在目录中。
+
+多个进程（例如同时运行的多个 AutoCom 实例）可能共用同一数据目录：每次
+读-改-写都持有 ``catalog.json.lock`` 上的系统文件锁，新内容先写入同目录下的唯一
+临时文件再原子替换。
+"""
+
+import errno
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from components.DataHistory import HISTORY_SUFFIX
+from components.DataJournal import COMPACTING_SUFFIX, JOURNAL_SUFFIX
+from components.DataSerializer import load_file
+from components.Logger import AutoComLogger, get_logger
+
+logger: AutoComLogger = get_logger(name="AutoCom")
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+CATALOG_FILENAME = "catalog.json"
+CATALOG_VERSION = 1
+LOCK_SUFFIX = ".lock"
+
+# 同一进程内多个 DataStore 共享同一目录文件时使用同一把锁（文件锁只在进程间互斥）
+_locks: Dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+def _lock_for(path: str) -> threading.Lock:
+    key = os.path.abspath(path)
+    with _locks_guard:
+        if key not in _locks:
+            _locks[key] = threading.Lock()
+        return _locks[key]
+
+
+@contextmanager
+def _file_lock(path: str):
+    """在 path 上持有排他的系统文件锁（跨进程）"""
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            return
+        f.seek(0)
+        while True:
+            try:
+                # LK_LOCK 重试约 10 秒后抛出 OSError，继续等待
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                break
+            except OSError as e:
+                if e.errno != errno.EDEADLOCK:
+                    raise
+        try:
+            yield
+        finally:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def session_id_from_path(path) -> str:
+    return os.path.basename(str(path)).replace("session_", "").replace(".json", "")
+
+
+def _key_set(data: dict) -> Dict[str, List[str]]:
+    return {device: sorted(variables) for device, variables in data.items()}
+
+
+class SessionCatalog:
+    """数据目录的会话索引文件"""
+
+    def __init__(self, data_dir):
+        self.data_dir = str(data_dir)
+        self.path = os.path.join(self.data_dir, CATALOG_FILENAME)
+        self._lock = _lock_for(self.path)
+
+    @contextmanager
+    def _locked(self):
+        """进程内线程锁 + 进程间文件锁，保护目录文件的读-改-写"""
+        with self._lock:
+            os.makedirs(self.data_dir, exist_ok=True)
+            with _file_lock(self.path + LOCK_SUFFIX):
+                yield
+
+    # ------------------------------------------------------------------
+    # 读写
+    # ------------------------------------------------------------------
+
+    def _read(self) -> Optional[dict]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                catalog = json.load(f)
+            if catalog.get("version") == CATALOG_VERSION:
+                return catalog
+        except FileNotFoundError:
+            return None
+        except (json.JSONDecodeError, OSError, AttributeError) as e:
+            logger.log_session_error(f"Session catalog {self.path} unreadable: {e}")
+        return None
+
+    def _write(self, catalog: dict) -> None:
+        os.makedirs(self.data_dir, exist_ok=True)
+        fd, temp_file = tempfile.mkstemp(
+            prefix=f"{CATALOG_FILENAME}.", suffix=".tmp", dir=self.data_dir
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(catalog, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(temp_file, self.path)
+        except BaseException:
+            try:
+                os.remove(temp_file)
+            except OSError:
+                pass
+            raise
+
+    def _load_locked(self) -> dict:
+        catalog = self._read()
+        if catalog is None:
+            catalog = self._scan()
+            self._write(catalog)
+        return catalog
+
+    def _scan(self) -> dict:
+        """扫描数据目录中的会话文件重建目录"""
+        sessions = {}
+        for filepath in Path(self.data_dir).glob("session_*.json"):
+            try:
+                stat = filepath.stat()
+                data = load_file(filepath)
+                sessions[session_id_from_path(filepath)] = {
+                    "path": str(filepath),
+                    "first_ts": stat.st_mtime,
+                    "last_ts": stat.st_mtime,
+                    "size": stat.st_size,
+                    "keys": _key_set(data) if isinstance(data, dict) else {},
+                }
+            except Exception as e:
+                logger.log_session_error(f"Error indexing session file {filepath}: {e}")
+        return {"version": CATALOG_VERSION, "last_cleanup": 0.0, "sessions": sessions}
+
+    def rebuild(self) -> int:
+        """重新扫描数据目录（手动放入或删除会话文件后使用），返回会话数"""
+        with self._locked():
+            catalog = self._scan()
+            previous = self._read()
+            if previous is not None:
+                catalog["last_cleanup"] = previous.get("last_cleanup", 0.0)
+            self._write(catalog)
+            return len(catalog["sessions"])
+
+    # ------------------------------------------------------------------
+    # 更新
+    # ------------------------------------------------------------------
+
+    def update(
+        self, session_id: str, path: str, keys: Dict[str, List[str]], ts: Optional[float] = None
+    ) -> None:
+        """保存后更新会话条目"""
+        ts = time.time() if ts is None else ts
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = 0
+        with self._locked():
+            catalog = self._load_locked()
+            entry = catalog["sessions"].setdefault(session_id, {"first_ts": ts})
+            entry.update(path=str(path), last_ts=ts, size=size, keys=keys)
+            self._write(catalog)
+
+    def remove(self, session_ids: List[str], delete_files: bool = False) -> int:
+        """从目录中移除会话，delete_files 时同时删除会话文件及其备份/日志"""
+        removed = 0
+        with self._locked():
+            catalog = self._load_locked()
+            for session_id in session_ids:
+                entry = catalog["sessions"].pop(session_id, None)
+                if entry is None:
+                    continue
+                removed += 1
+                if not delete_files:
+                    continue
+                path = entry["path"]
+                for target in (
+                    path,
+                    f"{path}.backup",
+                    f"{path}{JOURNAL_SUFFIX}",
+                    f"{path}{COMPACTING_SUFFIX}",
+                    f"{path}{HISTORY_SUFFIX}",
+                ):
+                    try:
+                        os.remove(target)
+                    except FileNotFoundError:
+                        pass
+                    except OSError as e:
+                        logger.log_session_error(f"Error removing {target}: {e}")
+            self._write(catalog)
+        return removed
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+
+    def sessions(
+        self, since: Optional[float] = None, until: Optional[float] = None
+    ) -> List[Tuple[str, dict]]:
+        """按最后保存时间列出会话（最新的在前）"""
+        with self._locked():
+            catalog = self._load_locked()
+        result = [
+            (session_id, entry)
+            for session_id, entry in catalog["sessions"].items()
+            if (since is None or entry["last_ts"] >= since)
+            and (until is None or entry["last_ts"] < until)
+        ]
+        result.sort(key=lambda item: item[1]["last_ts"], reverse=True)
+        return result
+
+    # ------------------------------------------------------------------
+    # 过期清理
+    # ------------------------------------------------------------------
+
+    def claim_cleanup(self, interval: float) -> bool:
+        """距上次清理超过 interval 秒时记录本次清理并返回 True（每个间隔最多一次）"""
+        with self._locked():
+            catalog = self._read()
+            if catalog is None:
+                # 目录尚未建立，由清理线程在后台重建
+                return True
+            now = time.time()
+            if now - catalog.get("last_cleanup", 0.0) < interval:
+                return False
+            catalog["last_cleanup"] = now
+            self._write(catalog)
+            return True
+
+    def cleanup(self, cutoff: float, keep: Tuple[str, ...] = ()) -> int:
+        """删除最后保存时间早于 cutoff 的会话文件，返回删除的会话数"""
+        stale = [
+            session_id
+            for session_id, _ in self.sessions(until=cutoff)
+            if session_id not in keep
+        ]
+        removed = self.remove(stale, delete_files=True) if stale else 0
+        with self._locked():
+            catalog = self._load_locked()
+            catalog["last_cleanup"] = time.time()
+            self._write(catalog)
+        return removed
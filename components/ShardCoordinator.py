@@ -0,0 +1,491 @@
+"""
+多进程分片执行
+
+把 Devices 按命令量切分到多个 worker 进程，每个 worker 拥有独立的串口、
+CommandExecutor 和内存 DataStore。协调者（父进程）负责：
+
+- 跨设备顺序屏障：按执行配置文件顺序把命令切分为若干步骤(step)，
+  涉及多个分片的步骤在所有相关分片完成后才进入下一步；
+- DataStore 同步：每一步结束后 worker 回传数据增量，协调者合并到
+  持久化的主 DataStore，并在下一步开始前把其它分片的增量下发；
+- 结果表合并：worker 的日志/表格行被转发到协调者统一输出。
+
+屏障模式：
+- "ordered"   (默认) 保持单进程模式下的命令先后语义
+- "iteration" 每轮迭代只同步一次，分片之间在迭代内完全并行
+"""
+
+import os
+import queue
+import multiprocessing
+from typing import Any, Dict, List, Optional, Tuple
+
+from components.CommandMetrics import CommandMetrics
+from components.DataStore import DataStore
+from components.ExecutionPolicy import ExecutionPolicy, SessionGuard
+from components.Logger import AutoComLogger, get_logger
+from components.MetricsServer import get_metrics_server
+from utils.dirs import get_dirs
+
+logger: AutoComLogger = get_logger("AutoCom")
+
+BARRIER_MODES = ("ordered", "iteration")
+
+
+def partition_devices(devices: List[dict], commands: List[dict], shard_count: int):
+    """按命令数量贪心分配设备到分片
+
+    Args:
+        devices: 执行配置文件中的 Devices 列表
+        commands: 执行配置文件中的 Commands 列表
+        shard_count: 期望的分片数量
+
+    Returns:
+        List[List[str]]: 每个分片包含的设备名（保持 Devices 中的原始顺序），不含空分片
+    """
+    names = [d["name"] for d in devices if d.get("status", "enabled") == "enabled"]
+    if not names:
+        return []
+    shard_count = max(1, min(shard_count, len(names)))
+
+    weights = {name: 0 for name in names}
+    for cmd in commands:
+        if cmd.get("status") == "disabled":
+            continue
+        if cmd.get("device") in weights:
+            weights[cmd["device"]] += 1
+
+    loads = [0] * shard_count
+    assignment: Dict[str, int] = {}
+    # 重的设备先分配，权重相同时保持原顺序
+    for name in sorted(names, key=lambda n: -max(weights[n], 1)):
+        target = loads.index(min(loads))
+        assignment[name] = target
+        loads[target] += max(weights[name], 1)
+
+    shards = [[n for n in names if assignment[n] == s] for s in range(shard_count)]
+    return [s for s in shards if s]
+
+
+def build_shard_steps(
+    commands: List[dict], device_to_shard: Dict[str, int], barrier: str = "ordered"
+):
+    """把命令列表切分为带屏障的步骤
+
+    一个执行单元是一条顺序命令或一个并行块（相邻、order 相同的 parallel 命令）。
+    连续且只涉及同一个分片的单元会被合并到同一步骤中，减少同步次数。
+
+    Returns:
+        List[dict]: 每个步骤 {"shards": set, "commands": {shard: [cmd, ...]}}
+    """
+    if barrier not in BARRIER_MODES:
+        raise ValueError(
+            f"Unknown shard barrier '{barrier}', expected one of {BARRIER_MODES}"
+        )
+
+    active = [c for c in commands if c.get("device") in device_to_shard]
+
+    if barrier == "iteration":
+        step_cmds: Dict[int, List[dict]] = {}
+        for cmd in active:
+            step_cmds.setdefault(device_to_shard[cmd["device"]], []).append(cmd)
+        return [{"shards": set(step_cmds), "commands": step_cmds}] if active else []
+
+    # ordered: 先切分执行单元
+    units = []
+    i = 0
+    while i < len(active):
+        unit = [active[i]]
+        if active[i].get("concurrent_strategy") == "parallel":
+            order = active[i].get("order")
+            j = i + 1
+            while (
+                j < len(active)
+                and active[j].get("concurrent_strategy") == "parallel"
+                and active[j].get("order") == order
+            ):
+                unit.append(active[j])
+                j += 1
+            i = j
+        else:
+            i += 1
+        units.append(unit)
+
+    steps: List[dict] = []
+    for unit in units:
+        shards = {device_to_shard[c["device"]] for c in unit}
+        if (
+            steps
+            and len(shards) == 1
+            and steps[-1]["shards"] == shards
+            and unit[0].get("concurrent_strategy") != "parallel"
+        ):
+            (only,) = shards
+            steps[-1]["commands"][only].extend(unit)
+            continue
+        step_cmds = {}
+        for cmd in unit:
+            step_cmds.setdefault(device_to_shard[cmd["device"]], []).append(cmd)
+        steps.append({"shards": shards, "commands": step_cmds})
+    return steps
+
+
+def _diff_data(before: dict, after: dict) -> dict:
+    """计算两份 DataStore 快照之间的增量"""
+    delta: Dict[str, Any] = {"set": {}, "del": []}
+    for device, variables in after.items():
+        old = before.get(device, {})
+        if old is variables:
+            # 写时复制：未修改的设备在两个快照中是同一个 dict
+            continue
+        for key, value in variables.items():
+            if key not in old or old[key] != value:
+                delta["set"].setdefault(device, {})[key] = value
+    for device, variables in before.items():
+        new = after.get(device, {})
+        for key in variables:
+            if key not in new:
+                delta["del"].append([device, key])
+    return delta
+
+
+def _apply_delta(data_store: DataStore, delta: dict) -> None:
+    for device, variables in delta.get("set", {}).items():
+        for key, value in variables.items():
+            data_store.store_data(device, key, value)
+    for device, key in delta.get("del", []):
+        data_store.delete_data(device, key)
+
+
+def _shard_worker_main(spec: dict, result_queue, control_queue) -> None:
+    """分片 worker 进程入口（spawn 启动，必须位于模块顶层）"""
+    from components.CommandExecutor import CommandExecutor
+
+    shard = spec["shard"]
+    # 确保与协调者使用同一个会话目录
+    get_dirs().session_dir
+
+    worker_logger = get_logger("AutoCom")
+    # 与协调者使用同一输出模式（summary 模式下转发命令结果而非表格行）
+    worker_logger.cli_output_mode = spec.get("cli_output_mode", worker_logger.cli_output_mode)
+    worker_logger.set_forwarder(
+        lambda kind, payload: result_queue.put(("log", shard, kind, payload))
+    )
+
+    executor = None
+    try:
+        data_store = DataStore(
+            session_id=spec["session_id"], persist=False, auto_cleanup=False
+        )
+        _apply_delta(data_store, {"set": spec["initial_data"]})
+        executor = CommandExecutor(spec["dict_data"], data_store=data_store)
+        devices = executor.command_device_dict.devices
+        # 命令结果随每一步的结果回传，由协调者汇总到 command_metrics
+        samples = []
+        executor.command_listeners.append(lambda *sample: samples.append(sample))
+        result_queue.put(("ready", shard))
+
+        while True:
+            message = control_queue.get()
+            if message[0] == "stop":
+                break
+
+            _, iteration, total, step_idx, step_cmds, deltas = message
+            for delta in deltas:
+                _apply_delta(data_store, delta)
+
+            if step_idx == 0:
+                for device in devices.values():
+                    device.mark_iteration(iteration, total)
+
+            before_version, before = data_store.snapshot()
+            passed = True
+            if step_cmds:
+                try:
+                    passed = executor.execute(step_cmds)
+                except Exception as e:
+                    worker_logger.log_iteration_error(
+                        f"Error during iteration {iteration}: {e}"
+                    )
+                    passed = False
+            after_version, after = data_store.snapshot()
+            delta = (
+                {"set": {}, "del": []}
+                if after_version == before_version
+                else _diff_data(before, after)
+            )
+            aborted = executor.iteration_token.cancelled
+            step_samples, samples[:] = list(samples), []
+            result_queue.put(
+                ("step", shard, iteration, step_idx, passed, delta, aborted, step_samples)
+            )
+    except BaseException as e:
+        result_queue.put(("error", shard, f"{type(e).__name__}: {e}"))
+    finally:
+        if executor is not None:
+            try:
+                executor.command_device_dict.close_all_devices()
+                executor.shutdown()
+            except Exception:
+                pass
+        worker_logger.set_forwarder(None)
+        result_queue.put(("done", shard))
+
+
+class ShardCoordinator:
+    """多进程分片执行协调者"""
+
+    def __init__(
+        self,
+        dict_data: dict,
+        shard_count: Optional[int] = None,
+        barrier: str = "ordered",
+        session_id: Optional[str] = None,
+    ):
+        if barrier not in BARRIER_MODES:
+            raise ValueError(
+                f"Unknown shard barrier '{barrier}', expected one of {BARRIER_MODES}"
+            )
+        self.dict_data = dict_data
+        self.barrier = barrier
+        self.session_id = session_id
+
+        devices = dict_data.get("Devices", [])
+        commands = dict_data.get("Commands", [])
+        if not shard_count:
+            shard_count = os.cpu_count() or 1
+        self.shards = partition_devices(devices, commands, shard_count)
+        self.device_to_shard = {
+            name: idx for idx, names in enumerate(self.shards) for name in names
+        }
+
+        for cmd in commands:
+            if cmd.get("device") not in self.device_to_shard:
+                logger.log_session_warning(
+                    f"Command '{cmd.get('command')}' targets unknown or disabled device "
+                    f"'{cmd.get('device')}', skipped in shard mode"
+                )
+
+        self.steps = build_shard_steps(commands, self.device_to_shard, barrier)
+
+        self.data_store: Optional[DataStore] = None
+        # 各分片回传的 (设备, 命令) 延迟直方图
+        self.command_metrics = CommandMetrics()
+        self._processes: List[Any] = []
+        self._control_queues: List[Any] = []
+        self._result_queue = None
+        self._pending_deltas: List[List[dict]] = [[] for _ in self.shards]
+
+    # ==================== 进程管理 ====================
+
+    def _resolve_constants(self) -> dict:
+        """在协调者中解析常量（包括需要用户输入的），worker 只接收最终值"""
+        from components.CommandExecutor import CommandExecutor
+
+        keys = self.dict_data.get("Constants", {})
+        CommandExecutor.load_constants(keys, self.data_store)
+        return {key: self.data_store.get_data("Constants", key) for key in keys}
+
+    def _shard_dict(self, shard: int, constants: dict) -> dict:
+        names = set(self.shards[shard])
+        shard_dict = {
+            key: value
+            for key, value in self.dict_data.items()
+            if key not in ("Devices", "Commands", "Constants")
+        }
+        shard_dict["Devices"] = [
+            d for d in self.dict_data.get("Devices", []) if d.get("name") in names
+        ]
+        shard_dict["Commands"] = [
+            c for c in self.dict_data.get("Commands", []) if c.get("device") in names
+        ]
+        if constants:
+            shard_dict["Constants"] = dict(constants)
+        return shard_dict
+
+    def _start_workers(self) -> None:
+        # worker 通过环境变量复用同一个会话目录，设备日志集中在一起
+        os.environ["AUTOCOM_SESSION_DIR"] = str(get_dirs().session_dir)
+
+        ctx = multiprocessing.get_context("spawn")
+        self._result_queue = ctx.Queue()
+        constants = self._resolve_constants()
+        initial_data = self.data_store.get_all_data()
+
+        for shard in range(len(self.shards)):
+            control_queue = ctx.Queue()
+            spec = {
+                "shard": shard,
+                "session_id": self.data_store.get_session_id(),
+                "dict_data": self._shard_dict(shard, constants),
+                "initial_data": initial_data,
+                "cli_output_mode": logger.cli_output_mode,
+            }
+            process = ctx.Process(
+                target=_shard_worker_main,
+                args=(spec, self._result_queue, control_queue),
+                name=f"AutoComShard-{shard}",
+                daemon=True,
+            )
+            process.start()
+            self._processes.append(process)
+            self._control_queues.append(control_queue)
+            logger.log_session_start(
+                f"Shard {shard} started (pid {process.pid}): {', '.join(self.shards[shard])}"
+            )
+
+        pending = set(range(len(self.shards)))
+        while pending:
+            message = self._next_message()
+            if message[0] == "ready":
+                pending.discard(message[1])
+
+    def _next_message(self) -> tuple:
+        """读取下一条 worker 消息，期间转发日志并检测 worker 异常退出"""
+        while True:
+            try:
+                message = self._result_queue.get(timeout=0.5)
+            except queue.Empty:
+                for shard, process in enumerate(self._processes):
+                    if not process.is_alive():
+                        raise RuntimeError(
+                            f"Shard {shard} exited unexpectedly (exit code {process.exitcode})"
+                        )
+                continue
+
+            kind = message[0]
+            if kind == "log":
+                _, shard, log_kind, payload = message
+                logger.replay(log_kind, payload, prefix=f"[shard-{shard}] ")
+                continue
+            if kind == "error":
+                raise RuntimeError(f"Shard {message[1]} failed: {message[2]}")
+            return message
+
+    def _stop_workers(self) -> None:
+        for control_queue in self._control_queues:
+            try:
+                control_queue.put(("stop",))
+            except Exception:
+                pass
+
+        remaining = {i for i, p in enumerate(self._processes) if p.is_alive()}
+        while remaining and self._result_queue is not None:
+            try:
+                message = self._result_queue.get(timeout=5)
+            except queue.Empty:
+                break
+            if message[0] == "log":
+                logger.replay(message[2], message[3], prefix=f"[shard-{message[1]}] ")
+            elif message[0] == "done":
+                remaining.discard(message[1])
+
+        for shard, process in enumerate(self._processes):
+            process.join(timeout=5)
+            if process.is_alive():
+                logger.log_session_warning(
+                    f"Shard {shard} did not stop gracefully, terminating"
+                )
+                process.terminate()
+                process.join(timeout=1)
+
+    # ==================== 执行 ====================
+
+    def _run_step(
+        self, iteration: int, total, step_idx: int, step: dict
+    ) -> Tuple[bool, bool]:
+        # 第 0 步广播给所有分片，以便每个设备日志都记录迭代标记
+        targets = range(len(self.shards)) if step_idx == 0 else sorted(step["shards"])
+        for shard in targets:
+            deltas, self._pending_deltas[shard] = self._pending_deltas[shard], []
+            self._control_queues[shard].put(
+                (
+                    "run",
+                    iteration,
+                    total,
+                    step_idx,
+                    step["commands"].get(shard, []),
+                    deltas,
+                )
+            )
+
+        passed = True
+        aborted = False
+        waiting = set(targets)
+        while waiting:
+            _, shard, _, _, step_passed, delta, step_aborted, samples = self._next_message()
+            waiting.discard(shard)
+            for sample in samples:
+                self.command_metrics.record_command(*sample)
+            passed = passed and step_passed
+            aborted = aborted or step_aborted
+            if delta["set"] or delta["del"]:
+                _apply_delta(self.data_store, delta)
+                for other in range(len(self.shards)):
+                    if other != shard:
+                        self._pending_deltas[other].append(delta)
+        return passed, aborted
+
+    def run_iteration(self, iteration: int, total=None) -> bool:
+        """执行一轮迭代，返回是否全部通过"""
+        passed = True
+        # 分片同步回来的变量在协调者的 DataStore 中按本轮迭代记录历史
+        self.data_store.set_iteration(iteration)
+        steps = self.steps or [{"shards": set(), "commands": {}}]
+        for step_idx, step in enumerate(steps):
+            step_passed, aborted = self._run_step(iteration, total, step_idx, step)
+            if not step_passed:
+                passed = False
+            if aborted:
+                # 关键命令失败：跳过本轮剩余步骤
+                logger.log_iteration_warning(
+                    f"Iteration {iteration} aborted, {len(steps) - step_idx - 1} remaining steps skipped"
+                )
+                break
+        return passed
+
+    def run(self, loop_count: int = 3, infinite_loop: bool = False) -> Tuple[int, int]:
+        """启动分片并执行迭代
+
+        Returns:
+            (executed_count, failure_count)
+        """
+        executed_count = 0
+        failure_count = 0
+        if not self.shards:
+            logger.log_session_warning("No enabled devices, nothing to shard")
+            return executed_count, failure_count
+
+        self.data_store = DataStore.from_config(
+            self.dict_data.get("ConfigForDataStore"), session_id=self.session_id
+        )
+        metrics_server = get_metrics_server()
+        if metrics_server is not None:
+            # 串口与监控队列位于 worker 进程中，端点只导出命令与 DataStore 指标
+            metrics_server.bind(self.command_metrics, None, self.data_store)
+        logger.log_session_start(
+            f"Shard mode: {len(self.shards)} shards, {len(self.steps)} steps per iteration, "
+            f"barrier={self.barrier}"
+        )
+        # 会话级策略在迭代之间检查（worker 内正在进行的等待不会被打断）
+        session_guard = SessionGuard(
+            ExecutionPolicy.from_config(self.dict_data.get("ConfigForIterations"))
+        ).start()
+        try:
+            self._start_workers()
+            total = None if infinite_loop else loop_count
+            while (
+                infinite_loop or executed_count < loop_count
+            ) and not session_guard.should_stop():
+                current_iteration = executed_count + 1
+                passed = self.run_iteration(current_iteration, total)
+                if not passed:
+                    failure_count += 1
+                executed_count += 1
+                session_guard.record(passed)
+                logger.log_iteration_end(iteration=current_iteration, total=loop_count)
+        finally:
+            session_guard.cancel()
+            self._stop_workers()
+            self.data_store.stop()
+        return executed_count, failure_count
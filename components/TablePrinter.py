@@ -1,9 +1,26 @@
+import atexit
+import functools
 import shutil
 import re
+import threading
 from typing import List, Optional, Any, Dict, Union
 from pathlib import Path
 from wcwidth import wcswidth, wcwidth
 
+# 表格日志文件的写缓冲大小（异步日志时 flush_rows=False，数据行在横幅/表尾/flush() 时落盘）
+FILE_BUFFER_SIZE = 64 * 1024
+
+
+@functools.lru_cache(maxsize=4096)
+def _wide_display_width(text: str) -> int:
+    """非 ASCII 文本的显示宽度（设备名、命令、状态等重复出现的字符串命中缓存）"""
+    try:
+        w = wcswidth(text)
+        return w if w >= 0 else len(text)
+    except Exception:
+        return len(text)
+
+
 class TablePrinter:
     """统一的表格打印器"""
     log_file_path = None
@@ -15,7 +32,9 @@ class TablePrinter:
                  auto_terminal: bool = True,
                  width_mode: str = "proportional",
                  column_ratios: Optional[List[float]] = None,
-                 fixed_widths: Optional[List[int]] = None):
+                 fixed_widths: Optional[List[int]] = None,
+                 row_separators: bool = True,
+                 flush_rows: bool = True):
         """
         初始化表格打印器
         
@@ -24,6 +43,9 @@ class TablePrinter:
             max_width: 最大宽度
             min_width: 最小宽度
             auto_terminal: 是否自动使用终端宽度
+            row_separators: 实时打印时是否在每行数据下方输出分隔线
+            flush_rows: 每行数据立即写入日志文件；False 时留在缓冲区，
+                在横幅、表尾或 flush() 时一并写入
         """
         self.headers = headers
         self.max_width = max_width
@@ -39,6 +61,13 @@ class TablePrinter:
             custom_ratios=self.column_ratios,
             fixed_widths=self.fixed_widths,
         )
+        self.row_separators = row_separators
+        self.flush_rows = flush_rows
+        self._file_lock = threading.Lock()
+        # 表格日志文件句柄，首次写入时打开
+        self._log_handle = None
+        self._log_handle_path = None
+        self._border_cache: Dict[tuple, str] = {}
         self.data = []
         self.terminal_width = None
         
@@ -55,11 +84,10 @@ class TablePrinter:
 
     def _display_width(self, text: str) -> int:
         """返回字符串的显示宽度，失败时回退到字符长度"""
-        try:
-            w = wcswidth(text)
-            return w if w >= 0 else len(text)
-        except Exception:
+        if text.isascii():
+            # ASCII 可打印字符宽度均为 1，控制字符 wcswidth 返回 -1 时同样回退到长度
             return len(text)
+        return _wide_display_width(text)
 
     def _truncate_text_to_width(self, text: str, width: int, ellipsis: str = '..') -> str:
         """按显示宽度截断文本，保留尾部省略符号"""
@@ -67,6 +95,8 @@ class TablePrinter:
             return ''
         ell_w = self._display_width(ellipsis)
         target = max(0, width - ell_w)
+        if text.isascii():
+            return text if len(text) <= target else text[:target] + ellipsis
         cur = 0
         cut_index = 0
         for j, ch in enumerate(text):
@@ -311,17 +341,18 @@ class TablePrinter:
             self._print_header(log_file, is_print)
             self._header_printed = True
         
-        # 打印数据行
+        # 打印数据行（行与分隔线一次输出）
         line = self._build_data_line(row, self.widths)
-        sep_line = self._build_border_line(self.widths, 'middle')
+        if self.row_separators:
+            output = line + '\n' + self._build_border_line(self.widths, 'middle')
+        else:
+            output = line
 
         if is_print:
-            print(line)
-            print(sep_line)
+            print(output)
 
         if log_file:
-            self._write_to_file(log_file, line)
-            self._write_to_file(log_file, sep_line)
+            self._write_to_file(log_file, output, flush=self.flush_rows)
 
         return line
 
@@ -345,13 +376,13 @@ class TablePrinter:
         right_pad = merged_inner - disp_w - left_pad
         content_line = '│' + ' ' * left_pad + content_text + ' ' * right_pad + '│'
 
+        output = content_line + '\n' + sep_line
+
         if is_print:
-            print(content_line)
-            print(sep_line)
+            print(output)
 
         if log_file:
-            self._write_to_file(log_file, content_line)
-            self._write_to_file(log_file, sep_line)
+            self._write_to_file(log_file, output)
     
     def print_realtime_footer(self, log_file: Optional[str] = None, is_print: bool = True):
         """打印表格底部边框（适用于实时打印结束时）"""
@@ -405,14 +436,12 @@ class TablePrinter:
         else:  # middle
             start, middle, end = '├', '┼', '┤'
         
-        segments = [start]
-        for i, w in enumerate(widths):
-            segments.append('─' * w)
-            if i < len(widths) - 1:
-                segments.append(middle)
-        segments.append(end)
-        
-        return ''.join(segments)
+        key = (position, tuple(widths))
+        line = self._border_cache.get(key)
+        if line is None:
+            line = start + middle.join('─' * w for w in widths) + end
+            self._border_cache[key] = line
+        return line
     
     def _build_data_line(self, row: List[Any], widths: List[int], is_header: bool = False) -> str:
         """构建数据行"""
@@ -425,12 +454,12 @@ class TablePrinter:
             cell_str = str(cell) if cell is not None else ""
             
             # 获取显示宽度并截断（使用统一工具）
-            display_width = self._display_width(cell_str)
-            if display_width > widths[i]:
+            current_width = self._display_width(cell_str)
+            if current_width > widths[i]:
                 cell_str = self._truncate_text_to_width(cell_str, widths[i])
+                current_width = self._display_width(cell_str)
             
             # 填充到指定宽度
-            current_width = self._display_width(cell_str)
             padding = widths[i] - current_width
 
             # 数据左对齐
@@ -440,9 +469,38 @@ class TablePrinter:
         
         return '│' + '│'.join(cells) + '│'
     
-    def _write_to_file(self, filepath: str, content: str):
-        """写入文件"""
-        from pathlib import Path
-        Path(filepath).parent.mkdir(parents=True, exist_ok=True)
-        with open(filepath, 'a', encoding='utf-8') as f:
+    def _write_to_file(self, filepath: str, content: str, flush: bool = True):
+        """写入文件（文件句柄保持打开，不再每行 mkdir/open/close）"""
+        with self._file_lock:
+            f = self._log_handle
+            if f is None or self._log_handle_path != filepath:
+                self._close_handle()
+                Path(filepath).parent.mkdir(parents=True, exist_ok=True)
+                f = open(filepath, 'a', encoding='utf-8', buffering=FILE_BUFFER_SIZE)
+                self._log_handle = f
+                self._log_handle_path = filepath
+                atexit.register(self.close)
             f.write(content + '\n')
+            if flush:
+                f.flush()
+
+    def flush(self) -> None:
+        """把缓冲的表格行写入日志文件"""
+        with self._file_lock:
+            if self._log_handle is not None:
+                self._log_handle.flush()
+
+    def _close_handle(self) -> None:
+        if self._log_handle is not None:
+            try:
+                self._log_handle.close()
+            finally:
+                self._log_handle = None
+                self._log_handle_path = None
+                atexit.unregister(self.close)
+
+    def close(self) -> None:
+        """写出缓冲并关闭日志文件句柄（之后再写入会重新打开）"""
+        with self._file_lock:
+            self._close_handle()
+
@@ -0,0 +1,94 @@
+"""pty 模拟设备与执行配置构造函数（串口相关测试共用）"""
+
+import os
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from utils.dirs import Dirs
+
+
+def make_device(name, port="COM1"):
+    return {"name": name, "port": port, "baud_rate": 115200, "status": "enabled"}
+
+
+def make_command(device, cmd, order, **extra):
+    data = {
+        "command": cmd,
+        "device": device,
+        "order": order,
+        "timeout": 1000,
+        "expected_responses": ["OK"],
+    }
+    data.update(extra)
+    return data
+
+
+def use_temp_session(test_case, root):
+    """
+    让设备日志、command_metrics.json 等会话文件写到 root 下
+
+    get_dirs() 的根由最先运行的测试缓存，只切换工作目录不够；分片 worker 通过
+    AUTOCOM_SESSION_DIR 复用该目录，测试结束时一并清除。
+    """
+    dirs = Dirs(Path(root))
+    for target in (
+        "components.CommandDeviceDict.get_dirs",
+        "components.ShardCoordinator.get_dirs",
+    ):
+        patcher = patch(target, return_value=dirs)
+        patcher.start()
+        test_case.addCleanup(patcher.stop)
+    test_case.addCleanup(os.environ.pop, "AUTOCOM_SESSION_DIR", None)
+    return dirs
+
+
+class PtyResponder:
+    """在 pty 主端模拟 AT 设备：ECHO <x> 回显 x，其余命令回复 OK"""
+
+    def __init__(self, delay=0.0, journal=None, name=""):
+        import tty
+
+        self.delay = delay
+        self.journal = journal
+        self.name = name
+
+        self.master, slave = os.openpty()
+        tty.setraw(slave)
+        self.port = os.ttyname(slave)
+        self._slave = slave
+        self.received = []
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        buffer = b""
+        while True:
+            try:
+                chunk = os.read(self.master, 1024)
+            except OSError:
+                return
+            if not chunk:
+                return
+            buffer += chunk
+            while b"\r\n" in buffer:
+                line, buffer = buffer.split(b"\r\n", 1)
+                text = line.decode(errors="ignore")
+                self.received.append(text)
+                if self.journal is not None:
+                    self.journal.append((self.name, text))
+                if self.delay:
+                    time.sleep(self.delay)
+                if text.startswith("ECHO "):
+                    reply = f"{text[5:]}\r\nOK\r\n"
+                else:
+                    reply = "OK\r\n"
+                os.write(self.master, reply.encode())
+
+    def close(self):
+        for fd in (self.master, self._slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
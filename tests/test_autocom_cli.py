@@ -1,12 +1,23 @@
+import os
+import shutil
 import unittest
 import tempfile
 import json
 from unittest.mock import patch
 from tests.test_device import SimulatedSerial
+from tests._pty_rig import use_temp_session
 from AutoCom import execute_with_loop
 
 
 class TestAutoComCLI(unittest.TestCase):
+    def setUp(self):
+        # DataStore 与会话目录写到临时目录，不在仓库中留下 temps/、device_logs/
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.tmp)
+        use_temp_session(self, self.tmp)
+
     def test_cli_execution(self):
         # Prepare a temporary dictionary file with one device and three commands
         dict_data = {
@@ -58,7 +69,7 @@ class TestAutoComCLI(unittest.TestCase):
             ],
         }
 
-        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as tf:
+        with tempfile.NamedTemporaryFile("w", suffix=".json", dir=self.tmp, delete=False) as tf:
             json.dump(dict_data, tf)
             tf.flush()
             dict_path = tf.name
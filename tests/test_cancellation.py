@@ -0,0 +1,154 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+
+import serial
+
+from utils.cancellation import CancellationToken, OperationCancelled
+from tests._pty_rig import PtyResponder, make_command, make_device, use_temp_session
+
+
+class TestCancellationToken(unittest.TestCase):
+    def test_cancel_propagates_to_children_only(self):
+        parent = CancellationToken()
+        child = parent.child()
+        grandchild = child.child()
+        child.cancel("iteration aborted")
+        self.assertFalse(parent.cancelled)
+        self.assertTrue(grandchild.cancelled)
+        self.assertEqual(grandchild.reason, "iteration aborted")
+
+        sibling = parent.child()
+        parent.cancel("session cancelled")
+        self.assertTrue(sibling.cancelled)
+        # 已取消的令牌不会被覆盖原因
+        self.assertEqual(child.reason, "iteration aborted")
+
+    def test_child_of_cancelled_parent_starts_cancelled(self):
+        parent = CancellationToken()
+        parent.cancel()
+        self.assertTrue(parent.child().cancelled)
+
+    def test_release_detaches_child(self):
+        parent = CancellationToken()
+        child = parent.child()
+        child.release()
+        parent.cancel()
+        self.assertFalse(child.cancelled)
+
+    def test_callbacks_and_sleep(self):
+        token = CancellationToken()
+        seen = []
+        token.on_cancel(lambda t: seen.append(t.reason))
+        self.assertTrue(token.sleep(0.01))
+        threading.Timer(0.05, token.cancel, args=("stop",)).start()
+        start = time.time()
+        self.assertFalse(token.sleep(5))
+        self.assertLess(time.time() - start, 2)
+        self.assertEqual(seen, ["stop"])
+        token.on_cancel(lambda t: seen.append("late"))
+        self.assertEqual(seen, ["stop", "late"])
+        with self.assertRaises(OperationCancelled):
+            token.raise_if_cancelled()
+
+
+class _BrokenSerial:
+    """模拟串口在命令执行中途掉线且无法重新打开"""
+
+    def __init__(self):
+        self.is_open = True
+        self.port = "BROKEN"
+
+    def write(self, data):
+        return len(data)
+
+    def flush(self):
+        pass
+
+    @property
+    def in_waiting(self):
+        self.is_open = False
+        raise serial.SerialException("device disconnected")
+
+    def read(self, size=1):
+        return b""
+
+    def open(self):
+        raise serial.SerialException("device not found")
+
+    def close(self):
+        self.is_open = False
+
+
+@unittest.skipUnless(sys.platform.startswith("linux"), "pty emulation needs Linux")
+class TestCancellationPty(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp)
+        use_temp_session(self, self.tmp)
+        self.rigs = {name: PtyResponder() for name in ("DevA", "DevB")}
+        self.executor = None
+
+    def tearDown(self):
+        if self.executor is not None:
+            self.executor.command_device_dict.close_all_devices()
+            self.executor.shutdown()
+            self.executor.data_store.stop()
+        for rig in self.rigs.values():
+            rig.close()
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _executor(self, commands, cancel_token=None):
+        from components.CommandExecutor import CommandExecutor
+
+        dict_data = {
+            "Devices": [make_device(n, rig.port) for n, rig in self.rigs.items()],
+            "Commands": commands,
+        }
+        self.executor = CommandExecutor(dict_data, cancel_token=cancel_token)
+        return self.executor
+
+    def test_shared_token_cancels_in_flight_command(self):
+        session = CancellationToken()
+        executor = self._executor(
+            [make_command("DevA", "AT+SLOW", 1, timeout=8000, expected_responses=["NEVER"])],
+            cancel_token=session.child(),
+        )
+        threading.Timer(0.3, session.cancel, args=("stop requested",)).start()
+        start = time.time()
+        self.assertFalse(executor.execute())
+        self.assertLess(time.time() - start, 4)
+        self.assertEqual(executor.cancel_token.reason, "stop requested")
+
+    def test_cancel_discards_deferred_commands(self):
+        executor = self._executor([make_command("DevA", "AT", 1)])
+        executor.cancel()
+        executor.enqueue_deferred_command(make_command("DevB", "AT+LATE", 2))
+        start = time.time()
+        executor.shutdown()
+        self.assertLess(time.time() - start, 4)
+        self.assertFalse(executor.deferred_execution_thread.is_alive())
+        self.assertNotIn("AT+LATE", self.rigs["DevB"].received)
+
+    def test_lost_port_fails_command_without_exiting(self):
+        executor = self._executor([make_command("DevA", "AT", 1)])
+        device = executor.command_device_dict.devices["DevA"]
+        device.ser.close()
+        device.ser = _BrokenSerial()
+        device.cancel_token = CancellationToken()
+        # 重连等待可被取消，不会阻塞 3 x 5 秒
+        threading.Timer(0.2, device.cancel_token.cancel).start()
+        start = time.time()
+        result = device.send_command("AT", timeout=5, expected_responses=["OK"])
+        self.assertFalse(result["success"])
+        self.assertLess(time.time() - start, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import re
+import unittest
+
+from components.Logger import (
+    ColorCode,
+    ColorizerRegistry,
+    KeywordColorizer,
+    RegexColorizer,
+)
+
+RED = ColorCode.RED.value
+BLUE = ColorCode.BLUE.value
+GREEN = ColorCode.GREEN.value
+RESET = ColorCode.RESET.value
+
+
+class UpperColorizer:
+    """没有 combined_pattern 的自定义着色器"""
+
+    def can_handle(self, text):
+        return "x" in text
+
+    def colorize(self, text):
+        return text.replace("x", "X")
+
+
+class TestColorizerRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = ColorizerRegistry()
+        self.registry.register(
+            RegexColorizer(pattern=r"\[([^\]]+)\]", color=ColorCode.BLUE, group=1),
+            priority=10,
+            name="device",
+        )
+        self.registry.register(
+            KeywordColorizer(keywords=["fail", "failed"], color=ColorCode.RED),
+            priority=30,
+            name="errors",
+        )
+
+    def test_single_scan_matches_per_colorizer_output(self):
+        self.assertEqual(
+            self.registry.colorize("[DevA] FAILED twice"),
+            f"[{BLUE}DevA{RESET}] {RED}FAILED{RESET} twice",
+        )
+        self.assertEqual(self.registry.colorize("nothing here"), "nothing here")
+
+    def test_higher_priority_wins_overlaps(self):
+        self.assertEqual(
+            self.registry.colorize("[Dev failed]"), f"[{BLUE}Dev failed{RESET}]"
+        )
+
+    def test_plan_rebuilt_when_registry_changes(self):
+        self.registry.colorize("warm up")
+        self.registry.disable("device")
+        self.assertEqual(self.registry.colorize("[x] fail"), f"[x] {RED}fail{RESET}")
+        self.registry.enable("device")
+        self.registry.register(
+            RegexColorizer(pattern=re.compile(r"ok", re.IGNORECASE), color=ColorCode.GREEN),
+            priority=5,
+            name="ok",
+        )
+        self.assertEqual(
+            self.registry.colorize("OK [A]"), f"{GREEN}OK{RESET} [{BLUE}A{RESET}]"
+        )
+        self.assertTrue(self.registry.unregister("ok"))
+        self.assertEqual(self.registry.colorize("OK"), "OK")
+
+    def test_uncombinable_colorizers_fall_back_to_sequential(self):
+        self.registry.register(
+            RegexColorizer(pattern=r"(\d)\1", color=ColorCode.GREEN), priority=40
+        )
+        self.assertIsNone(self.registry._build_plan()[0])
+        self.assertEqual(
+            self.registry.colorize("fail 77"), f"{RED}fail{RESET} {GREEN}77{RESET}"
+        )
+
+        registry = ColorizerRegistry()
+        registry.register(UpperColorizer())
+        self.assertEqual(registry.colorize("xy"), "Xy")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import json
+import os
+import random
+import tempfile
+import unittest
+
+from components.CommandMetrics import (
+    BUCKET_COUNT,
+    OTHER_COMMAND,
+    CommandMetrics,
+    LatencyHistogram,
+)
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    def test_percentiles_within_bucket_precision(self):
+        rng = random.Random(7)
+        values = [rng.lognormvariate(4.5, 0.8) for _ in range(20000)]
+        histogram = LatencyHistogram()
+        for value in values:
+            histogram.record(value)
+
+        ordered = sorted(values)
+        for pct in (50, 95, 99):
+            exact = ordered[int(pct / 100 * len(ordered)) - 1]
+            self.assertAlmostEqual(histogram.percentile(pct), exact, delta=exact / 25)
+        self.assertAlmostEqual(histogram.percentile(100), ordered[-1], places=2)
+
+    def test_memory_is_fixed(self):
+        histogram = LatencyHistogram()
+        for value in (0.001, 5.0, 1e9):
+            histogram.record(value)
+        self.assertEqual(len(histogram.counts), BUCKET_COUNT)
+        self.assertEqual(histogram.count, 3)
+
+    def test_merge_combines_samples(self):
+        first, second = LatencyHistogram(), LatencyHistogram()
+        for value in range(1, 51):
+            first.record(float(value))
+        for value in range(51, 101):
+            second.record(float(value), passed=value % 2 == 0)
+
+        first.merge(second)
+        first.merge(LatencyHistogram())
+        self.assertEqual(first.count, 100)
+        self.assertEqual(first.failed, 25)
+        self.assertEqual(first.min_us, 1000)
+        self.assertEqual(first.percentile(100), 100.0)
+        self.assertAlmostEqual(first.percentile(50), 50.0, delta=50.0 / 25)
+
+
+class TestCommandMetrics(unittest.TestCase):
+    def test_series_per_device_and_command(self):
+        metrics = CommandMetrics()
+        for _ in range(10):
+            metrics.record_command("DevA", "AT+COPS?", True, 80.0)
+        metrics.record_command("DevA", "AT+COPS?", False, 900.0)
+        metrics.record_command("DevB", "AT+COPS?", True, 5.0)
+
+        histogram = metrics.get("DevA", "AT+COPS?")
+        self.assertEqual((histogram.count, histogram.failed), (11, 1))
+        self.assertAlmostEqual(histogram.percentile(50), 80.0, delta=80 / 32)
+        self.assertAlmostEqual(histogram.percentile(99), 900.0, places=3)
+
+        lines = metrics.summary_lines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn("[DevA] AT+COPS?: n=11 failed=1", lines[0])
+        self.assertIn("max=900.0ms", lines[0])
+
+    def test_series_limit_folds_new_commands(self):
+        metrics = CommandMetrics(max_series=2)
+        for i in range(100):
+            metrics.record_command("DevA", f"AT+CMD={i}", True, 1.0)
+        self.assertEqual(len(metrics), 3)
+        self.assertEqual(metrics.get("DevA", OTHER_COMMAND).count, 98)
+
+    def test_save_writes_percentiles_and_buckets(self):
+        metrics = CommandMetrics()
+        metrics.record_command("DevA", "AT", True, 2.5)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "command_metrics.json")
+            metrics.save(path)
+            with open(path, encoding="utf-8") as f:
+                (entry,) = json.load(f)["series"]
+        self.assertEqual((entry["device"], entry["command"], entry["count"]), ("DevA", "AT", 1))
+        self.assertEqual(entry["p99_ms"], 2.5)
+        self.assertEqual(sum(entry["buckets"].values()), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
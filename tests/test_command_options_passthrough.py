@@ -3,7 +3,9 @@ import unittest
 from types import SimpleNamespace
 
 from components.CommandExecutor import CommandExecutor
+from components.ExecutionPolicy import ExecutionPolicy
 from utils.ActionHandler import ActionHandler
+from utils.cancellation import CancellationToken
 
 
 class _FakeDevice:
@@ -49,6 +51,10 @@ class TestCommandOptionsPassthrough(unittest.TestCase):
         executor = CommandExecutor.__new__(CommandExecutor)
         executor.lock = threading.Lock()
         executor.data_store = _FakeDataStore()
+        executor.iteration_token = CancellationToken()
+        executor.command_listeners = []
+        executor.current_iteration = None
+        executor.policy = ExecutionPolicy()
         executor.defer_response_actions = False
         executor.deferred_response_actions = []
         executor.action_handler = _FakeActionHandler()
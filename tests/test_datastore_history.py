@@ -0,0 +1,132 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from components.DataHistory import VariableHistory
+from components.DataStore import DataStore
+
+
+class TestVariableHistory(unittest.TestCase):
+    def test_range_queries_and_percentiles(self):
+        history = VariableHistory()
+        for i in range(1, 101):
+            history.append(i, float(i), i)
+        self.assertEqual(
+            history.samples(start_iteration=99),
+            [(99, 99.0, 99.0), (100, 100.0, 100.0)],
+        )
+        self.assertEqual(len(history.samples(since=10.0, until=20.0)), 10)
+
+        stats = history.stats()
+        self.assertEqual((stats["count"], stats["min"], stats["max"]), (100, 1.0, 100.0))
+        self.assertAlmostEqual(stats["mean"], 50.5)
+        self.assertAlmostEqual(stats["p50"], 50.5)
+        self.assertAlmostEqual(stats["p99"], 99.01)
+
+        ranged = history.stats(start_iteration=11, end_iteration=20)
+        self.assertEqual((ranged["count"], ranged["min"], ranged["max"]), (10, 11.0, 20.0))
+
+    def test_memory_is_bounded_but_totals_are_exact(self):
+        history = VariableHistory(max_samples=1000)
+        for i in range(100_000):
+            history.append(i, float(i), i % 500)
+        self.assertLessEqual(len(history), 1000)
+        self.assertEqual(history.dropped + len(history), 100_000)
+        self.assertLessEqual(history.nbytes(), 1000 * 24)
+        stats = history.stats()
+        self.assertEqual((stats["count"], stats["min"], stats["max"]), (100_000, 0.0, 499.0))
+
+    def test_non_numeric_values_are_skipped(self):
+        history = VariableHistory()
+        self.assertTrue(history.append(1, 0.0, "-71"))
+        self.assertFalse(history.append(2, 1.0, "OK"))
+        self.assertEqual(history.skipped, 1)
+        self.assertEqual(history.samples(), [(1, 0.0, -71.0)])
+
+    def test_unordered_columns_fall_back_to_scan(self):
+        history = VariableHistory()
+        # 迭代外的写入记为 0，共享 DataStore 的执行器迭代交错
+        for iteration, ts, value in ((1, 0.0, 10), (0, 1.0, 20), (2, 2.0, 30), (1, 3.0, 40)):
+            history.append(iteration, ts, value)
+        self.assertFalse(history.iterations_ordered)
+        self.assertTrue(history.timestamps_ordered)
+        self.assertEqual(
+            history.samples(start_iteration=1, end_iteration=1),
+            [(1, 0.0, 10.0), (1, 3.0, 40.0)],
+        )
+        self.assertEqual(history.stats(start_iteration=2)["count"], 1)
+        self.assertEqual(len(history.samples(since=1.0, until=3.0)), 2)
+
+
+class TestDataStoreHistory(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmp, "session_h1.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _store(self):
+        return DataStore(
+            filename=self.filename,
+            session_id="h1",
+            auto_cleanup=False,
+            history=["RSSI", "DevB.BootTime"],
+        )
+
+    def test_tracked_variables_only(self):
+        store = self._store()
+        try:
+            for iteration in range(1, 4):
+                store.set_iteration(iteration)
+                store.store_data("DevA", "RSSI", -70 - iteration)
+                store.store_data("DevA", "BootTime", 12.5)
+                store.store_data("DevB", "BootTime", 10 + iteration)
+            store.store_data("DevA", "RSSI", -60, iteration=9)
+
+            self.assertEqual(store.get_data("DevA", "RSSI"), -60)
+            self.assertEqual(
+                [(i, v) for i, _, v in store.get_history("DevA", "RSSI")],
+                [(1, -71.0), (2, -72.0), (3, -73.0), (9, -60.0)],
+            )
+            self.assertEqual(store.get_history("DevA", "BootTime"), [])
+            self.assertIsNone(store.history_stats("DevA", "BootTime"))
+            self.assertEqual(store.history_stats("DevB", "BootTime")["max"], 13.0)
+        finally:
+            store.stop()
+
+        # 历史单独保存，不写入会话 JSON
+        self.assertEqual(
+            DataStore.load_session_data(filepath=self.filename)["DevA"],
+            {"RSSI": -60, "BootTime": 12.5},
+        )
+        series = DataStore.load_history(session_id="h1", data_dir=self.tmp)
+        self.assertEqual(series[("DevA", "RSSI")].stats()["count"], 4)
+
+    def test_history_saved_with_data_before_stop(self):
+        store = self._store()
+        try:
+            store.store_data("DevA", "RSSI", -70, iteration=1)
+            store.force_save().result(timeout=5)
+            # 进程在 stop() 之前被杀死时，历史已随数据一起落盘
+            series = DataStore.load_history(session_id="h1", data_dir=self.tmp)
+            self.assertEqual(series[("DevA", "RSSI")].samples()[0][2], -70.0)
+        finally:
+            store.stop()
+
+    def test_reopened_session_resumes_history(self):
+        store = self._store()
+        store.store_data("DevA", "RSSI", -70, iteration=1)
+        store.stop()
+
+        store = self._store()
+        try:
+            store.store_data("DevA", "RSSI", -80, iteration=2)
+            self.assertEqual(store.history_stats("DevA", "RSSI")["mean"], -75.0)
+        finally:
+            store.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from components.DataStore import DataStore
+
+
+class TestDataStoreJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmp, "session_test.json")
+        self.stores = []
+
+    def tearDown(self):
+        for store in self.stores:
+            store.stop()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _store(self, **kwargs):
+        options = dict(
+            filename=self.filename,
+            auto_cleanup=False,
+            persistence="journal",
+            compact_interval=3600,
+        )
+        options.update(kwargs)
+        store = DataStore(**options)
+        self.stores.append(store)
+        return store
+
+    def _journal_lines(self):
+        with open(f"{self.filename}.journal", encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    def test_changes_are_appended_as_records(self):
+        store = self._store(fsync="always")
+        store.store_data("DevA", "IMEI", "8612345")
+        store.store_data("DevA", "CSQ", 20)
+        store.delete_data("DevA", "CSQ")
+        self.assertEqual(
+            self._journal_lines(),
+            [
+                {"op": "set", "d": "DevA", "k": "IMEI", "v": "8612345"},
+                {"op": "set", "d": "DevA", "k": "CSQ", "v": 20},
+                {"op": "del", "d": "DevA", "k": "CSQ"},
+            ],
+        )
+        self.assertFalse(os.path.exists(self.filename))
+        # 未压缩的日志对只读加载也可见
+        self.assertEqual(
+            DataStore.load_session_data(filepath=self.filename),
+            {"DevA": {"IMEI": "8612345"}},
+        )
+
+    def test_compaction_writes_snapshot_and_truncates_journal(self):
+        store = self._store()
+        store.store_data("DevA", "IMEI", "8612345")
+        store.compact()
+        with open(self.filename) as f:
+            self.assertEqual(json.load(f), {"DevA": {"IMEI": "8612345"}})
+        self.assertEqual(store.get_stats()["journal_bytes"], 0)
+        self.assertFalse(os.path.exists(f"{self.filename}.journal.compacting"))
+
+        store.store_data("DevB", "MAC", "aa:bb")
+        store.stop()
+        self.stores.remove(store)
+        self.assertFalse(os.path.exists(f"{self.filename}.journal"))
+        self.assertEqual(
+            DataStore.load_session_data(filepath=self.filename),
+            {"DevA": {"IMEI": "8612345"}, "DevB": {"MAC": "aa:bb"}},
+        )
+
+    def test_recovers_from_interrupted_session(self):
+        with open(self.filename, "w") as f:
+            json.dump({"DevA": {"IMEI": "old", "KEEP": 1}}, f)
+        with open(f"{self.filename}.journal.compacting", "w") as f:
+            f.write('{"op":"set","d":"DevA","k":"IMEI","v":"new"}\n')
+        with open(f"{self.filename}.journal", "w") as f:
+            f.write('{"op":"del","d":"DevA","k":"KEEP"}\n')
+            f.write('{"op":"set","d":"DevB","k":')  # 写了一半的记录
+
+        store = self._store()
+        self.assertEqual(store.get_all_data(), {"DevA": {"IMEI": "new"}})
+        self.assertFalse(os.path.exists(f"{self.filename}.journal.compacting"))
+        with open(self.filename) as f:
+            self.assertEqual(json.load(f), {"DevA": {"IMEI": "new"}})
+
+    def test_invalid_options_rejected(self):
+        with self.assertRaises(ValueError):
+            DataStore(filename=self.filename, persistence="wal")
+        with self.assertRaises(ValueError):
+            DataStore(filename=self.filename, persistence="journal", fsync="sometimes")
+
+    def test_from_config(self):
+        store = DataStore.from_config(
+            {"persistence": "journal", "fsync": "never", "compact_interval": 3600},
+            filename=self.filename,
+            auto_cleanup=False,
+        )
+        self.stores.append(store)
+        self.assertEqual(store.get_stats()["persistence"], "journal")
+        self.assertEqual(store.fsync, "never")
+
+
+if __name__ == "__main__":
+    unittest.main()
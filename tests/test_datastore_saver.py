@@ -0,0 +1,92 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from components.DataStore import DataStore
+
+
+class TestDataStoreSaver(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmp, "session_test.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _store(self, **kwargs):
+        options = dict(filename=self.filename, auto_cleanup=False, save_interval=0.2)
+        options.update(kwargs)
+        store = DataStore(**options)
+        self.addCleanup(store.stop)
+        return store
+
+    def _read(self):
+        with open(self.filename) as f:
+            return json.load(f)
+
+    def test_burst_of_changes_is_coalesced(self):
+        store = self._store()
+        with patch.object(store, "_incremental_save", wraps=store._incremental_save) as save:
+            for i in range(200):
+                store.store_data(f"Dev{i % 4}", "COUNT", i)
+            store.force_save().result(timeout=5)
+        self.assertEqual(save.call_count, 1)
+        self.assertEqual(len(save.call_args[0][0]), 4)
+        self.assertEqual(self._read()["Dev3"], {"COUNT": 199})
+
+    def test_debounced_save_without_force(self):
+        store = self._store(save_interval=0.05)
+        store.store_data("DevA", "IMEI", "8612345")
+        deadline = time.time() + 5
+        while store.get_stats()["durable_generation"] < 1 and time.time() < deadline:
+            time.sleep(0.02)
+        self.assertEqual(self._read(), {"DevA": {"IMEI": "8612345"}})
+
+    def test_force_save_future_and_metrics(self):
+        store = self._store(save_interval=3600)
+        store.store_data("DevA", "IMEI", "8612345")
+        store.store_data("DevA", "CSQ", 20)
+        self.assertEqual(store.force_save().result(timeout=5), 2)
+        self.assertEqual(self._read(), {"DevA": {"IMEI": "8612345", "CSQ": 20}})
+
+        # 没有新变更时立即完成
+        self.assertTrue(store.force_save().done())
+        stats = store.get_stats()
+        self.assertEqual(stats["durable_generation"], 2)
+        self.assertEqual(stats["pending_force_saves"], 0)
+        self.assertEqual(stats["save_metrics"]["saves"], 1)
+        self.assertGreater(stats["save_metrics"]["bytes_written"], 0)
+
+    def test_failed_save_is_retried_not_dropped(self):
+        store = self._store(save_interval=3600)
+        store.store_data("DevA", "IMEI", "8612345")
+        with patch.object(store, "_incremental_save", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                store.force_save().result(timeout=5)
+        self.assertEqual(store.get_stats()["dirty_device_names"], ["DevA"])
+        self.assertEqual(store.get_stats()["save_metrics"]["failed_saves"], 1)
+
+        store.force_save().result(timeout=5)
+        self.assertEqual(self._read(), {"DevA": {"IMEI": "8612345"}})
+
+    def test_stop_does_not_wait_for_interval(self):
+        store = self._store(save_interval=3600)
+        store.store_data("DevA", "IMEI", "8612345")
+        start = time.time()
+        store.stop()
+        self.assertLess(time.time() - start, 2)
+        self.assertFalse(store.save_thread.is_alive())
+        self.assertEqual(self._read(), {"DevA": {"IMEI": "8612345"}})
+
+    def test_in_memory_force_save_resolves_immediately(self):
+        store = self._store(persist=False)
+        store.store_data("DevA", "IMEI", "8612345")
+        self.assertTrue(store.force_save().done())
+
+
+if __name__ == "__main__":
+    unittest.main()
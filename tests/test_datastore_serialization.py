@@ -0,0 +1,100 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from components.DataSerializer import (
+    SERIALIZATION_FORMATS,
+    detect_format,
+    get_serializer,
+    load_file,
+)
+from components.DataStore import DataStore
+from utils import datastore_manager
+
+SAMPLE = {
+    "DevA": {"IMEI": "8612345", "CSQ": 20, "RESP": "中文 响应\r\nOK"},
+    "Constants": {"PIN": None, "RATIO": 0.5, "LIST": [1, 2, 3]},
+}
+
+
+class TestDataSerializer(unittest.TestCase):
+    def test_roundtrip_and_detection(self):
+        for name in SERIALIZATION_FORMATS:
+            with self.subTest(format=name):
+                raw = get_serializer(name).dumps(SAMPLE)
+                expected = "json" if name in ("json", "compact") else name
+                self.assertEqual(detect_format(raw), expected)
+                self.assertEqual(get_serializer(expected).loads(raw), SAMPLE)
+
+    def test_compact_and_compressed_are_smaller(self):
+        data = {f"Dev{i}": {"RESP": "+CSQ: 20,99\r\nOK\r\n" * 20} for i in range(50)}
+        sizes = {name: len(get_serializer(name).dumps(data)) for name in SERIALIZATION_FORMATS}
+        self.assertLess(sizes["compact"], sizes["json"])
+        self.assertLess(sizes["gzip"], sizes["compact"] / 5)
+        self.assertLess(sizes["lzma"], sizes["compact"] / 5)
+
+    def test_invalid_format_rejected(self):
+        with self.assertRaises(ValueError):
+            get_serializer("yaml")
+
+
+class TestDataStoreSerialization(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmp, "session_s1.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _store(self, serialization):
+        return DataStore(
+            filename=self.filename,
+            session_id="s1",
+            auto_cleanup=False,
+            serialization=serialization,
+        )
+
+    def test_switching_format_keeps_session_readable(self):
+        store = self._store("pickle")
+        for device, variables in SAMPLE.items():
+            for key, value in variables.items():
+                store.store_data(device, key, value)
+        store.stop()
+        with open(self.filename, "rb") as f:
+            self.assertEqual(detect_format(f.read(2)), "pickle")
+        self.assertEqual(DataStore.load_session_data(filepath=self.filename), SAMPLE)
+
+        # 以另一种格式重新打开同一会话
+        store = self._store("lzma")
+        self.assertEqual(store.get_all_data(), SAMPLE)
+        store.store_data("DevA", "CSQ", 25)
+        store.stop()
+        self.assertEqual(load_file(self.filename)["DevA"]["CSQ"], 25)
+        self.assertEqual(load_file(f"{self.filename}.backup")["DevA"]["CSQ"], 20)
+
+    def test_corrupted_file_falls_back_to_backup(self):
+        with open(f"{self.filename}.backup", "wb") as f:
+            f.write(get_serializer("gzip").dumps(SAMPLE))
+        with open(self.filename, "wb") as f:
+            f.write(b"\x1f\x8b truncated")
+        store = self._store("gzip")
+        try:
+            self.assertEqual(store.get_all_data(), SAMPLE)
+        finally:
+            store.stop()
+
+    def test_export_reads_any_format(self):
+        store = self._store("gzip")
+        store.store_data("DevA", "IMEI", "8612345")
+        store.stop()
+
+        out_dir = os.path.join(self.tmp, "export")
+        datastore_manager.export_data(out_dir, self.tmp, layout="files", fmt="compact")
+        with open(os.path.join(out_dir, "session_s1.json")) as f:
+            self.assertEqual(json.load(f), {"DevA": {"IMEI": "8612345"}})
+
+
+if __name__ == "__main__":
+    unittest.main()
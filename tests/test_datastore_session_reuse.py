@@ -0,0 +1,100 @@
+import json
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+import AutoCom
+from components.DataStore import DataStore, LazyDataStore
+
+
+class TestLazyDataStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_created_on_first_use_only(self):
+        filename = os.path.join(self.tmp, "session_l1.json")
+        store = LazyDataStore(
+            {"save_interval": 0.1}, filename=filename, session_id="l1", auto_cleanup=False
+        )
+        self.assertFalse(store.started)
+        self.assertEqual(store.force_save().result(timeout=1), 0)
+        store.stop()
+        self.assertFalse(os.path.exists(filename))
+
+        store.store_data("DevA", "X", 1)
+        self.assertTrue(store.started)
+        self.assertIs(store.get(), store.get())
+        self.assertEqual(store.get().save_interval, 0.1)
+        store.stop()
+        self.assertEqual(DataStore.load_session_data(filepath=filename), {"DevA": {"X": 1}})
+
+
+class TestSessionDataStoreReuse(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.files = []
+        for i in range(3):
+            name = f"{i}_dict.json"
+            with open(os.path.join(self.tmp, name), "w") as f:
+                json.dump({"Commands": [{"order": 1, "command": f"AT+{i}"}]}, f)
+            self.files.append(name)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_folder_files_share_one_store(self):
+        with patch.object(AutoCom, "CommandDeviceDict") as cdd, patch.object(
+            AutoCom, "CommandExecutor"
+        ) as executor_cls, patch.object(AutoCom, "LazyDataStore") as store_cls:
+            executor_cls.return_value.execute.return_value = True
+            AutoCom.execute_with_folder(self.tmp, self.files, {"Devices": []})
+
+        store_cls.assert_called_once_with(None)
+        store = store_cls.return_value
+        self.assertIs(cdd.call_args[0][1], store)
+        self.assertEqual(executor_cls.call_count, 3)
+        for call in executor_cls.call_args_list:
+            self.assertIs(call.kwargs["data_store"], store)
+        # 每个文件的执行器都被关闭，共用的 DataStore 只在最后停止一次
+        self.assertEqual(executor_cls.return_value.shutdown.call_count, 3)
+        store.stop.assert_called_once_with()
+
+    def test_watch_queue_shares_store_until_stopped(self):
+        file_queue = queue.Queue()
+        for name in self.files:
+            file_queue.put(os.path.join(self.tmp, name))
+        stop_event = threading.Event()
+        executors = []
+
+        def make_executor(command_device_dict, data_store=None):
+            executor = MagicMock()
+            executor.data_store = data_store
+            executor.execute.return_value = True
+            executors.append(executor)
+            if len(executors) == len(self.files):
+                stop_event.set()
+            return executor
+
+        with patch.object(AutoCom, "CommandDeviceDict") as cdd, patch.object(
+            AutoCom, "CommandExecutor", side_effect=make_executor
+        ), patch.object(AutoCom, "LazyDataStore") as store_cls:
+            cdd.return_value.log_date_dir = self.tmp
+            AutoCom.process_file_queue(file_queue, stop_event)
+
+        store_cls.assert_called_once_with(None)
+        store = store_cls.return_value
+        self.assertEqual(len(executors), 3)
+        self.assertTrue(all(e.data_store is store for e in executors))
+        self.assertEqual(store.force_save.call_count, 3)
+        store.stop.assert_called_once_with()
+
+
+if __name__ == "__main__":
+    unittest.main()
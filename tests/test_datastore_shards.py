@@ -0,0 +1,139 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+from components.DataSerializer import load_file
+from components.DataStore import DataStore
+from utils.template import render_template
+
+
+class TestDataStoreShards(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _store(self, **kwargs):
+        options = dict(
+            filename=os.path.join(self.tmp, "session_s1.json"),
+            session_id="s1",
+            auto_cleanup=False,
+            save_interval=0.05,
+        )
+        options.update(kwargs)
+        store = DataStore(**options)
+        self.addCleanup(store.stop)
+        return store
+
+    def test_concurrent_devices_are_all_persisted(self):
+        store = self._store()
+
+        def writer(index):
+            for i in range(200):
+                store.store_data(f"Dev{index}", f"VAR{i % 10}", i)
+                store.store_data("Constants", f"SEEN_{index}", i)
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        store.force_save().result(timeout=5)
+
+        data = load_file(store.filename)
+        self.assertEqual(len(data), 17)
+        for n in range(16):
+            self.assertEqual(data[f"Dev{n}"], {f"VAR{i}": 190 + i for i in range(10)})
+            self.assertEqual(data["Constants"][f"SEEN_{n}"], 199)
+        self.assertEqual(store.get_stats()["dirty_devices"], 0)
+
+    def test_device_writes_do_not_wait_for_other_shards(self):
+        store = self._store(persist=False)
+        store.store_data("DevA", "X", 1)
+        done = threading.Event()
+
+        with store._shards["DevA"].lock:
+            thread = threading.Thread(
+                target=lambda: (store.store_data("DevB", "Y", 2), done.set())
+            )
+            thread.start()
+            self.assertTrue(done.wait(timeout=2))
+            # 读取不需要任何锁
+            self.assertEqual(store.get_data("DevA", "X"), 1)
+        thread.join()
+
+    def test_writes_to_existing_devices_do_not_take_directory_lock(self):
+        store = self._store(persist=False)
+        store.store_data("DevA", "X", 1)
+        version = store.get_version()
+        done = threading.Event()
+
+        with store.lock:
+            thread = threading.Thread(
+                target=lambda: (store.store_data("DevA", "X", 2), done.set())
+            )
+            thread.start()
+            self.assertTrue(done.wait(timeout=2))
+        thread.join()
+        self.assertGreater(store.get_version(), version)
+        self.assertEqual(store.get_data("DevA", "X"), 2)
+
+    def test_force_save_waits_for_deletions(self):
+        store = self._store(save_interval=3600)
+        store.store_data("DevA", "X", 1)
+        store.store_data("DevB", "Y", 2)
+        store.force_save().result(timeout=5)
+
+        store.delete_data("DevB")
+        self.assertEqual(store.force_save().result(timeout=5), 3)
+        self.assertEqual(load_file(store.filename), {"DevA": {"X": 1}})
+        self.assertTrue(store.force_save().done())
+
+    def test_template_cache_ignores_other_devices(self):
+        store = self._store(persist=False)
+        store.store_data("Constants", "APN", "iot")
+        store.store_data("DevA", "CID", 1)
+        with patch.object(store, "resolve_variables", wraps=store.resolve_variables) as resolve:
+            render_template("AT+CGDCONT={CID},{APN}", store, "DevA")
+            store.store_data("DevB", "CID", 2)
+            self.assertEqual(
+                render_template("AT+CGDCONT={CID},{APN}", store, "DevA"), "AT+CGDCONT=1,iot"
+            )
+            self.assertEqual(resolve.call_count, 1)
+            store.store_data("Constants", "APN", "cmnet")
+            self.assertEqual(
+                render_template("AT+CGDCONT={CID},{APN}", store, "DevA"), "AT+CGDCONT=1,cmnet"
+            )
+            self.assertEqual(resolve.call_count, 2)
+
+    def test_deleted_device_can_be_recreated(self):
+        store = self._store()
+        store.store_data("DevA", "X", 1)
+        self.assertTrue(store.delete_data("DevA"))
+        self.assertFalse(store.delete_data("DevA"))
+        self.assertIsNone(store.get_data("DevA"))
+        store.store_data("DevA", "Y", 2)
+        store.force_save().result(timeout=5)
+        self.assertEqual(load_file(store.filename), {"DevA": {"Y": 2}})
+
+    def test_sqlite_saves_only_changed_shards(self):
+        store = self._store(persistence="sqlite", save_interval=3600)
+        store.store_data("DevA", "X", 1)
+        store.store_data("DevB", "Y", 2)
+        store.force_save().result(timeout=5)
+
+        with patch.object(
+            store._backend, "save_devices", wraps=store._backend.save_devices
+        ) as save:
+            store.store_data("DevB", "Y", 3)
+            store.delete_data("DevA")
+            store.force_save().result(timeout=5)
+        self.assertEqual(save.call_args[0][1], {"DevA": None, "DevB": {"Y": 3}})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import threading
+import unittest
+from unittest.mock import patch
+
+from components.DataStore import DataStore
+from utils.template import render_template
+
+
+class TestDataStoreSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.store = DataStore(persist=False)
+
+    def tearDown(self):
+        self.store.stop()
+
+    def test_published_snapshots_are_never_modified(self):
+        self.store.store_data("DevA", "IMEI", "1")
+        self.store.store_data("DevB", "MAC", "aa")
+        version, data = self.store.snapshot()
+
+        self.store.store_data("DevA", "IMEI", "2")
+        self.store.delete_data("DevB")
+        self.assertEqual(data, {"DevA": {"IMEI": "1"}, "DevB": {"MAC": "aa"}})
+
+        new_version, new_data = self.store.snapshot()
+        self.assertGreater(new_version, version)
+        self.assertEqual(new_data, {"DevA": {"IMEI": "2"}})
+        self.assertEqual(self.store.get_version(), new_version)
+
+    def test_unchanged_devices_are_shared_between_versions(self):
+        self.store.store_data("DevA", "IMEI", "1")
+        _, before = self.store.snapshot()
+        self.store.store_data("DevB", "MAC", "aa")
+        _, after = self.store.snapshot()
+        self.assertIs(before["DevA"], after["DevA"])
+
+        # 读取接口返回副本，修改副本不影响快照
+        self.store.get_data("DevA")["IMEI"] = "changed"
+        self.store.get_all_data()["DevA"]["IMEI"] = "changed"
+        self.assertEqual(self.store.get_data("DevA", "IMEI"), "1")
+
+    def test_versions_are_unique_across_stores(self):
+        other = DataStore(persist=False)
+        try:
+            self.assertNotEqual(other.get_version(), self.store.get_version())
+        finally:
+            other.stop()
+
+    def test_template_reuses_render_until_version_changes(self):
+        self.store.store_data("DevA", "IMEI", "8612345")
+        with patch.object(
+            self.store, "resolve_variables", wraps=self.store.resolve_variables
+        ) as resolve:
+            for _ in range(3):
+                self.assertEqual(
+                    render_template("AT+X={IMEI}", self.store, "DevA"), "AT+X=8612345"
+                )
+            self.assertEqual(resolve.call_count, 1)
+            self.store.store_data("DevA", "IMEI", "42")
+            self.assertEqual(render_template("AT+X={IMEI}", self.store, "DevA"), "AT+X=42")
+            self.assertEqual(resolve.call_count, 2)
+
+    def test_readers_iterate_snapshots_during_writes(self):
+        errors = []
+        stop = threading.Event()
+
+        def reader():
+            last_version = 0
+            try:
+                while not stop.is_set():
+                    version, data = self.store.snapshot()
+                    # 遍历过程中快照不会被修改（否则会抛出 dict changed size）
+                    for variables in data.values():
+                        list(variables.items())
+                    if version < last_version:
+                        errors.append((last_version, version))
+                    last_version = version
+            except RuntimeError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=reader) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for i in range(2000):
+            self.store.store_data(f"Dev{i % 16}", f"VAR{i % 50}", i)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from components.DataStore import DataStore
+from components.DataStoreSQLite import DB_FILENAME, SQLiteBackend
+from utils import datastore_manager
+
+
+class TestDataStoreSQLite(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _store(self, session_id):
+        return DataStore(
+            filename=os.path.join(self.tmp, f"session_{session_id}.json"),
+            session_id=session_id,
+            auto_cleanup=False,
+            persistence="sqlite",
+        )
+
+    def test_session_roundtrip_and_deletes(self):
+        store = self._store("s1")
+        store.store_data("DevA", "IMEI", "8612345")
+        store.store_data("DevA", "CSQ", 20)
+        store.store_data("DevB", "MAC", "aa:bb")
+        store.force_save()
+        store.delete_data("DevA", "CSQ")
+        store.delete_data("DevB")
+        store.stop()
+
+        self.assertTrue(os.path.exists(os.path.join(self.tmp, DB_FILENAME)))
+        self.assertFalse(os.path.exists(os.path.join(self.tmp, "session_s1.json")))
+        expected = {"DevA": {"IMEI": "8612345"}}
+        self.assertEqual(
+            DataStore.load_session_data("s1", data_dir=self.tmp), expected
+        )
+
+        reopened = self._store("s1")
+        try:
+            self.assertEqual(reopened.get_all_data(), expected)
+        finally:
+            reopened.stop()
+
+    def test_queries_merge_database_and_file_sessions(self):
+        for session_id, imei in (("s1", "111"), ("s2", "222")):
+            store = self._store(session_id)
+            store.store_data("DevA", "IMEI", imei)
+            store.stop()
+        with open(os.path.join(self.tmp, "session_legacy.json"), "w") as f:
+            json.dump({"DevA": {"IMEI": "000"}}, f)
+
+        sessions = {s[0] for s in DataStore.list_sessions(self.tmp)}
+        self.assertEqual(sessions, {"s1", "s2", "legacy"})
+        values = {
+            session_id: value
+            for session_id, value, _ in DataStore.query_across_sessions(
+                "DevA", "IMEI", self.tmp
+            )
+        }
+        self.assertEqual(values, {"s1": "111", "s2": "222", "legacy": "000"})
+
+    def test_export_files_and_import(self):
+        store = self._store("s1")
+        store.store_data("DevA", "COUNT", 3)
+        store.stop()
+
+        out_dir = os.path.join(self.tmp, "export")
+        datastore_manager.export_data(out_dir, self.tmp, layout="files")
+        with open(os.path.join(out_dir, "session_s1.json")) as f:
+            self.assertEqual(json.load(f), {"DevA": {"COUNT": 3}})
+
+        legacy_dir = os.path.join(self.tmp, "legacy")
+        os.makedirs(legacy_dir)
+        with open(os.path.join(legacy_dir, "session_old.json"), "w") as f:
+            json.dump({"DevB": {"SN": "X1"}}, f)
+        datastore_manager.import_files(legacy_dir)
+        backend = SQLiteBackend(os.path.join(legacy_dir, DB_FILENAME))
+        try:
+            self.assertEqual(backend.load_session("old"), {"DevB": {"SN": "X1"}})
+            self.assertEqual([r[1] for r in backend.query("DevB", "SN")], ["X1"])
+        finally:
+            backend.close()
+
+    def test_cleanup_removes_stale_database_sessions(self):
+        backend = SQLiteBackend(os.path.join(self.tmp, DB_FILENAME))
+        backend.save_devices("old", {"DevA": {"K": 1}}, ts=time.time() - 30 * 86400)
+        backend.save_devices("new", {"DevA": {"K": 2}})
+        backend.close()
+
+        store = DataStore(
+            filename=os.path.join(self.tmp, "session_cur.json"),
+            session_id="cur",
+            persistence="sqlite",
+            cleanup_days=7,
+        )
+        store.stop()
+        backend = SQLiteBackend(os.path.join(self.tmp, DB_FILENAME))
+        try:
+            self.assertEqual([s[0] for s in backend.list_sessions()], ["new"])
+        finally:
+            backend.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
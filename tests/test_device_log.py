@@ -0,0 +1,141 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+from components.Device import Device
+from components.DeviceLog import (
+    RotatingDeviceLog,
+    segment_for_iteration,
+    wait_for_compression,
+)
+
+
+class TestRotatingDeviceLog(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "DevA_COM1.log")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _index(self):
+        with open(self.path + ".index.json", encoding="utf-8") as f:
+            return json.load(f)["segments"]
+
+    def test_rotates_by_iteration_and_indexes_segments(self):
+        log = RotatingDeviceLog(self.path, iterations_per_segment=2)
+        for iteration in range(1, 6):
+            log.begin_iteration(iteration)
+            log.write(f"iteration {iteration}\n")
+        log.close()
+
+        self.assertEqual(
+            [(s["file"], s["first_iteration"], s["last_iteration"]) for s in self._index()],
+            [
+                ("DevA_COM1.log.1", 1, 2),
+                ("DevA_COM1.log.2", 3, 4),
+                ("DevA_COM1.log", 5, 5),
+            ],
+        )
+        segment = segment_for_iteration(self.path, 4)
+        self.assertEqual(segment, self.path + ".2")
+        with open(segment, encoding="utf-8") as f:
+            self.assertEqual(f.read(), "iteration 3\niteration 4\n")
+        self.assertIsNone(segment_for_iteration(self.path, 9))
+
+    def test_size_rotation_keeps_newest_segments(self):
+        log = RotatingDeviceLog(self.path, max_bytes=100, max_segments=2)
+        log.begin_iteration(1)
+        for i in range(30):
+            log.write(f"+CSQ: {i:02d},99 OK\n")
+        log.close()
+
+        segments = self._index()
+        self.assertEqual([s["file"] for s in segments][:2], ["DevA_COM1.log.3", "DevA_COM1.log.4"])
+        self.assertFalse(os.path.exists(self.path + ".2"))
+        # 跨段的迭代在每个段中都有记录
+        self.assertTrue(all(s["first_iteration"] == 1 for s in segments))
+        for s in segments:
+            self.assertLessEqual(s["bytes"], 100)
+
+    def test_closed_segments_are_compressed_off_thread(self):
+        writer = threading.current_thread()
+        compress_threads = []
+        real_open = gzip.open
+
+        def tracking_open(*args, **kwargs):
+            compress_threads.append(threading.current_thread())
+            return real_open(*args, **kwargs)
+
+        with patch("components.DeviceLog.gzip.open", side_effect=tracking_open):
+            log = RotatingDeviceLog(self.path, iterations_per_segment=1, compress=True)
+            for iteration in (1, 2, 3):
+                log.begin_iteration(iteration)
+                log.write("OK\n" * 1000)
+            log.close()
+            self.assertTrue(wait_for_compression(timeout=5))
+
+        self.assertEqual(len(compress_threads), 2)
+        self.assertNotIn(writer, compress_threads)
+        segment = segment_for_iteration(self.path, 2)
+        self.assertTrue(segment.endswith(".log.2.gz"))
+        self.assertFalse(os.path.exists(self.path + ".2"))
+        with gzip.open(segment, "rt", encoding="utf-8") as f:
+            self.assertEqual(f.read(), "OK\n" * 1000)
+
+    def test_segment_retired_during_compression_is_removed(self):
+        log = RotatingDeviceLog(
+            self.path, iterations_per_segment=1, compress=True, max_segments=1
+        )
+        real_copy = shutil.copyfileobj
+        retired = []
+
+        def copy_then_retire(fin, fout, length):
+            real_copy(fin, fout, length)
+            if not retired:
+                # 压缩线程已打开 .log.1 时下一次轮转删除了它
+                retired.append(True)
+                log.begin_iteration(3)
+                log.write("iteration 3\n")
+
+        with patch("components.DeviceLog.shutil.copyfileobj", side_effect=copy_then_retire):
+            log.begin_iteration(1)
+            log.write("iteration 1\n")
+            log.begin_iteration(2)
+            log.write("iteration 2\n")
+            self.assertTrue(wait_for_compression(timeout=5))
+        log.close()
+
+        files = [s["file"] for s in self._index()]
+        self.assertEqual(files, ["DevA_COM1.log.2.gz", "DevA_COM1.log"])
+        self.assertEqual(
+            sorted(f for f in os.listdir(self.tmp) if not f.endswith(".index.json")),
+            sorted(files),
+        )
+
+    def test_device_uses_rotating_log_when_configured(self):
+        device = Device.__new__(Device)
+        device.name = "DevA"
+        device.port = "/dev/ttyUSB0"
+        device.last_iteration_success = None
+        device.setup_logging(self.tmp, {"iterations_per_segment": 1})
+        self.assertIsInstance(device.log_file, RotatingDeviceLog)
+        device.mark_iteration(1, 2)
+        device.mark_iteration(2, 2)
+        device.log_file.close()
+        log_path = os.path.join(self.tmp, "DevA__dev_ttyUSB0.log")
+        with open(segment_for_iteration(log_path, 2), encoding="utf-8") as f:
+            self.assertIn("Iteration 2/2 Started", f.read())
+
+        device.setup_logging(self.tmp, {"compress": True})
+        self.assertNotIsInstance(device.log_file, RotatingDeviceLog)
+        device.log_file.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
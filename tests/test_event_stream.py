@@ -0,0 +1,128 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from types import SimpleNamespace
+
+from components import EventStream as event_stream_module
+from components.CommandExecutor import CommandExecutor
+from components.EventStream import EventStream
+from components.ExecutionPolicy import ExecutionPolicy
+from utils.cancellation import CancellationToken
+
+
+def read_events(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+class _FakeDevice:
+    def send_command(self, cmd, **kwargs):
+        return {"success": False, "response": "ERROR\r\n", "elapsed_time": 0.25, "matched": []}
+
+
+class _FakeActionHandler:
+    def handle_actions(self, command, response, action_type, context):
+        return action_type != "error_actions"
+
+    def handle_response_actions(self, command, response, action_type, context):
+        return True
+
+
+class TestEventStream(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "events.jsonl")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_events_are_written_in_order_on_close(self):
+        stream = EventStream(self.path, flush_interval=60)
+        threads = [
+            threading.Thread(
+                target=lambda n=n: [stream.emit("tick", worker=n, i=i) for i in range(100)]
+            )
+            for n in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stream.emit("done", value=b"\x01")
+        stream.close()
+
+        events = read_events(self.path)
+        self.assertEqual(len(events), 401)
+        self.assertEqual(events[-1]["event"], "done")
+        self.assertEqual(events[-1]["value"], "b'\\x01'")
+        for n in range(4):
+            self.assertEqual([e["i"] for e in events if e.get("worker") == n], list(range(100)))
+
+    def test_flush_and_rotation(self):
+        stream = EventStream(self.path, max_bytes=2000, backup_count=2, flush_interval=60)
+        try:
+            stream.emit("first")
+            self.assertTrue(stream.flush(timeout=2))
+            self.assertEqual(read_events(self.path)[0]["event"], "first")
+            for i in range(200):
+                stream.emit("command_end", device="DevA", response="OK" * 10, i=i)
+            stream.flush(timeout=2)
+        finally:
+            stream.close()
+        self.assertTrue(os.path.exists(f"{self.path}.2"))
+        self.assertFalse(os.path.exists(f"{self.path}.3"))
+        for name in (self.path, f"{self.path}.1"):
+            self.assertLessEqual(os.path.getsize(name), 2000)
+        self.assertEqual(read_events(self.path)[-1]["i"], 199)
+
+    def test_overflow_is_counted(self):
+        stream = EventStream(self.path, max_pending=10, flush_interval=60)
+        for i in range(25):
+            stream.emit("tick", i=i)
+        stream.close()
+        events = read_events(self.path)
+        self.assertEqual(len(events), 11)
+        self.assertEqual((events[-1]["event"], events[-1]["count"]), ("events_dropped", 15))
+
+    def test_executor_emits_command_events(self):
+        stream = event_stream_module.open_event_stream(self.path)
+        self.addCleanup(event_stream_module.close_event_stream)
+
+        executor = CommandExecutor.__new__(CommandExecutor)
+        executor.lock = threading.Lock()
+        executor.data_store = None
+        executor.iteration_token = CancellationToken()
+        executor.command_listeners = []
+        executor.current_iteration = None
+        executor.policy = ExecutionPolicy()
+        executor.action_handler = _FakeActionHandler()
+        executor.command_device_dict = SimpleNamespace(
+            devices={"DevA": _FakeDevice()}, device_monitors={}
+        )
+        executor._handle_response_actions_with_defer = lambda *args, **kwargs: True
+        executor.current_iteration = 3
+        self.assertFalse(
+            executor.execute_command(
+                {"device": "DevA", "command": "AT", "expected_responses": ["OK"], "timeout": 500}
+            )
+        )
+        stream.flush(timeout=2)
+
+        start, end = read_events(self.path)
+        self.assertEqual(
+            (start["event"], start["device"], start["command"], start["timeout_ms"]),
+            ("command_start", "DevA", "AT", 500),
+        )
+        self.assertEqual(end["event"], "command_end")
+        self.assertEqual(end["iteration"], 3)
+        self.assertFalse(end["passed"])
+        self.assertEqual(end["response"], "ERROR\r\n")
+        self.assertEqual(end["elapsed_ms"], 250.0)
+        self.assertEqual(end["actions"]["error_actions"], False)
+
+
+if __name__ == "__main__":
+    unittest.main()
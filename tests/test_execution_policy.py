@@ -0,0 +1,134 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+
+from components.ExecutionPolicy import ExecutionPolicy, SessionGuard
+from tests._pty_rig import PtyResponder, make_command, make_device, use_temp_session
+
+
+class TestSessionGuard(unittest.TestCase):
+    def test_policy_from_config(self):
+        policy = ExecutionPolicy.from_config(
+            {"skip_failed_device": True, "max_consecutive_failures": 3, "time_budget": 5}
+        )
+        self.assertEqual(policy, ExecutionPolicy(True, 3, 5.0))
+        self.assertEqual(ExecutionPolicy.from_config(None), ExecutionPolicy())
+
+    def test_consecutive_failures_reset_on_pass(self):
+        guard = SessionGuard(ExecutionPolicy(max_consecutive_failures=2)).start()
+        guard.record(False)
+        guard.record(True)
+        guard.record(False)
+        self.assertFalse(guard.should_stop())
+        guard.record(False)
+        self.assertTrue(guard.should_stop())
+        self.assertIn("2 consecutive", guard.stop_reason)
+
+    def test_time_budget_fires_callback(self):
+        fired = threading.Event()
+        guard = SessionGuard(ExecutionPolicy(time_budget=0.05), on_expire=fired.set)
+        guard.start()
+        try:
+            self.assertTrue(fired.wait(2))
+            self.assertTrue(guard.should_stop())
+        finally:
+            guard.cancel()
+
+    def test_unlimited_policy_never_stops(self):
+        guard = SessionGuard(ExecutionPolicy()).start()
+        for _ in range(100):
+            guard.record(False)
+        self.assertFalse(guard.should_stop())
+
+
+@unittest.skipUnless(sys.platform.startswith("linux"), "pty emulation needs Linux")
+class TestIterationAbortPty(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp)
+        use_temp_session(self, self.tmp)
+        self.rigs = {name: PtyResponder() for name in ("DevA", "DevB", "DevC")}
+        self.executor = None
+
+    def tearDown(self):
+        if self.executor is not None:
+            self.executor.command_device_dict.close_all_devices()
+            self.executor.shutdown()
+            self.executor.data_store.stop()
+        for rig in self.rigs.values():
+            rig.close()
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _executor(self, commands, iteration_config=None):
+        from components.CommandExecutor import CommandExecutor
+
+        dict_data = {
+            "Devices": [make_device(n, rig.port) for n, rig in self.rigs.items()],
+            "Commands": commands,
+        }
+        if iteration_config:
+            dict_data["ConfigForIterations"] = iteration_config
+        self.executor = CommandExecutor(dict_data)
+        return self.executor
+
+    def test_critical_failure_cancels_in_flight_waits(self):
+        executor = self._executor(
+            [
+                make_command(
+                    "DevA",
+                    "AT+CRIT",
+                    1,
+                    timeout=300,
+                    expected_responses=["NEVER"],
+                    critical=True,
+                    concurrent_strategy="parallel",
+                ),
+                make_command(
+                    "DevB",
+                    "AT+SLOW",
+                    1,
+                    timeout=8000,
+                    expected_responses=["NEVER"],
+                    concurrent_strategy="parallel",
+                ),
+                make_command("DevC", "AT+AFTER", 2),
+            ]
+        )
+        start = time.time()
+        self.assertFalse(executor.execute())
+        self.assertLess(time.time() - start, 4)
+        self.assertNotIn("AT+AFTER", self.rigs["DevC"].received)
+
+    def test_skip_failed_device(self):
+        executor = self._executor(
+            [
+                make_command("DevA", "AT+BAD", 1, timeout=200, expected_responses=["NEVER"]),
+                make_command("DevA", "AT+NEXT", 2),
+                make_command("DevB", "AT+OTHER", 3),
+            ],
+            {"skip_failed_device": True},
+        )
+        self.assertFalse(executor.execute())
+        self.assertNotIn("AT+NEXT", self.rigs["DevA"].received)
+        self.assertIn("AT+OTHER", self.rigs["DevB"].received)
+
+    def test_cancel_interrupts_wait_action(self):
+        executor = self._executor(
+            [make_command("DevA", "AT", 1, success_actions=[{"wait": {"duration": 8000}}])]
+        )
+        threading.Timer(0.5, executor.cancel).start()
+        start = time.time()
+        self.assertFalse(executor.execute())
+        self.assertLess(time.time() - start, 4)
+        # 取消后的迭代直接返回失败
+        self.assertFalse(executor.execute())
+
+
+if __name__ == "__main__":
+    unittest.main()
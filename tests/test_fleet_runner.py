@@ -0,0 +1,154 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from components.FleetRunner import (
+    FleetRunner,
+    expand_fleet,
+    has_device_templates,
+)
+from tests._pty_rig import PtyResponder, make_command, use_temp_session
+
+
+class TestFleetExpansion(unittest.TestCase):
+    def test_port_list_expands_and_rebinds_commands(self):
+        dict_data = {
+            "Devices": [{"name": "DUT", "ports": ["COM3", "COM4"], "baud_rate": 115200}],
+            "Commands": [
+                make_command(
+                    "DUT",
+                    "AT",
+                    1,
+                    success_actions=[
+                        {"save": {"device": "DUT", "variable": "v", "value": "1"}}
+                    ],
+                )
+            ],
+        }
+        self.assertTrue(has_device_templates(dict_data))
+        units, instances = expand_fleet(dict_data)
+        self.assertEqual(instances, {"DUT": ["DUT[0]", "DUT[1]"]})
+        self.assertEqual(units[1]["Devices"][0]["port"], "COM4")
+        self.assertNotIn("ports", units[1]["Devices"][0])
+        command = units[1]["Commands"][0]
+        self.assertEqual(command["device"], "DUT[1]")
+        self.assertEqual(command["success_actions"][0]["save"]["device"], "DUT[1]")
+        # 原始配置不被修改
+        self.assertEqual(dict_data["Commands"][0]["device"], "DUT")
+
+    def test_port_glob_sorted_and_count_limited(self):
+        tmp = tempfile.mkdtemp()
+        try:
+            for name in ("tty2", "tty0", "tty1"):
+                Path(tmp, name).touch()
+            dict_data = {
+                "Devices": [{"name": "DUT", "port": f"{tmp}/tty*", "count": 2}],
+                "Commands": [],
+            }
+            units, _ = expand_fleet(dict_data)
+            self.assertEqual(
+                [u["Devices"][0]["port"] for u in units],
+                [f"{tmp}/tty0", f"{tmp}/tty1"],
+            )
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def test_mismatched_templates_rejected(self):
+        dict_data = {
+            "Devices": [
+                {"name": "DUT", "ports": ["COM3", "COM4"]},
+                {"name": "AUX", "ports": ["COM5"]},
+            ],
+            "Commands": [],
+        }
+        with self.assertRaises(ValueError):
+            expand_fleet(dict_data)
+
+    def test_fixed_devices_rejected(self):
+        dict_data = {
+            "Devices": [
+                {"name": "DUT", "ports": ["COM3"]},
+                {"name": "PSU", "port": "COM9"},
+            ],
+            "Commands": [],
+        }
+        with self.assertRaises(ValueError):
+            expand_fleet(dict_data)
+
+    def test_no_templates(self):
+        dict_data = {"Devices": [{"name": "A", "port": "COM1"}], "Commands": []}
+        self.assertFalse(has_device_templates(dict_data))
+        self.assertEqual(expand_fleet(dict_data), ([], {}))
+
+
+@unittest.skipUnless(sys.platform.startswith("linux"), "pty emulation needs Linux")
+class TestFleetRunnerPty(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp)
+        use_temp_session(self, self.tmp)
+        self.rigs = [PtyResponder() for _ in range(3)]
+
+    def tearDown(self):
+        for rig in self.rigs:
+            rig.close()
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_units_run_independently_with_own_namespace(self):
+        dict_data = {
+            "Devices": [
+                {
+                    "name": "DUT",
+                    "ports": [rig.port for rig in self.rigs],
+                    "baud_rate": 115200,
+                    "status": "enabled",
+                }
+            ],
+            "Commands": [
+                make_command(
+                    "DUT",
+                    "AT+SN",
+                    1,
+                    success_actions=[
+                        {"save": {"device": "DUT", "variable": "sn", "value": "abc"}}
+                    ],
+                ),
+                make_command("DUT", "ECHO {sn}", 2, expected_responses=["abc"]),
+            ],
+            "Constants": {"pin": ""},
+        }
+        runner = FleetRunner(dict_data, session_id="fleet")
+        with patch("builtins.input", side_effect=["", "1234"]) as prompt, patch(
+            "components.FleetRunner.get_metrics_server"
+        ) as get_server:
+            summary = runner.run(loop_count=2)
+        get_server.return_value.bind.assert_called_once_with(
+            runner.command_metrics, runner, runner.data_store
+        )
+        self.assertEqual(sorted(runner.devices), ["DUT[0]", "DUT[1]", "DUT[2]"])
+        self.assertEqual(prompt.call_count, 2)
+        self.assertEqual(runner.data_store.get_data("Constants", "pin"), "1234")
+
+        total = summary["total"]
+        self.assertEqual(total["units"], 3)
+        self.assertEqual(total["passed_units"], 3)
+        self.assertEqual(total["commands"], 12)
+        self.assertEqual(total["failed_commands"], 0)
+        self.assertEqual(sum(s.latency.count for s in runner.stats), 12)
+        self.assertEqual(runner.command_metrics.get("DUT[2]", "ECHO abc").count, 2)
+        self.assertEqual(len(runner.command_metrics), 6)
+        self.assertLessEqual(total["latency_ms"]["p50"], total["latency_ms"]["max"])
+        for index, rig in enumerate(self.rigs):
+            self.assertEqual(rig.received.count("ECHO abc"), 2)
+            self.assertEqual(runner.data_store.get_data(f"DUT[{index}]", "sn"), "abc")
+        self.assertIsNone(runner.data_store.get_data("DUT", "sn"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+from components.IterationPipeline import IterationPipeline, build_device_groups
+from tests._pty_rig import PtyResponder, make_command, make_device, use_temp_session
+
+
+class TestBuildDeviceGroups(unittest.TestCase):
+    def test_independent_devices_get_own_group(self):
+        dict_data = {
+            "Devices": [make_device("A"), make_device("B"), make_device("C")],
+            "Commands": [make_command("A", "AT", 1), make_command("B", "AT", 2)],
+        }
+        self.assertEqual(build_device_groups(dict_data), [["A"], ["B"], ["C"]])
+
+    def test_declared_groups_are_merged(self):
+        dict_data = {
+            "Devices": [make_device("A"), make_device("B"), make_device("C")],
+            "Commands": [],
+        }
+        self.assertEqual(
+            build_device_groups(dict_data, [["A", "C"]]), [["A", "C"], ["B"]]
+        )
+
+    def test_cross_device_actions_merge_groups(self):
+        dict_data = {
+            "Devices": [make_device("A"), make_device("B"), make_device("C"), make_device("D")],
+            "Commands": [
+                make_command(
+                    "A",
+                    "AT",
+                    1,
+                    success_actions=[
+                        {"save": {"device": "B", "variable": "v", "value": "1"}}
+                    ],
+                ),
+                make_command("C", "AT", 2, error_actions=[{"execute_command_by_order": 3}]),
+                make_command("D", "AT", 3),
+            ],
+        }
+        self.assertEqual(build_device_groups(dict_data), [["A", "B"], ["C", "D"]])
+
+
+@unittest.skipUnless(sys.platform.startswith("linux"), "pty emulation needs Linux")
+class TestIterationPipelinePty(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp)
+        use_temp_session(self, self.tmp)
+        self.journal = []
+        self.fast = PtyResponder(journal=self.journal, name="Fast")
+        self.slow = PtyResponder(delay=0.3, journal=self.journal, name="Slow")
+
+    def tearDown(self):
+        self.fast.close()
+        self.slow.close()
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_fast_group_runs_ahead_within_skew(self):
+        from components.CommandExecutor import CommandExecutor
+
+        dict_data = {
+            "Devices": [make_device("Fast", self.fast.port), make_device("Slow", self.slow.port)],
+            "Commands": [make_command("Fast", "AT", 1), make_command("Slow", "AT", 2)],
+        }
+        executor = CommandExecutor(dict_data)
+        try:
+            pipeline = IterationPipeline(
+                executor, build_device_groups(dict_data), max_skew=2
+            )
+            self.assertEqual(pipeline.run(loop_count=4), (4, 0))
+        finally:
+            executor.command_device_dict.close_all_devices()
+            executor.shutdown()
+            executor.data_store.stop()
+
+        order = [name for name, _ in self.journal]
+        fast_at = [i for i, name in enumerate(order) if name == "Fast"]
+        slow_at = [i for i, name in enumerate(order) if name == "Slow"]
+        self.assertEqual((len(fast_at), len(slow_at)), (4, 4))
+        # Fast 最多领先 2 轮：第 3 轮可以在 Slow 第 1 轮完成前开始，第 4 轮必须等待
+        self.assertLess(fast_at[2], slow_at[1])
+        self.assertGreater(fast_at[3], slow_at[0])
+
+    def test_groups_record_their_own_iteration(self):
+        from components.CommandExecutor import CommandExecutor
+        from components.DataStore import DataStore
+
+        def save(device):
+            return [{"save": {"device": device, "variable": "n", "value": "1"}}]
+
+        dict_data = {
+            "Devices": [make_device("Fast", self.fast.port), make_device("Slow", self.slow.port)],
+            "Commands": [
+                make_command("Fast", "AT", 1, success_actions=save("Fast")),
+                make_command("Slow", "AT", 2, success_actions=save("Slow")),
+            ],
+        }
+        data_store = DataStore(persist=False, history=["n"])
+        executor = CommandExecutor(dict_data, data_store=data_store)
+        try:
+            pipeline = IterationPipeline(
+                executor, build_device_groups(dict_data), max_skew=2
+            )
+            self.assertEqual(pipeline.run(loop_count=3), (3, 0))
+            self.assertEqual(
+                [group.current_iteration for group in pipeline.executors], [3, 3]
+            )
+        finally:
+            executor.command_device_dict.close_all_devices()
+            executor.shutdown()
+            data_store.stop()
+
+        for device in ("Fast", "Slow"):
+            self.assertEqual(
+                [sample[0] for sample in data_store.get_history(device, "n")], [1, 2, 3]
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
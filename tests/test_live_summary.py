@@ -0,0 +1,117 @@
+import io
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+from components.LiveSummary import LiveSummary
+from components.Logger import AutoComLogger
+
+
+class TestLiveSummary(unittest.TestCase):
+    def test_render_aggregates_per_device(self):
+        summary = LiveSummary(stream=io.StringIO())
+        for i in range(100):
+            summary.record("DevA", True, float(i + 1), "AT")
+        summary.record("DevB", False, 5.0, "AT+CSQ")
+        summary.record("DevB", True, 7.0, "AT")
+
+        header, dev_a, dev_b = summary.render()
+        self.assertIn("102 commands", header)
+        self.assertIn("101/102 passed", header)
+        self.assertIn("pass 100.0% (100/100)", dev_a)
+        self.assertIn("p50 51.0ms", dev_a)
+        self.assertIn("p95 95.0ms", dev_a)
+        self.assertNotIn("last fail", dev_a)
+        self.assertIn("pass 50.0% (1/2)", dev_b)
+        self.assertIn("last fail: AT+CSQ @", dev_b)
+
+        # 速率窗口在每次输出后重新开始
+        self.assertIn(" 0.0 cmd/s", summary.render()[1])
+
+    def test_stop_writes_final_summary(self):
+        stream = io.StringIO()
+        summary = LiveSummary(interval=60, stream=stream)
+        summary.start()
+        summary.record("DevA", True, 1.0)
+        summary.stop()
+        self.assertIn("[DevA]", stream.getvalue())
+
+
+class TestSummaryOutputMode(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".log")
+        os.close(fd)
+        self.logger = AutoComLogger(
+            name="TestSummary", log_file=self.path, enable_color=False, cli_output_mode="summary"
+        )
+        self.console = io.StringIO()
+        self.logger._console_handler.setStream(self.console)
+
+    def tearDown(self):
+        if self.logger._summary is not None:
+            self.logger._summary.stream = io.StringIO()
+            self.logger.finish_summary()
+        self.logger.tp.close()
+        self.logger._file_handler.close()
+        os.unlink(self.path)
+
+    def test_rows_go_to_file_and_results_to_summary(self):
+        with patch("builtins.print") as console_print, patch("atexit.register") as register:
+            self.logger.log_iteration_start(1, 2)
+            self.logger.log_execution(True, device="DevA", command="AT", response="OK", elapsed_ms=2.0)
+            self.logger.log_execution(False, device="DevA", command="AT+CSQ", response="", elapsed_ms=4.0)
+        console_print.assert_not_called()
+        # 文件夹/监视/Fleet/分片模式不经过 flush()，进程退出时输出最终汇总
+        register.assert_any_call(self.logger.finish_summary)
+
+        summary = self.logger._summary
+        self.assertIsNotNone(summary)
+        summary.stream = io.StringIO()
+        self.logger.flush()
+        self.assertIsNone(self.logger._summary)
+        self.assertIn("pass 50.0% (1/2)", summary.stream.getvalue())
+
+        with open(self.path, encoding="utf-8") as f:
+            content = f.read()
+        self.assertIn("Starting iteration 1/2", content)
+        self.assertIn("AT+CSQ", content)
+
+    def test_async_summary_is_written_by_dispatcher(self):
+        self.logger.enable_async()
+        self.addCleanup(self.logger.disable_async)
+        self.logger.log_execution(True, device="DevA", command="AT", response="OK", elapsed_ms=2.0)
+
+        writers = []
+
+        class _Stream(io.StringIO):
+            def write(self, text):
+                writers.append(threading.current_thread().name)
+                return super().write(text)
+
+        summary = self.logger._summary
+        summary.stream = _Stream()
+        self.logger.flush()
+        self.assertEqual(set(writers), {"TestSummaryLogWriter"})
+        self.assertIn("[DevA]", summary.stream.getvalue())
+
+    def test_forwarded_results_are_counted_by_coordinator(self):
+        forwarded = []
+        self.logger.set_forwarder(lambda kind, payload: forwarded.append((kind, payload)))
+        self.logger.log_execution(True, device="DevA", command="AT", response="OK", elapsed_ms=2.0)
+        self.logger.set_forwarder(None)
+        self.assertEqual([kind for kind, _ in forwarded], ["summary", "row"])
+
+        for kind, payload in forwarded:
+            with patch("builtins.print"):
+                self.logger.replay(kind, payload, prefix="[shard-0] ")
+        summary = self.logger._summary
+        summary.stream = io.StringIO()
+        summary.stop()
+        self.assertIn("[DevA] ", summary.stream.getvalue())
+        self.assertIn("pass 100.0% (1/1)", summary.stream.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
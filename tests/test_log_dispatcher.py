@@ -0,0 +1,107 @@
+import io
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from components.LogDispatcher import LogDispatcher
+from components.Logger import AutoComLogger
+
+
+class SlowStream(io.StringIO):
+    def write(self, s):
+        time.sleep(0.02)
+        return super().write(s)
+
+
+class TestLogDispatcher(unittest.TestCase):
+    def test_close_drains_in_order(self):
+        out = []
+        dispatcher = LogDispatcher(queue_size=2000)
+        for i in range(1000):
+            self.assertTrue(dispatcher.submit(out.append, i))
+        dispatcher.close()
+        self.assertEqual(out, list(range(1000)))
+        self.assertFalse(dispatcher.submit(out.append, -1))
+
+    def test_overflow_drops_and_reports_summary(self):
+        release = threading.Event()
+        reported = []
+        out = []
+        dispatcher = LogDispatcher(queue_size=5, on_dropped=reported.append)
+        try:
+            dispatcher.submit(release.wait)
+            time.sleep(0.05)  # 输出线程阻塞在第一个任务上
+            accepted = sum(dispatcher.submit(out.append, i) for i in range(20))
+            self.assertEqual(accepted, 5)
+            release.set()
+            self.assertTrue(dispatcher.flush(timeout=2))
+        finally:
+            dispatcher.close()
+        self.assertEqual(out, list(range(5)))
+        self.assertEqual(reported, [15])
+        self.assertEqual(dispatcher.dropped_total, 15)
+
+    def test_invalid_overflow_policy(self):
+        with self.assertRaises(ValueError):
+            LogDispatcher(overflow="spill")
+
+
+class TestAsyncLogger(unittest.TestCase):
+    def setUp(self):
+        self.logger = AutoComLogger(name="TestAsync", enable_color=False, cli_output_mode="plain")
+        self.stream = SlowStream()
+        self.logger._console_handler.setStream(self.stream)
+
+    def tearDown(self):
+        self.logger.disable_async()
+
+    def test_slow_console_does_not_block_callers(self):
+        self.logger.enable_async(queue_size=100)
+        start = time.perf_counter()
+        for i in range(20):
+            self.logger.log_info(f"[DevA] line {i}")
+        # 同步输出需要至少 20 * 20ms
+        self.assertLess(time.perf_counter() - start, 0.2)
+
+        self.logger.flush()
+        lines = self.stream.getvalue().splitlines()
+        self.assertEqual(len(lines), 20)
+        self.assertIn("line 19", lines[-1])
+
+    def test_disable_restores_sync_output(self):
+        self.logger.enable_async()
+        self.logger.log_info("queued")
+        self.logger.disable_async()
+        self.assertIn("queued", self.stream.getvalue())
+        self.logger.log_info("direct")
+        self.assertIn("direct", self.stream.getvalue())
+        self.assertIn(self.logger._console_handler, self.logger._logger.handlers)
+
+    def test_async_table_rows_are_buffered_until_flush(self):
+        fd, path = tempfile.mkstemp(suffix=".log")
+        os.close(fd)
+        self.addCleanup(os.unlink, path)
+        self.logger.set_log_file(path)
+        self.addCleanup(self.logger._file_handler.close)
+        self.addCleanup(self.logger.tp.close)
+
+        self.logger.enable_async()
+        self.assertFalse(self.logger.tp.flush_rows)
+        for i in range(5):
+            self.logger.log_realtime_table_row([f"t{i}", "PASS", "DevA", "1.0", "AT", "OK"])
+        self.logger._dispatcher.flush(timeout=5)
+        with open(path, encoding="utf-8") as f:
+            self.assertNotIn("AT", f.read())
+
+        self.logger.flush()
+        with open(path, encoding="utf-8") as f:
+            self.assertEqual(f.read().count("│t"), 5)
+
+        self.logger.disable_async()
+        self.assertTrue(self.logger.tp.flush_rows)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,7 +2,7 @@ import os
 import tempfile
 import unittest
 
-from components.Logger import AutoComLogger
+from components.Logger import AutoComLogger, preview_response
 from components.TablePrinter import TablePrinter
 
 
@@ -96,5 +96,17 @@ class TablePrinterTests(unittest.TestCase):
         self.assertGreater(widths[-1], widths[4])
 
 
+class PreviewResponseTests(unittest.TestCase):
+    def test_only_displayed_prefix_is_escaped(self):
+        self.assertEqual(preview_response("OK\r\n", 48), "OK\\r\\n")
+        big = "+QCFG: \"band\"\r\n" * 100000
+        self.assertEqual(preview_response(big, 10), '+QCFG: "ba')
+
+    def test_bytes_preview_keeps_split_multibyte_char_out(self):
+        data = "温度".encode("utf-8") * 1000
+        self.assertEqual(preview_response(data, 3), "\\u6e29\\u5ea6\\u6e29")
+        self.assertEqual(preview_response(b"\xff\xfeOK", 4), "\\xff\\xfeOK")
+
+
 if __name__ == "__main__":
     unittest.main()
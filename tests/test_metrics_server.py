@@ -0,0 +1,73 @@
+import unittest
+import urllib.error
+import urllib.request
+from types import SimpleNamespace
+
+from components.CommandMetrics import CommandMetrics
+from components.DataStore import DataStore
+from components.MetricsServer import CONTENT_TYPE, MetricsServer
+
+
+class TestMetricsServer(unittest.TestCase):
+    def setUp(self):
+        self.server = MetricsServer(port=0).start()
+        host, port = self.server.address
+        self.url = f"http://{host}:{port}"
+
+    def tearDown(self):
+        self.server.stop()
+
+    def _scrape(self):
+        with urllib.request.urlopen(self.url + "/metrics", timeout=5) as response:
+            self.assertEqual(response.headers["Content-Type"], CONTENT_TYPE)
+            return response.read().decode("utf-8")
+
+    def test_exposes_command_device_and_datastore_metrics(self):
+        metrics = CommandMetrics()
+        metrics.record_command("DevA", 'AT+QCFG="band"', True, 3.0)
+        metrics.record_command("DevA", 'AT+QCFG="band"', True, 40.0)
+        metrics.record_command("DevA", 'AT+QCFG="band"', False, 900.0)
+        devices = SimpleNamespace(
+            devices={"DevA": SimpleNamespace(bytes_sent=120, bytes_received=4096)},
+            device_monitors={"DevA": SimpleNamespace(command_queue=[1, 2])},
+        )
+        data_store = DataStore(persist=False)
+        try:
+            self.server.bind(metrics, devices, data_store)
+            text = self._scrape()
+        finally:
+            data_store.stop()
+
+        lines = text.splitlines()
+        self.assertEqual(lines[-1], "# EOF")
+        self.assertIn('autocom_commands_total{device="DevA",result="pass"} 2', lines)
+        self.assertIn('autocom_commands_total{device="DevA",result="fail"} 1', lines)
+        labels = 'device="DevA",command="AT+QCFG=\\"band\\""'
+        self.assertIn(f'autocom_command_latency_seconds_bucket{{{labels},le="0.005"}} 1', lines)
+        self.assertIn(f'autocom_command_latency_seconds_bucket{{{labels},le="0.05"}} 2', lines)
+        self.assertIn(f'autocom_command_latency_seconds_bucket{{{labels},le="+Inf"}} 3', lines)
+        self.assertIn(f"autocom_command_latency_seconds_count{{{labels}}} 3", lines)
+        self.assertIn(f"autocom_command_latency_seconds_sum{{{labels}}} 0.943", lines)
+        self.assertIn('autocom_serial_received_bytes_total{device="DevA"} 4096', lines)
+        self.assertIn('autocom_monitor_queue_depth{device="DevA"} 2', lines)
+        self.assertIn("autocom_datastore_save_failures_total 0", lines)
+        self.assertIn("autocom_log_dropped_records_total 0", lines)
+
+    def test_unbound_server_and_unknown_path(self):
+        self.assertEqual(
+            self._scrape().splitlines(),
+            [
+                "# TYPE autocom_log_dropped_records counter",
+                "# HELP autocom_log_dropped_records Log records dropped because "
+                "the asynchronous log queue was full.",
+                "autocom_log_dropped_records_total 0",
+                "# EOF",
+            ],
+        )
+        with self.assertRaises(urllib.error.HTTPError) as ctx:
+            urllib.request.urlopen(self.url + "/", timeout=5)
+        self.assertEqual(ctx.exception.code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+from components.CommandDeviceDict import CommandDeviceDict
+from components.DataStore import DataStore
+from components.Device import Device
+from components.Profiling import (
+    PHASE_TIMERS_FILE,
+    PROFILE_REPORT_FILE,
+    PROFILE_STATS_FILE,
+    SessionProfiler,
+    disable_phase_timers,
+    enable_phase_timers,
+    get_phase_timers,
+)
+from utils.common import CommonUtils
+
+
+def busy_profiled_function():
+    return sum(i * i for i in range(20000))
+
+
+class TestPhaseTimers(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.data_store = DataStore(persist=False)
+
+    def tearDown(self):
+        disable_phase_timers()
+        self.data_store.stop()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_timers_are_installed_only_while_enabled(self):
+        originals = {
+            (owner, attr): owner.__dict__[attr]
+            for owner, attr in (
+                (CommonUtils, "process_variables"),
+                (Device, "send_command"),
+                (Device, "write_to_log"),
+                (CommandDeviceDict, "_should_finish_command"),
+            )
+        }
+        self.assertIsNone(get_phase_timers())
+
+        enable_phase_timers()
+        self.assertIsNotNone(get_phase_timers())
+        for (owner, attr), original in originals.items():
+            self.assertIsNot(owner.__dict__[attr], original)
+            self.assertIs(type(owner.__dict__[attr]), type(original))
+
+        disable_phase_timers()
+        for (owner, attr), original in originals.items():
+            self.assertIs(owner.__dict__[attr], original)
+
+    def test_phases_aggregated_per_iteration(self):
+        path = os.path.join(self.tmp, PHASE_TIMERS_FILE)
+        timers = enable_phase_timers(path)
+        self.data_store.store_data("DevA", "imei", "12345")
+
+        timers.begin_iteration(1)
+        for _ in range(3):
+            self.assertEqual(
+                CommonUtils.process_variables("AT+X={imei}", self.data_store, "DevA"),
+                "AT+X=12345",
+            )
+        timers.begin_iteration(2)
+        CommonUtils.process_variables("AT", self.data_store, "DevA")
+        disable_phase_timers()
+
+        with open(path, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual([r["iteration"] for r in records], [1, 2])
+        self.assertEqual(records[0]["phases"]["variables"]["count"], 3)
+        self.assertEqual(timers.totals()["variables"]["count"], 4)
+        self.assertTrue(timers.summary_lines()[0].startswith("⏱ variables: n=4"))
+
+
+class TestSessionProfiler(unittest.TestCase):
+    def test_writes_stats_to_output_dir(self):
+        tmp = tempfile.mkdtemp()
+        try:
+            profiler = SessionProfiler(tmp).start()
+            busy_profiled_function()
+            worker = threading.Thread(target=busy_profiled_function)
+            worker.start()
+            worker.join()
+            report_path = profiler.stop()
+
+            self.assertTrue(os.path.exists(os.path.join(tmp, PROFILE_STATS_FILE)))
+            self.assertEqual(str(report_path), os.path.join(tmp, PROFILE_REPORT_FILE))
+            with open(report_path, encoding="utf-8") as f:
+                self.assertIn("busy_profiled_function", f.read())
+            self.assertIsNone(profiler.stop())
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def test_warns_once_when_thread_cannot_be_profiled(self):
+        profiler = SessionProfiler(tempfile.gettempdir())
+        with patch("components.Profiling.cProfile.Profile") as profile_cls, patch(
+            "components.Profiling.logger.log_session_warning"
+        ) as warning:
+            profile_cls.return_value.enable.side_effect = ValueError(
+                "Another profiling tool is already active"
+            )
+            profiler._start_thread_profile(None, "call", None)
+            profiler._start_thread_profile(None, "call", None)
+        warning.assert_called_once()
+        self.assertIn("not profiled", warning.call_args[0][0])
+        self.assertEqual(profiler._profiles, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
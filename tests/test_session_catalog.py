@@ -0,0 +1,124 @@
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from components.DataStore import DataStore
+from components.SessionCatalog import CATALOG_FILENAME, SessionCatalog
+
+
+def _update_sessions(data_dir, worker, count):
+    catalog = SessionCatalog(data_dir)
+    for i in range(count):
+        catalog.update(f"w{worker}_{i}", os.path.join(data_dir, "missing.json"), {})
+
+
+class TestSessionCatalog(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _write_session(self, session_id, data, age_days=0):
+        path = os.path.join(self.tmp, f"session_{session_id}.json")
+        with open(path, "w") as f:
+            json.dump(data, f)
+        ts = time.time() - age_days * 86400
+        os.utime(path, (ts, ts))
+        return path
+
+    def test_save_updates_catalog_entry(self):
+        store = DataStore(
+            filename=os.path.join(self.tmp, "session_s1.json"),
+            session_id="s1",
+            auto_cleanup=False,
+        )
+        store.store_data("DevA", "IMEI", "8612345")
+        store.stop()
+
+        sessions = dict(SessionCatalog(self.tmp).sessions())
+        self.assertEqual(sessions["s1"]["keys"], {"DevA": ["IMEI"]})
+        self.assertGreater(sessions["s1"]["size"], 0)
+        self.assertEqual([s[0] for s in DataStore.list_sessions(self.tmp)], ["s1"])
+
+    def test_concurrent_processes_do_not_lose_updates(self):
+        SessionCatalog(self.tmp).rebuild()
+        workers = [
+            multiprocessing.Process(target=_update_sessions, args=(self.tmp, w, 20))
+            for w in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(timeout=30)
+            self.assertEqual(worker.exitcode, 0)
+
+        sessions = dict(SessionCatalog(self.tmp).sessions())
+        self.assertEqual(len(sessions), 80)
+        self.assertFalse([n for n in os.listdir(self.tmp) if n.endswith(".tmp")])
+
+    def test_missing_catalog_is_rebuilt_once(self):
+        self._write_session("old", {"DevA": {"IMEI": "1"}})
+        self.assertEqual([s[0] for s in DataStore.list_sessions(self.tmp)], ["old"])
+        self.assertTrue(os.path.exists(os.path.join(self.tmp, CATALOG_FILENAME)))
+
+        # 目录建立后只读取目录文件；手动放入的会话需要 reindex
+        self._write_session("manual", {"DevA": {"IMEI": "2"}})
+        self.assertEqual([s[0] for s in DataStore.list_sessions(self.tmp)], ["old"])
+        self.assertEqual(SessionCatalog(self.tmp).rebuild(), 2)
+        self.assertEqual(len(DataStore.list_sessions(self.tmp)), 2)
+
+    def test_query_skips_sessions_without_variable(self):
+        self._write_session("a", {"DevA": {"IMEI": "1"}})
+        self._write_session("b", {"DevA": {"CSQ": 20}})
+        self._write_session("c", {"DevB": {"IMEI": "3"}})
+        SessionCatalog(self.tmp).rebuild()
+
+        with patch.object(
+            DataStore, "load_session_data", wraps=DataStore.load_session_data
+        ) as load:
+            results = DataStore.query_across_sessions("DevA", "IMEI", self.tmp)
+        self.assertEqual([(r[0], r[1]) for r in results], [("a", "1")])
+        self.assertEqual(load.call_count, 1)
+
+    def test_cleanup_runs_at_most_once_per_interval(self):
+        self._write_session("stale", {"DevA": {"K": 1}}, age_days=30)
+        self._write_session("fresh", {"DevA": {"K": 2}})
+        catalog = SessionCatalog(self.tmp)
+
+        self.assertTrue(catalog.claim_cleanup(3600))
+        self.assertEqual(catalog.cleanup(time.time() - 7 * 86400), 1)
+        self.assertFalse(os.path.exists(os.path.join(self.tmp, "session_stale.json")))
+        self.assertEqual([s[0] for s in catalog.sessions()], ["fresh"])
+        self.assertFalse(catalog.claim_cleanup(3600))
+        self.assertTrue(catalog.claim_cleanup(0))
+
+    def test_datastore_cleanup_is_backgrounded(self):
+        self._write_session("stale", {"DevA": {"K": 1}}, age_days=30)
+        store = DataStore(
+            filename=os.path.join(self.tmp, "session_cur.json"),
+            session_id="cur",
+            cleanup_days=7,
+        )
+        store.stop()
+        self.assertFalse(os.path.exists(os.path.join(self.tmp, "session_stale.json")))
+
+        # 间隔内的新 DataStore 不会再次触发清理
+        self._write_session("stale2", {"DevA": {"K": 1}}, age_days=30)
+        SessionCatalog(self.tmp).rebuild()
+        store = DataStore(
+            filename=os.path.join(self.tmp, "session_cur2.json"),
+            session_id="cur2",
+            cleanup_days=7,
+        )
+        store.stop()
+        self.assertTrue(os.path.exists(os.path.join(self.tmp, "session_stale2.json")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from components.ShardCoordinator import (
+    ShardCoordinator,
+    build_shard_steps,
+    partition_devices,
+)
+from tests._pty_rig import PtyResponder, make_command, make_device, use_temp_session
+
+
+class TestShardPlanning(unittest.TestCase):
+    def test_partition_balances_by_command_count(self):
+        devices = [make_device("A"), make_device("B"), make_device("C")]
+        commands = [make_command("A", "AT", i) for i in range(4)] + [
+            make_command("B", "AT", 5),
+            make_command("C", "AT", 6),
+        ]
+        shards = partition_devices(devices, commands, 2)
+        self.assertEqual(shards, [["A"], ["B", "C"]])
+
+    def test_partition_skips_disabled_and_caps_shard_count(self):
+        devices = [make_device("A"), dict(make_device("B"), status="disabled")]
+        self.assertEqual(partition_devices(devices, [], 8), [["A"]])
+
+    def test_ordered_steps_merge_same_shard_units(self):
+        commands = [
+            make_command("A", "AT1", 1),
+            make_command("A", "AT2", 2),
+            make_command("B", "AT3", 3),
+            make_command("A", "AT4", 4, concurrent_strategy="parallel"),
+            make_command("B", "AT5", 4, concurrent_strategy="parallel"),
+        ]
+        steps = build_shard_steps(commands, {"A": 0, "B": 1}, "ordered")
+        self.assertEqual([s["shards"] for s in steps], [{0}, {1}, {0, 1}])
+        self.assertEqual(len(steps[0]["commands"][0]), 2)
+
+    def test_iteration_barrier_uses_single_step(self):
+        commands = [make_command("A", "AT1", 1), make_command("B", "AT2", 2)]
+        steps = build_shard_steps(commands, {"A": 0, "B": 1}, "iteration")
+        self.assertEqual(len(steps), 1)
+        self.assertEqual(steps[0]["shards"], {0, 1})
+
+    def test_unknown_barrier_rejected(self):
+        with self.assertRaises(ValueError):
+            build_shard_steps([], {}, "bogus")
+
+
+@unittest.skipUnless(sys.platform.startswith("linux"), "pty emulation needs Linux")
+class TestShardCoordinatorPty(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp)
+        use_temp_session(self, self.tmp)
+        self.rigs = {name: PtyResponder() for name in ("DevA", "DevB", "DevC", "DevD")}
+
+    def tearDown(self):
+        for rig in self.rigs.values():
+            rig.close()
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_cross_shard_variable_flows_in_order(self):
+        dict_data = {
+            "Devices": [make_device(n, rig.port) for n, rig in self.rigs.items()],
+            "Commands": [
+                make_command(
+                    "DevA",
+                    "AT+TOKEN",
+                    1,
+                    success_actions=[
+                        {"save": {"device": "DevB", "variable": "token", "value": "t0k3n"}}
+                    ],
+                ),
+                make_command("DevB", "ECHO {token}", 2, expected_responses=["t0k3n"]),
+                make_command("DevC", "AT", 3, concurrent_strategy="parallel"),
+                make_command("DevD", "AT", 3, concurrent_strategy="parallel"),
+            ],
+        }
+        with patch("components.ShardCoordinator.get_metrics_server") as get_server:
+            coordinator = ShardCoordinator(dict_data, shard_count=2, session_id="shard")
+            self.assertEqual(len(coordinator.shards), 2)
+            self.assertNotEqual(
+                coordinator.device_to_shard["DevA"], coordinator.device_to_shard["DevB"]
+            )
+            executed, failures = coordinator.run(loop_count=2)
+
+        self.assertEqual((executed, failures), (2, 0))
+        get_server.return_value.bind.assert_called_once_with(
+            coordinator.command_metrics, None, coordinator.data_store
+        )
+        self.assertEqual(self.rigs["DevB"].received.count("ECHO t0k3n"), 2)
+        self.assertEqual(coordinator.data_store.get_data("DevB", "token"), "t0k3n")
+        # worker 的命令结果回传到协调者的延迟直方图
+        self.assertEqual(coordinator.command_metrics.get("DevB", "ECHO t0k3n").count, 2)
+        self.assertEqual(len(coordinator.command_metrics), 4)
+        session_file = Path(self.tmp) / "temps/data_store/session_shard.json"
+        self.assertTrue(session_file.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,7 @@
+import os
+import tempfile
 import unittest
+from unittest.mock import patch
 from components.TablePrinter import TablePrinter
 from wcwidth import wcswidth, wcwidth
 
@@ -139,6 +142,34 @@ class TestTablePrinter(unittest.TestCase):
         rt.print_realtime_row(["t4", "r4"], is_print=True)
         rt.print_realtime_footer()
 
+    def test_fast_width_matches_wcwidth(self):
+        tp = TablePrinter(["A"], auto_terminal=False)
+        for text in ["AT+CSQ", "tab\there", "设备A", "✅PASS", "\x1b[0m", ""]:
+            expected = wcswidth(text)
+            self.assertEqual(tp._display_width(text), expected if expected >= 0 else len(text))
+        self.assertEqual(tp._truncate_text_to_width("abcdefgh", 5), "abc..")
+        self.assertEqual(tp._truncate_text_to_width("设备设备设备", 6), "设备..")
+
+    def test_realtime_rows_keep_file_open(self):
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        tp = TablePrinter(["T", "R"], max_width=60, min_width=40, auto_terminal=False,
+                          row_separators=False, flush_rows=False)
+        try:
+            with patch("builtins.open", wraps=open) as opened:
+                for i in range(50):
+                    tp.print_realtime_row([f"t{i}", "r"], log_file=path, is_print=False)
+            self.assertEqual(opened.call_count, 1)
+            tp.flush()
+            with open(path, encoding="utf-8") as f:
+                lines = f.read().splitlines()
+            # 表头 3 行 + 50 行数据，没有行间分隔线
+            self.assertEqual(len(lines), 53)
+            self.assertTrue(lines[-1].startswith("│t49"))
+        finally:
+            tp.close()
+            os.unlink(path)
+
 
 if __name__ == "__main__":
     unittest.main()
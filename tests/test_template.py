@@ -0,0 +1,53 @@
+import unittest
+
+from components.DataStore import DataStore
+from utils.common import CommonUtils
+from utils.template import compile_template
+
+
+class TestCompiledTemplate(unittest.TestCase):
+    def setUp(self):
+        self.store = DataStore(persist=False)
+        self.store.store_data("Constants", "APN", "internet")
+        self.store.store_data("Constants", "EMPTY", "")
+        self.store.store_data("DevA", "IMEI", "8612345")
+        self.store.store_data("DevA", "EMPTY", "from-device")
+        self.store.store_data("DevA", "COUNT", 0)
+
+    def test_segments_and_cache(self):
+        template = compile_template('AT+CGDCONT=1,"IP","{APN}",{APN}')
+        self.assertEqual(template.variables, ("APN",))
+        self.assertIs(compile_template('AT+CGDCONT=1,"IP","{APN}",{APN}'), template)
+        self.assertTrue(compile_template("AT+CSQ").is_static)
+
+    def test_constants_take_precedence_over_device_variables(self):
+        self.assertEqual(
+            CommonUtils.process_variables("{APN}-{IMEI}", self.store, "DevA"),
+            "internet-8612345",
+        )
+        # Constants 中的空值回落到设备变量
+        self.assertEqual(
+            CommonUtils.process_variables("{EMPTY}", self.store, "DevA"), "from-device"
+        )
+        self.assertEqual(CommonUtils.process_variables("{COUNT}", self.store, "DevA"), "0")
+
+    def test_unresolved_variables_are_kept(self):
+        self.assertEqual(
+            CommonUtils.process_variables("{IMEI}{MISSING}", self.store), "{IMEI}{MISSING}"
+        )
+        self.assertEqual(CommonUtils.process_variables("{APN}", None), "{APN}")
+        self.assertEqual(CommonUtils.process_variables("{bad-name}", self.store), "{bad-name}")
+
+    def test_substituted_values_are_not_rescanned(self):
+        self.store.store_data("Constants", "A", "{B}")
+        self.store.store_data("Constants", "B", "b")
+        self.assertEqual(CommonUtils.process_variables("{A}{B}", self.store), "{B}b")
+        # 结果与变量出现的顺序无关
+        self.assertEqual(CommonUtils.process_variables("{B}{A}", self.store), "b{B}")
+
+    def test_non_string_passthrough(self):
+        self.assertEqual(CommonUtils.process_variables(115200, self.store), 115200)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -89,16 +89,15 @@ class ActionHandler:
                 )
                 return False
 
-            self.executor.data_store.store_data(device_name, variable, value)
-
-            # 验证数据是否成功存储
-            stored_value = self.executor.data_store.get_data(device_name, variable)
-            if stored_value != value:
-                logger.log_warning(
-                    f"⚠️ Warning: Stored value verification failed for {device_name}.{variable}"
-                )
-                return False
+            # 记录所属迭代（流水线模式下各设备组的迭代可能不同）
+            self.executor.data_store.store_data(
+                device_name,
+                variable,
+                value,
+                iteration=getattr(self.executor, "current_iteration", None),
+            )
 
+            # store_data 以原子方式发布新版本数据，无需再回读校验
             return True
         except Exception as e:
             logger.log_step_error(
@@ -311,7 +310,13 @@ class ActionHandler:
             f"Starting retry operation, will retry '{cmd_str}' {retry_times} times on device '{device_name}'..."
         )
 
+        token = getattr(self.executor, "iteration_token", None)
         for attempt in range(retry_times):
+            if token is not None and token.cancelled:
+                logger.log_step_warning(
+                    f"Retry on device '{device_name}' cancelled, iteration aborted"
+                )
+                break
             logger.log_step_info(f"Retry attempt {attempt + 1}/{retry_times}")
 
             # Get hex_mode from command if available
@@ -399,6 +404,10 @@ class ActionHandler:
             duration = float(wait_action)
 
         logger.log_step_info(f"ℹ Waiting for {duration} milliseconds")
+        token = getattr(self.executor, "iteration_token", None)
+        if token is not None:
+            # 迭代中止/会话取消时提前结束等待
+            return token.sleep(duration / 1000)
         time.sleep(duration / 1000)
         return True
 
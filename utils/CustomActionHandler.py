@@ -320,6 +320,7 @@ class CustomActionHandler(ActionHandler):
                         self.handle_variables_from_str(s.get("device")),
                         self.handle_variables_from_str(s.get("variable")),
                         result_text,
+                        iteration=getattr(self.executor, "current_iteration", None),
                     )
                 except Exception as e:
                     CommonUtils.print_log_line(f"⚠️ 保存到 data_store 失败: {e}")
@@ -379,6 +380,7 @@ class CustomActionHandler(ActionHandler):
                     self.handle_variables_from_str(save_to["device"]),
                     self.handle_variables_from_str(save_to["variable"]),
                     response.text,
+                    iteration=getattr(self.executor, "current_iteration", None),
                 )
 
             CommonUtils.print_log_line(
@@ -0,0 +1,101 @@
+"""
+协作式取消（Cooperative cancellation）
+
+CancellationToken 在执行器、设备等待循环、ActionHandler 和延迟命令队列之间传递。
+取消后所有通过 token 等待的位置会立即返回，由调用方自行收尾，
+而不是依赖 sys.exit() 或守护线程被动结束。
+
+令牌可以组成树：``child()`` 创建的子令牌会随父令牌一起被取消，
+但取消子令牌不会影响父令牌。执行器用会话令牌的子令牌表示"当前迭代"，
+关键命令失败时只取消本轮迭代。
+
+Token 提供与 threading.Event 兼容的 ``is_set()`` / ``wait()``，
+因此可以直接替换原来的 Event 参数。
+"""
+
+import threading
+from typing import Callable, List, Optional
+
+
+class OperationCancelled(Exception):
+    """操作因令牌被取消而中止"""
+
+
+class CancellationToken:
+    """可组成父子关系的取消令牌"""
+
+    def __init__(self, parent: Optional["CancellationToken"] = None):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._children: List["CancellationToken"] = []
+        self._callbacks: List[Callable[["CancellationToken"], None]] = []
+        self.reason: Optional[str] = None
+        self.parent = parent
+        if parent is not None:
+            parent._attach(self)
+
+    def _attach(self, child: "CancellationToken") -> None:
+        with self._lock:
+            if not self._event.is_set():
+                self._children.append(child)
+                return
+        child.cancel(self.reason)
+
+    def _detach(self, child: "CancellationToken") -> None:
+        with self._lock:
+            if child in self._children:
+                self._children.remove(child)
+
+    def child(self) -> "CancellationToken":
+        """创建随本令牌一起取消的子令牌"""
+        return CancellationToken(parent=self)
+
+    def release(self) -> None:
+        """从父令牌上解除关联（子令牌用完后调用，避免父令牌持有过多引用）"""
+        if self.parent is not None:
+            self.parent._detach(self)
+
+    def cancel(self, reason: Optional[str] = None) -> None:
+        """取消令牌及其所有子令牌；重复调用无副作用"""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason or "cancelled"
+            self._event.set()
+            children, self._children = self._children, []
+            callbacks, self._callbacks = self._callbacks, []
+        for child in children:
+            child.cancel(self.reason)
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception:
+                pass
+
+    def on_cancel(self, callback: Callable[["CancellationToken"], None]) -> None:
+        """注册取消回调；已取消时立即调用"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def is_set(self) -> bool:
+        """与 threading.Event 兼容"""
+        return self._event.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """等待至多 timeout 秒，被取消时立即返回 True（与 Event.wait 语义相同）"""
+        return self._event.wait(timeout)
+
+    def sleep(self, seconds: float) -> bool:
+        """可被取消的 sleep，完整睡眠返回 True，被取消返回 False"""
+        return not self._event.wait(seconds)
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise OperationCancelled(self.reason)
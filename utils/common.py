@@ -3,10 +3,11 @@
 from typing import List, TYPE_CHECKING
 import os
 import re
-import sys
 import shutil
 from pathlib import Path
 
+from utils.template import VARIABLE_PATTERN, render_template
+
 if TYPE_CHECKING:
     from components.DataStore import DataStore
 
@@ -460,90 +461,29 @@ class CommonUtils:
         Returns:
             List of variable names found in the string
         """
-        pattern = re.compile(r"\{([A-Za-z0-9_]+)\}")
-        found_variables = re.findall(pattern, s)
-        return found_variables
+        return VARIABLE_PATTERN.findall(s)
 
     @staticmethod
     def process_variables(
         param_value: str, data_store: "DataStore", device_name: str = ""
     ) -> str:
-        """Process variables in a string and handle interactive input for empty values
+        """Process variables in a string
+
+        模板按源字符串编译并缓存，变量值在 DataStore 上一次加锁取得
+        （见 utils.template）。替换进来的值原样输出，不会再次展开其中的 {VAR}。
 
         Args:
-            param_value: String that may contain variables like ${VAR}
-            data_store: DataStore instance to get/store variable values
+            param_value: String that may contain variables like {VAR}
+            data_store: DataStore instance to get variable values
             device_name: Optional device name for retrieving device-specific variables
 
         Returns:
-            String with all variables replaced with their values
+            String with all resolvable variables replaced with their values
         """
         if not isinstance(param_value, str):
             return param_value
 
-        vars = CommonUtils.parse_variables_from_str(param_value)
-        if not vars:
-            return param_value
-
-        var_values = {}
-        for var in vars:
-            # 优先从 Constants 获取值
-            if data_store:
-                var_value = data_store.get_constant(var)
-                if var_value is not None:
-                    if var_value != "":
-                        var_values[var] = var_value
-                        continue
-                    else:  # 空值，需要用户输入
-                        max_retries = 3
-                        for attempt in range(max_retries):
-                            try:
-                                value = input(f"Please enter value for {var}: ").strip()
-
-                                if not value:  # 如果输入为空
-                                    if attempt < max_retries - 1:
-                                        CommonUtils.print_log_line(
-                                            f"Value cannot be empty. Please try again ({attempt + 1}/{max_retries})"
-                                        )
-                                        continue
-                                    else:
-                                        CommonUtils.print_log_line(
-                                            f"❌ No valid value provided for {var} after {max_retries} attempts"
-                                        )
-                                        sys.exit(1)
-
-                                # 保存输入的值到 Constants
-                                data_store.store_data("Constants", var, value)
-                                var_values[var] = value
-                                CommonUtils.print_log_line(f"✓ Stored {var} = {value}")
-                                break
-
-                            except KeyboardInterrupt:
-                                CommonUtils.print_log_line(
-                                    "\n❌ Input cancelled by user"
-                                )
-                                sys.exit(1)
-                            except Exception as e:
-                                if attempt < max_retries - 1:
-                                    CommonUtils.print_log_line(
-                                        f"Error: {e}. Please try again ({attempt + 1}/{max_retries})"
-                                    )
-                                    continue
-                                else:
-                                    CommonUtils.print_log_line(
-                                        f"❌ Failed to get value for {var} after {max_retries} attempts: {e}"
-                                    )
-                                    sys.exit(1)
-                        continue
-
-                # 尝试从设备变量获取值
-                if device_name:
-                    var_value = data_store.get_data(device_name, var)
-                    if var_value is not None:
-                        var_values[var] = var_value
-                        continue
-
-        return CommonUtils.replace_variables_from_str(param_value, vars, **var_values)
+        return render_template(param_value, data_store, device_name)
 
     @staticmethod
     def replace_variables_from_str(s: str, found_variables: List[str], **kwargs) -> str:
@@ -7,7 +7,10 @@ DataStore Manager - 管理和查询 AutoCom 数据存储
 - 查看特定会话的数据
 - 跨会话查询变量
 - 清理旧文件
-- 导出数据
+- 导出数据（单个汇总文件，或按 session_<id>.json 文件布局导出）
+- 把会话文件导入 SQLite 数据库
+- 重建会话目录索引（catalog.json）
+- 查看变量历史的聚合统计
 """
 
 import sys
@@ -16,6 +19,9 @@ import json
 import argparse
 from datetime import datetime
 from components.DataStore import DataStore
+from components.DataSerializer import SERIALIZATION_FORMATS, get_serializer
+from components.DataStoreSQLite import DB_FILENAME, SQLiteBackend
+from components.SessionCatalog import SessionCatalog
 from utils.common import CommonUtils
 
 # Add parent directory to path
@@ -36,11 +42,11 @@ def list_sessions(data_dir="temps/data_store", days=7):
 
     for i, (session_id, filepath, file_time) in enumerate(sessions, 1):
         time_str = datetime.fromtimestamp(file_time).strftime("%Y-%m-%d %H:%M:%S")
-        file_size = os.path.getsize(filepath)
         print(f"{i}. Session: {session_id}")
         print(f"   File: {filepath}")
         print(f"   Time: {time_str}")
-        print(f"   Size: {file_size} bytes")
+        if os.path.basename(filepath) != DB_FILENAME:
+            print(f"   Size: {os.path.getsize(filepath)} bytes")
         print()
 
 
@@ -97,25 +103,20 @@ def cleanup_old_files(data_dir="temps/data_store", days=7, dry_run=False):
         print(f"Directory not found: {data_dir}")
         return
 
-    import glob
     import time as time_module
 
     current_time = time_module.time()
     cutoff_time = current_time - (days * 24 * 3600)
 
-    pattern = os.path.join(data_dir, "session_*.json")
-    files = glob.glob(pattern)
+    catalog = SessionCatalog(data_dir)
+    to_delete = catalog.sessions(until=cutoff_time)
 
-    to_delete = []
-    for filepath in files:
-        try:
-            file_time = os.path.getmtime(filepath)
-            if file_time < cutoff_time:
-                to_delete.append((filepath, file_time))
-        except Exception as e:
-            print(f"Error checking file {filepath}: {e}")
+    backend = SQLiteBackend.open_existing(data_dir)
+    stale_sessions = backend.list_sessions(until=cutoff_time) if backend else []
 
-    if not to_delete:
+    if not to_delete and not stale_sessions:
+        if backend is not None:
+            backend.close()
         print(f"No files older than {days} days found")
         return
 
@@ -123,43 +124,66 @@ def cleanup_old_files(data_dir="temps/data_store", days=7, dry_run=False):
     print(f"{'DRY RUN - ' if dry_run else ''}Files to delete (older than {days} days):")
     print(f"{'='*80}\n")
 
-    for filepath, file_time in to_delete:
-        time_str = datetime.fromtimestamp(file_time).strftime("%Y-%m-%d %H:%M:%S")
-        file_size = os.path.getsize(filepath)
-        print(f"- {os.path.basename(filepath)}")
-        print(f"  Time: {time_str}, Size: {file_size} bytes")
+    for session_id, entry in to_delete:
+        time_str = datetime.fromtimestamp(entry["last_ts"]).strftime("%Y-%m-%d %H:%M:%S")
+        print(f"- {os.path.basename(entry['path'])}")
+        print(f"  Time: {time_str}, Size: {entry['size']} bytes")
+
+    for session_id, updated in stale_sessions:
+        time_str = datetime.fromtimestamp(updated).strftime("%Y-%m-%d %H:%M:%S")
+        print(f"- {session_id} ({DB_FILENAME})")
+        print(f"  Time: {time_str}")
 
-    print(f"\nTotal: {len(to_delete)} files")
+    print(f"\nTotal: {len(to_delete)} files, {len(stale_sessions)} database sessions")
 
     if not dry_run:
         confirm = input("\nAre you sure you want to delete these files? (yes/no): ")
         if confirm.lower() == "yes":
-            deleted_count = 0
-            for filepath, _ in to_delete:
-                try:
-                    os.remove(filepath)
-                    backup_file = f"{filepath}.backup"
-                    if os.path.exists(backup_file):
-                        os.remove(backup_file)
-                    deleted_count += 1
-                except Exception as e:
-                    print(f"Error deleting {filepath}: {e}")
+            deleted_count = catalog.remove(
+                [session_id for session_id, _ in to_delete], delete_files=True
+            )
+            if stale_sessions:
+                deleted_count += backend.delete_sessions(
+                    [session_id for session_id, _ in stale_sessions]
+                )
             print(f"\nDeleted {deleted_count} files")
         else:
             print("Deletion cancelled")
 
+    if backend is not None:
+        backend.close()
 
-def export_data(output_file, data_dir="temps/data_store", days=7):
-    """导出所有会话数据到单个文件"""
+
+def export_data(
+    output_file, data_dir="temps/data_store", days=7, layout="bundle", fmt="json"
+):
+    """导出会话数据（可读取任一序列化格式的会话文件）
+
+    layout:
+        bundle: 所有会话导出到单个 JSON 文件
+        files:  output_file 作为目录，每个会话导出为 session_<id>.json（与 snapshot 模式的文件布局相同）
+    fmt: files 布局下会话文件的序列化格式（可用于格式转换）
+    """
     sessions = DataStore.list_sessions(data_dir, days)
 
     if not sessions:
         print(f"No sessions found in the last {days} days")
         return
 
+    if layout == "files":
+        os.makedirs(output_file, exist_ok=True)
+        for session_id, filepath, file_time in sessions:
+            data = DataStore.load_session_data(session_id, filepath)
+            target = os.path.join(output_file, f"session_{session_id}.json")
+            with open(target, "wb") as f:
+                f.write(get_serializer(fmt).dumps(data))
+            os.utime(target, (file_time, file_time))
+        print(f"Exported {len(sessions)} sessions to: {output_file}")
+        return
+
     export_data = {}
     for session_id, filepath, file_time in sessions:
-        data = DataStore.load_session_data(filepath=filepath)
+        data = DataStore.load_session_data(session_id, filepath)
         time_str = datetime.fromtimestamp(file_time).strftime("%Y-%m-%d %H:%M:%S")
         export_data[session_id] = {"timestamp": time_str, "data": data}
 
@@ -171,6 +195,85 @@ def export_data(output_file, data_dir="temps/data_store", days=7):
         print(f"Error exporting data: {e}")
 
 
+def import_files(data_dir="temps/data_store", days=None):
+    """把 session_*.json 会话文件导入 SQLite 数据库（已存在的会话会被覆盖）"""
+    import glob
+
+    files = sorted(glob.glob(os.path.join(data_dir, "session_*.json")))
+    if days is not None:
+        import time as time_module
+
+        cutoff_time = time_module.time() - (days * 24 * 3600)
+        files = [f for f in files if os.path.getmtime(f) >= cutoff_time]
+
+    if not files:
+        print(f"No session files found in: {data_dir}")
+        return
+
+    backend = SQLiteBackend(os.path.join(data_dir, DB_FILENAME))
+    imported = 0
+    try:
+        for filepath in files:
+            session_id = (
+                os.path.basename(filepath).replace("session_", "").replace(".json", "")
+            )
+            data = DataStore.load_session_data(filepath=filepath)
+            existing = backend.load_session(session_id)
+            devices = {device: None for device in existing}
+            devices.update(data)
+            backend.save_devices(session_id, devices, ts=os.path.getmtime(filepath))
+            imported += 1
+    finally:
+        backend.close()
+    print(f"Imported {imported} sessions into: {os.path.join(data_dir, DB_FILENAME)}")
+
+
+def show_history(
+    session_id,
+    device=None,
+    variable=None,
+    data_dir="temps/data_store",
+    start_iteration=None,
+    end_iteration=None,
+):
+    """查看会话中变量历史的聚合统计"""
+    series = DataStore.load_history(session_id=session_id, data_dir=data_dir)
+    selected = [
+        (key, history)
+        for key, history in sorted(series.items())
+        if (device is None or key[0] == device) and (variable is None or key[1] == variable)
+    ]
+    if not selected:
+        print(f"No history found for session: {session_id}")
+        return
+
+    print(f"\n{'='*80}")
+    print(f"Variable History: {session_id}")
+    print(f"{'='*80}\n")
+
+    for (device_name, variable_name), history in selected:
+        stats = history.stats(start_iteration=start_iteration, end_iteration=end_iteration)
+        print(f"{device_name}.{variable_name}")
+        if not stats["count"]:
+            print("   No samples in range\n")
+            continue
+        print(
+            f"   count={stats['count']} min={stats['min']:g} max={stats['max']:g} "
+            f"mean={stats['mean']:.3f}"
+        )
+        print(
+            f"   p50={stats['p50']:g} p90={stats['p90']:g} p99={stats['p99']:g} "
+            f"(retained {stats['retained']}, dropped {stats['dropped']})"
+        )
+        print()
+
+
+def reindex(data_dir="temps/data_store"):
+    """重新扫描数据目录，重建会话目录索引"""
+    count = SessionCatalog(data_dir).rebuild()
+    print(f"Indexed {count} session files in: {data_dir}")
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="DataStore Manager - Manage and query AutoCom data storage",
@@ -230,6 +333,55 @@ def main():
     export_parser.add_argument(
         "--dir", default="temps/data_store", help="Data directory"
     )
+    export_parser.add_argument(
+        "--layout",
+        choices=["bundle", "files"],
+        default="bundle",
+        help="bundle: single JSON file; files: one session_<id>.json per session "
+        "in the output directory (default: bundle)",
+    )
+    export_parser.add_argument(
+        "--format",
+        choices=SERIALIZATION_FORMATS,
+        default="json",
+        help="Serialization of exported session files with --layout files (default: json)",
+    )
+
+    # Import command
+    import_parser = subparsers.add_parser(
+        "import", help="Import session_*.json files into the SQLite database"
+    )
+    import_parser.add_argument(
+        "--days", type=int, default=None, help="Only import files from the last N days"
+    )
+    import_parser.add_argument(
+        "--dir", default="temps/data_store", help="Data directory"
+    )
+
+    # Reindex command
+    reindex_parser = subparsers.add_parser(
+        "reindex", help="Rebuild the session catalog by scanning the data directory"
+    )
+    reindex_parser.add_argument(
+        "--dir", default="temps/data_store", help="Data directory"
+    )
+
+    # History command
+    history_parser = subparsers.add_parser(
+        "history", help="Show aggregates of recorded variable history"
+    )
+    history_parser.add_argument("session_id", help="Session ID")
+    history_parser.add_argument("device", nargs="?", help="Device name (optional)")
+    history_parser.add_argument("variable", nargs="?", help="Variable name (optional)")
+    history_parser.add_argument(
+        "--from-iteration", type=int, default=None, help="First iteration (inclusive)"
+    )
+    history_parser.add_argument(
+        "--to-iteration", type=int, default=None, help="Last iteration (inclusive)"
+    )
+    history_parser.add_argument(
+        "--dir", default="temps/data_store", help="Data directory"
+    )
 
     args = parser.parse_args()
 
@@ -246,7 +398,20 @@ def main():
     elif args.command == "cleanup":
         cleanup_old_files(args.dir, args.days, args.dry_run)
     elif args.command == "export":
-        export_data(args.output, args.dir, args.days)
+        export_data(args.output, args.dir, args.days, args.layout, args.format)
+    elif args.command == "import":
+        import_files(args.dir, args.days)
+    elif args.command == "reindex":
+        reindex(args.dir)
+    elif args.command == "history":
+        show_history(
+            args.session_id,
+            args.device,
+            args.variable,
+            args.dir,
+            args.from_iteration,
+            args.to_iteration,
+        )
 
 
 if __name__ == "__main__":
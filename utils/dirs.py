@@ -129,8 +129,13 @@ class Dirs:
     @property
     def session_dir(self) -> Path:
         if self._session_dir is None:
-            ts = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-            self._session_dir = _ensure_dir(self.device_logs_dir / ts)
+            # 子进程(如分片 worker)通过 AUTOCOM_SESSION_DIR 复用父进程的会话目录
+            env_session = os.getenv("AUTOCOM_SESSION_DIR")
+            if env_session:
+                self._session_dir = _ensure_dir(Path(env_session).resolve())
+            else:
+                ts = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+                self._session_dir = _ensure_dir(self.device_logs_dir / ts)
         return self._session_dir
 
     # ========= 便捷查询 + 初始化 =========
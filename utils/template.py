@@ -0,0 +1,88 @@
+"""
+变量模板编译与渲染
+
+命令字符串、参数、期望响应和 action 参数中的 ``{VAR}`` 占位符在每次迭代中
+都会被解析。这里把模板字符串一次性拆分为"字面量 / 变量"片段并按源字符串缓存，
+渲染时无锁读取 DataStore 中 Constants 与设备命名空间的只读快照，再用一次 ``join``
+拼出结果。每个模板按设备记住上一次的渲染结果和这两个命名空间的版本号，版本未变时
+直接复用（其它设备的写入不会使缓存失效）。
+
+变量解析规则与 ``CommonUtils.process_variables`` 保持一致：
+- 优先使用 Constants 中的非空值；
+- 其次使用指定设备命名空间下的变量；
+- 都没有时保留原始占位符。
+
+与旧实现的差异：模板只扫描一次，替换进来的值原样输出，不再被当作模板展开。
+旧实现按变量逐个 ``str.replace``，若某个值本身包含原字符串中出现过的 ``{VAR}``，
+结果取决于变量出现的顺序（``A="{B}"`` 时 ``"{A}{B}"`` 会展开为 ``"bb"``，
+``"{B}{A}"`` 却得到 ``"b{B}"``）。需要嵌套引用时请在保存变量时直接写入最终值。
+"""
+
+import re
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    from components.DataStore import DataStore
+
+VARIABLE_PATTERN = re.compile(r"\{([A-Za-z0-9_]+)\}")
+
+# 模板缓存上限：执行配置中的字符串数量有限，超过后按 LRU 淘汰
+TEMPLATE_CACHE_SIZE = 4096
+
+
+class CompiledTemplate:
+    """编译后的模板：偶数下标为字面量，奇数下标为变量名"""
+
+    __slots__ = ("source", "segments", "variables", "rendered")
+
+    def __init__(self, source: str):
+        self.source = source
+        self.segments: Tuple[str, ...] = tuple(VARIABLE_PATTERN.split(source))
+        # 去重并保持出现顺序
+        self.variables: Tuple[str, ...] = tuple(dict.fromkeys(self.segments[1::2]))
+        # device_name -> ((Constants 版本号, 设备版本号), 渲染结果)
+        self.rendered: Dict[str, Tuple[Tuple[int, int], str]] = {}
+
+    @property
+    def is_static(self) -> bool:
+        return not self.variables
+
+    def render(self, values: Dict[str, object]) -> str:
+        """用给定的变量值渲染模板，缺失或为 None 的变量保留 ``{name}`` 占位符"""
+        if not self.variables:
+            return self.source
+        parts = list(self.segments)
+        for i in range(1, len(parts), 2):
+            name = parts[i]
+            value = values.get(name)
+            parts[i] = "{" + name + "}" if value is None else str(value)
+        return "".join(parts)
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def compile_template(source: str) -> CompiledTemplate:
+    """编译模板字符串（按源字符串缓存）"""
+    return CompiledTemplate(source)
+
+
+def render_template(
+    source: str, data_store: Optional["DataStore"], device_name: str = ""
+) -> str:
+    """解析字符串中的变量并返回替换后的结果"""
+    template = compile_template(source)
+    if template.is_static or data_store is None:
+        return source
+    key, constants, device_vars = data_store.namespace_state(device_name)
+    cached = template.rendered.get(device_name)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    text = template.render(
+        data_store.resolve_variables(
+            template.variables,
+            device_name,
+            {"Constants": constants, device_name: device_vars},
+        )
+    )
+    template.rendered[device_name] = (key, text)
+    return text